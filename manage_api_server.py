@@ -4,8 +4,21 @@ API Server Management Utility
 Manually start/stop/check the API server
 """
 
-import subprocess
-import time
+import requests
+
+from corally.api import lifecycle
+from corally.api.client import ApiClient
+
+PORT = 8000
+
+# One keep-alive client for all checks; it remembers whether the server answered
+client = ApiClient(f"http://127.0.0.1:{PORT}", timeout=10)
+
+
+def get_registered_pid(port=PORT):
+    """PID of the server registered on a port by the lifecycle manager, or None"""
+    record = lifecycle.find_server(port)
+    return record["pid"] if record else None
 
 def check_server_status():
     """Check if API server is running on port 8000"""
@@ -13,10 +26,8 @@ def check_server_status():
 
     # Method 1: Check if our API is responding correctly
     try:
-        import requests
-
         # Test root endpoint
-        response = requests.get("http://127.0.0.1:8000/", timeout=5)
+        response = client.get("/", fail_fast=False, timeout=5)
         print(f"📡 Server response on /: {response.status_code}")
 
         if response.status_code == 200:
@@ -24,7 +35,7 @@ def check_server_status():
                 data = response.json()
                 if "message" in data and "Calculator" in str(data):
                     print("✅ Our API Server is running correctly on port 8000")
-                    pid = get_pid_on_port(8000)
+                    pid = get_registered_pid()
                     if pid:
                         print(f"   Process ID: {pid}")
                     return pid if pid else "responding"
@@ -36,8 +47,8 @@ def check_server_status():
 
         # Test API endpoint specifically
         print("🧪 Testing API conversion endpoint...")
-        api_response = requests.get(
-            "http://127.0.0.1:8000/convert",
+        api_response = client.get(
+            "/convert",
             params={"from_currency": "EUR", "to_currency": "USD", "amount": "1"},
             timeout=5
         )
@@ -46,7 +57,7 @@ def check_server_status():
             print("✅ API conversion endpoint is working!")
             data = api_response.json()
             print(f"   Test conversion: 1 EUR = {data.get('result', 'N/A')} USD")
-            pid = get_pid_on_port(8000)
+            pid = get_registered_pid()
             return pid if pid else "responding"
         else:
             print(f"❌ API conversion endpoint failed: {api_response.status_code}")
@@ -56,110 +67,52 @@ def check_server_status():
     except Exception as e:
         print(f"⚠️  API test failed: {e}")
 
-    # Method 2: Check port usage with netstat
-    pid = get_pid_on_port(8000)
-    if pid:
-        print(f"⚠️  Process found on port 8000 (PID: {pid}) but it's not our API server")
-        print("💡 This might be a different application using port 8000")
-        print("💡 Try stopping it first, then start our API server")
-        return pid
-    else:
-        print("❌ No process found on port 8000")
-        return None
-
-def get_pid_on_port(port, debug=False):
-    """Get PID of process using specified port"""
-    try:
-        result = subprocess.run(
-            ["netstat", "-ano"],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-
-        if debug:
-            print(f"🔍 Looking for port {port} in netstat output...")
-
-        for line in result.stdout.split('\n'):
-            if f':{port}' in line:
-                if debug:
-                    print(f"   Found line: {line}")
-
-                # Check for various forms of LISTENING status
-                listening_indicators = ['LISTENING', 'ABHÖREN', 'LISTEN', 'ABH?REN', 'ABHOREN', 'ABH™REN']
-                if any(indicator in line for indicator in listening_indicators):
-                    parts = line.split()
-                    if parts:
-                        pid = parts[-1]
-                        if pid.isdigit():
-                            if debug:
-                                print(f"   Extracted PID: {pid}")
-                            return pid
-                elif debug:
-                    print("   Line doesn't contain listening indicators")
-
-        if debug:
-            print(f"   No listening process found on port {port}")
-        return None
-
-    except Exception as e:
-        print(f"❌ Error checking port {port}: {e}")
-        return None
+    # Method 2: Check the servers registered by the lifecycle manager
+    for record in lifecycle.list_servers():
+        if record["port"] == PORT:
+            print(f"⚠️  Registered server on port {PORT} (PID: {record['pid']}) is not answering")
+            return record["pid"]
+    print(f"❌ No registered server on port {PORT}")
+    return None
 
 def stop_server():
     """Stop the API server"""
     print("🛑 Stopping API server...")
 
-    # Get PID directly with debug info
-    pid = get_pid_on_port(8000, debug=True)
-    if not pid:
-        print("ℹ️  No server found on port 8000")
+    if lifecycle.read_record(PORT) is None:
+        print(f"ℹ️  No registered server on port {PORT}")
         return True
 
-    print(f"📋 Found server process (PID: {pid})")
+    # Shutdown endpoint first, signals as a fallback
+    if not lifecycle.stop_server(PORT):
+        print("❌ Failed to stop server")
+        return False
+    client.mark(False, "server stopped")
+    print("✅ Server stopped successfully!")
 
+    # Double-check by testing API
     try:
-        print("🔄 Attempting to stop server...")
-        result = subprocess.run(["taskkill", "/PID", pid, "/F"],
-                               capture_output=True, timeout=5, text=True)
-
-        if result.returncode == 0:
-            print(f"✅ Successfully sent kill signal to PID {pid}")
-        else:
-            print(f"⚠️  Kill command returned code {result.returncode}")
-            print(f"   Output: {result.stdout}")
-            print(f"   Error: {result.stderr}")
-
-        # Wait a moment for process to terminate
-        time.sleep(2)
-
-        # Check if process is still running
-        new_pid = get_pid_on_port(8000)
-        if not new_pid:
-            print("✅ Server stopped successfully!")
-
-            # Double-check by testing API
-            try:
-                import requests
-                requests.get("http://127.0.0.1:8000/convert", timeout=2)
-                print("⚠️  API still responding - server may have restarted")
-                return False
-            except requests.exceptions.ConnectionError:
-                print("✅ Confirmed: API server is no longer responding")
-                return True
-            except Exception:
-                print("✅ Server appears to be stopped")
-                return True
-        else:
-            if new_pid == pid:
-                print(f"❌ Server is still running (same PID: {pid})")
-            else:
-                print(f"⚠️  Different server now running (new PID: {new_pid})")
-            return False
+        client.get("/convert", fail_fast=False, timeout=2)
+        print("⚠️  API still responding - another server may be using the port")
+        return False
+    except requests.exceptions.ConnectionError:
+        print("✅ Confirmed: API server is no longer responding")
+        return True
+    except Exception:
+        print("✅ Server appears to be stopped")
+        return True
 
-    except Exception as e:
-        print(f"❌ Failed to stop server: {e}")
+def _start(app, label):
+    """Start a registered server and wait until it answers"""
+    try:
+        record = lifecycle.start_server(app, port=PORT)
+    except (RuntimeError, OSError) as e:
+        print(f"❌ Failed to start server: {e}")
         return False
+    client.mark(True)
+    print(f"✅ {label} server started successfully! (PID: {record['pid']})")
+    print(f"🌐 Test it: http://127.0.0.1:{PORT}")
+    return True
 
 def start_free_server():
     """Start the free API server"""
@@ -170,29 +123,10 @@ def start_free_server():
         print("ℹ️  Server is already running")
         return False
     
-    try:
-        print("   Command: uvicorn corally.api.free_server:app --host 127.0.0.1 --port 8000")
-        subprocess.Popen(
-            ["uvicorn", "corally.api.free_server:app", "--host", "127.0.0.1", "--port", "8000"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
-        
-        # Wait a moment for server to start
-        time.sleep(3)
-        
-        if check_server_status():
-            print("✅ Free API server started successfully!")
-            print("🌐 Test it: http://127.0.0.1:8000")
-            print("💱 Convert: http://127.0.0.1:8000/convert?from_currency=EUR&to_currency=USD&amount=100")
-            return True
-        else:
-            print("❌ Server failed to start")
-            return False
-            
-    except Exception as e:
-        print(f"❌ Failed to start server: {e}")
-        return False
+    if _start("free", "Free API"):
+        print(f"💱 Convert: http://127.0.0.1:{PORT}/convert?from_currency=EUR&to_currency=USD&amount=100")
+        return True
+    return False
 
 def start_paid_server():
     """Start the paid API server (requires .env file)"""
@@ -209,43 +143,16 @@ def start_paid_server():
         print("❌ .env file not found. Create it with: API_KEY=your_key")
         return False
     
-    try:
-        print("   Command: uvicorn corally.api.server:app --host 127.0.0.1 --port 8000 --reload")
-        subprocess.Popen(
-            ["uvicorn", "corally.api.server:app", "--host", "127.0.0.1", "--port", "8000", "--reload"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
-        
-        # Wait a moment for server to start
-        time.sleep(5)
-        
-        if check_server_status():
-            print("✅ Paid API server started successfully!")
-            print("🌐 Test it: http://127.0.0.1:8000")
-            return True
-        else:
-            print("❌ Server failed to start")
-            return False
-            
-    except Exception as e:
-        print(f"❌ Failed to start server: {e}")
-        return False
+    return _start("paid", "Paid API")
 
 def test_server():
     """Test if the server is responding"""
     print("🧪 Testing API server...")
 
     try:
-        import requests
-
         # Test conversion endpoint directly (this is what matters)
         print("💱 Testing currency conversion...")
-        conv_response = requests.get(
-            "http://127.0.0.1:8000/convert",
-            params={"from_currency": "EUR", "to_currency": "USD", "amount": "100"},
-            timeout=10
-        )
+        conv_response = client.convert("EUR", "USD", "100")
 
         if conv_response.status_code == 200:
             data = conv_response.json()
@@ -256,11 +163,7 @@ def test_server():
 
             # Test different currency pair
             print("\n💱 Testing different currency pair...")
-            conv_response2 = requests.get(
-                "http://127.0.0.1:8000/convert",
-                params={"from_currency": "GBP", "to_currency": "JPY", "amount": "50"},
-                timeout=10
-            )
+            conv_response2 = client.convert("GBP", "JPY", "50")
 
             if conv_response2.status_code == 200:
                 data2 = conv_response2.json()
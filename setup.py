@@ -55,6 +55,7 @@ setup(
         "python-dotenv>=0.19.0",
     ],
     extras_require={
+        "fast": ["orjson>=3.0"],  # faster JSON responses in the API servers
         "gui": [],  # tkinter is usually included with Python
         "dev": [
             "pytest>=6.0",
@@ -1,8 +1,23 @@
 """
 API modules for Corally calculator suite.
+
+The server modules are imported on first access, so importing a helper such
+as ``corally.api.serialization`` does not load both apps.
 """
 
-from .server import create_app, start_server
-from .free_server import create_free_app, start_free_server
+import importlib
+
+_EXPORTS = {
+    "create_app": ".server",
+    "start_server": ".server",
+    "create_free_app": ".free_server",
+    "start_free_server": ".free_server",
+}
 
 __all__ = ["create_app", "start_server", "create_free_app", "start_free_server"]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
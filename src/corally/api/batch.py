@@ -0,0 +1,160 @@
+"""
+Batch conversion support for the API servers.
+
+A batch is either a list of ``{"from", "to", "amount"}`` items or a columnar
+payload of equally long ``from``/``to``/``amount`` lists. Items are grouped
+by currency pair, each unique rate is resolved once, and each pair's
+amounts are converted in one pass over that group. Invalid items and
+failed pairs are reported per item instead of failing the whole batch.
+"""
+
+import asyncio
+import math
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from fastapi import HTTPException
+
+MAX_BATCH_ITEMS = 100_000
+MAX_CONCURRENT_PAIRS = 8
+
+Pair = Tuple[str, str]
+ParsedItem = Union[Tuple[str, str, float], str]
+RateResolver = Callable[[str, str], Awaitable[Tuple[float, bool]]]
+
+
+def _parse_item(from_currency: Any, to_currency: Any, amount: Any) -> ParsedItem:
+    """Validate one item; return (from, to, amount) or an error message."""
+    if not isinstance(from_currency, str) or not isinstance(to_currency, str):
+        return "Currency codes must be strings"
+    if len(from_currency) != 3 or len(to_currency) != 3:
+        return "Currency codes must be 3 letters (e.g., EUR, USD)"
+    try:
+        if isinstance(amount, str):
+            amount = amount.replace(",", ".")
+        if isinstance(amount, bool):
+            raise ValueError("not a number")
+        value = float(amount)
+        if not math.isfinite(value):
+            raise ValueError("not a finite number")
+    except (TypeError, ValueError) as e:
+        return f"Invalid amount '{amount}': {e}"
+    return from_currency.upper(), to_currency.upper(), value
+
+
+def parse_batch(payload: Any) -> List[ParsedItem]:
+    """
+    Parse a batch payload into items.
+
+    Args:
+        payload: ``[{...}, ...]``, ``{"items": [{...}, ...]}`` or a columnar
+                 ``{"from": [...], "to": [...], "amount": [...]}``. In the
+                 columnar form ``from`` and ``to`` may also be single strings
+                 that apply to every amount.
+
+    Returns:
+        list: One (from, to, amount) tuple or error message per item
+
+    Raises:
+        HTTPException: If the payload itself is malformed or too large
+    """
+    if isinstance(payload, dict) and "items" in payload:
+        payload = payload["items"]
+
+    if isinstance(payload, list):
+        if len(payload) > MAX_BATCH_ITEMS:
+            raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_ITEMS} items")
+        parsed = []
+        for item in payload:
+            if not isinstance(item, dict):
+                parsed.append("Item must be an object with 'from', 'to' and 'amount'")
+                continue
+            parsed.append(_parse_item(item.get("from"), item.get("to"), item.get("amount")))
+        return parsed
+
+    if isinstance(payload, dict) and "amount" in payload:
+        amounts = payload["amount"]
+        if not isinstance(amounts, list):
+            raise HTTPException(status_code=400, detail="Columnar 'amount' must be a list")
+        if len(amounts) > MAX_BATCH_ITEMS:
+            raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_ITEMS} items")
+        columns = []
+        for name in ("from", "to"):
+            column = payload.get(name)
+            if isinstance(column, list):
+                if len(column) != len(amounts):
+                    raise HTTPException(status_code=400, detail=f"Column '{name}' must have {len(amounts)} entries")
+            else:
+                column = [column] * len(amounts)
+            columns.append(column)
+        return [_parse_item(f, t, a) for f, t, a in zip(columns[0], columns[1], amounts)]
+
+    raise HTTPException(
+        status_code=400,
+        detail="Expected a list of items, {'items': [...]} or columnar 'from'/'to'/'amount' lists",
+    )
+
+
+async def convert_batch(payload: Any, resolve_rate: RateResolver, digits: Optional[int] = None) -> dict:
+    """
+    Convert a batch payload.
+
+    Args:
+        payload: Batch payload, see ``parse_batch``
+        resolve_rate: Coroutine ``resolve_rate(from, to) -> (rate, cached)``
+                      that goes through the server's cache and upstream path
+        digits (int): Round results to this many digits, or None
+
+    Returns:
+        dict: ``count``, ``errors``, ``pairs`` and one result per item
+    """
+    parsed = parse_batch(payload)
+
+    # Group item positions by pair; every group is converted in one pass
+    groups: Dict[Pair, List[int]] = {}
+    results: List[Optional[dict]] = [None] * len(parsed)
+    errors = 0
+    for index, item in enumerate(parsed):
+        if isinstance(item, str):
+            results[index] = {"index": index, "error": item}
+            errors += 1
+        else:
+            groups.setdefault(item[:2], []).append(index)
+
+    rates: Dict[Pair, Tuple[float, bool]] = {}
+    failures: Dict[Pair, str] = {}
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_PAIRS)
+
+    async def resolve(pair: Pair) -> None:
+        async with semaphore:
+            try:
+                rate, cached = await resolve_rate(*pair)
+                if rate is None:
+                    raise ValueError("No rate available")
+                rates[pair] = (float(rate), cached)
+            except HTTPException as e:
+                failures[pair] = str(e.detail)
+            except Exception as e:
+                failures[pair] = str(e)
+
+    await asyncio.gather(*(resolve(pair) for pair in groups))
+
+    for (from_currency, to_currency), indexes in groups.items():
+        amounts = [parsed[index][2] for index in indexes]
+        pair = (from_currency, to_currency)
+        if pair in failures:
+            error = failures[pair]
+            for index, amount in zip(indexes, amounts):
+                results[index] = {"index": index, "from": from_currency, "to": to_currency,
+                                  "amount": amount, "error": error}
+            errors += len(indexes)
+            continue
+        rate, cached = rates[pair]
+        values = [amount * rate for amount in amounts]
+        if digits is not None:
+            values = [round(value, digits) for value in values]
+        info = {"rate": rate}
+        for index, amount, value in zip(indexes, amounts, values):
+            results[index] = {"index": index, "from": from_currency, "to": to_currency, "amount": amount,
+                              "result": value, "cached": cached, "info": info}
+
+    return {"count": len(results), "errors": errors, "pairs": len(groups), "results": results}
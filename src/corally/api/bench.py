@@ -0,0 +1,314 @@
+"""
+Load-test harness for the API servers.
+
+``run_benchmark`` drives the app of ``create_app()`` or
+``create_free_app()`` with a reproducible workload:
+
+- In-process through an ASGI transport, or over a local socket with
+  uvicorn running in a background thread
+- A request mix of single conversions, batch conversions and health checks
+- Currency pairs and amounts drawn from a Zipf distribution, so a few keys
+  are hot and a long tail is cold
+- Upstream requests go to the in-process mock (``mock_upstream``) unless
+  an upstream URL is given
+- The app runs on its own engine and cache in a temporary directory; the
+  server's startup hook (log file, ``.env``, cache in ``data``) is not used
+
+The report contains throughput, latency percentiles, the cache hit ratio
+and the number of upstream calls, as a JSON-serializable dict. The CLI
+front end is ``corally bench api``.
+"""
+
+import asyncio
+import bisect
+import importlib
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from .hosting import ThreadServer
+from .mock_upstream import BASE_RATES, LatencyModel, MockUpstream, create_mock_app
+from .monitor import percentile
+
+SERVERS = {"free": "corally.api.free_server", "paid": "corally.api.server"}
+DEFAULT_MIX = {"convert": 0.9, "batch": 0.05, "health": 0.05}
+MOCK_BASE_URL = "http://mock-upstream"
+
+Request = Tuple[str, str, Optional[dict], Optional[list]]
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """
+    Parse a request mix such as ``convert=0.9,batch=0.1``.
+
+    Raises:
+        ValueError: For unknown request kinds or invalid weights
+    """
+    mix = {}
+    for part in spec.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in DEFAULT_MIX:
+            raise ValueError(f"Unknown request kind '{kind}', expected one of {list(DEFAULT_MIX)}")
+        mix[kind] = float(weight) if weight else 1.0
+        if mix[kind] < 0:
+            raise ValueError(f"Negative weight for '{kind}'")
+    if not sum(mix.values()):
+        raise ValueError("Request mix has no positive weight")
+    return mix
+
+
+class ZipfSampler:
+    """Draws indices 0..n-1 with probability proportional to 1 / (rank ** s)."""
+
+    def __init__(self, n: int, s: float, rng: random.Random):
+        self.rng = rng
+        self.cumulative: List[float] = []
+        total = 0.0
+        for rank in range(1, n + 1):
+            total += 1 / rank ** s
+            self.cumulative.append(total)
+
+    def sample(self) -> int:
+        return bisect.bisect_left(self.cumulative, self.rng.random() * self.cumulative[-1])
+
+
+class Workload:
+    """A reproducible list of requests."""
+
+    def __init__(self, requests: int = 2000, mix: Optional[Dict[str, float]] = None, pairs: Optional[int] = None,
+                 amounts: int = 200, zipf: float = 1.1, batch_size: int = 20, seed: int = 0):
+        """
+        Args:
+            requests (int): Number of requests
+            mix (dict): Weights per request kind (convert, batch, health)
+            pairs (int): Number of distinct currency pairs (default: all)
+            amounts (int): Number of distinct amounts
+            zipf (float): Zipf exponent for pairs and amounts (0 = uniform)
+            batch_size (int): Items per batch request
+            seed (int): Random seed
+        """
+        self.rng = random.Random(seed)
+        currencies = sorted(BASE_RATES)
+        all_pairs = [(a, b) for a in currencies for b in currencies if a != b]
+        self.rng.shuffle(all_pairs)
+        self.pairs = all_pairs[:pairs] if pairs else all_pairs
+        self.amounts = [round(10 ** self.rng.uniform(0, 4), 2) for _ in range(amounts)]
+        self.mix = mix or dict(DEFAULT_MIX)
+        self.batch_size = batch_size
+        self._pair_sampler = ZipfSampler(len(self.pairs), zipf, self.rng)
+        self._amount_sampler = ZipfSampler(len(self.amounts), zipf, self.rng)
+        kinds = list(self.mix)
+        self.requests: List[Request] = []
+        for kind in self.rng.choices(kinds, weights=[self.mix[k] for k in kinds], k=requests):
+            self.requests.append(self._make(kind))
+
+    def _key(self) -> Tuple[str, str, float]:
+        from_currency, to_currency = self.pairs[self._pair_sampler.sample()]
+        return from_currency, to_currency, self.amounts[self._amount_sampler.sample()]
+
+    def _make(self, kind: str) -> Request:
+        if kind == "convert":
+            from_currency, to_currency, amount = self._key()
+            params = {"from_currency": from_currency, "to_currency": to_currency, "amount": str(amount)}
+            return "GET", "/convert", params, None
+        if kind == "batch":
+            items = [{"from": f, "to": t, "amount": a} for f, t, a in (self._key() for _ in range(self.batch_size))]
+            return "POST", "/convert/batch", None, items
+        return "GET", "/health", None, None
+
+
+# Module attributes the request handlers look up at call time
+_STATE = ("ENGINE", "CACHE", "RENDERED", "cache_writer", "RATES", "upstream")
+
+
+@contextmanager
+def _bench_setup(module, upstream: Optional[str], mock: MockUpstream) -> Iterator[None]:
+    """
+    Give a server module its own engine, cache and upstream for the run.
+
+    The module's shared engine, its cache file in ``data`` and the production
+    upstream stay untouched; everything the benchmark writes goes to a
+    temporary directory that is removed afterwards.
+    """
+    from .engine import RateEngine
+    from .upstream import ExchangeRateHostProvider, Provider, ProviderChain
+
+    if upstream:
+        base_url, transport = upstream.rstrip("/"), None
+    else:
+        base_url, transport = MOCK_BASE_URL, httpx.ASGITransport(app=create_mock_app(mock))
+
+    if isinstance(module.upstream, ProviderChain):
+        source = ProviderChain([Provider(f"{base_url}/v4/latest/", timeout=module.UPSTREAM_TIMEOUT)],
+                               metrics=module.metrics, name=module.upstream.name, transport=transport)
+    else:
+        source = ExchangeRateHostProvider(f"{base_url}/convert", module.upstream.api_key or "bench",
+                                          metrics=module.metrics, transport=transport)
+
+    scratch = tempfile.TemporaryDirectory(prefix="corally-bench-")
+    engine = RateEngine(os.path.join(scratch.name, "cache.csv"), ttl=module.CACHE_TTL,
+                        stale_ttl=module.CACHE_STALE_TTL)
+    engine.flush_observers.append(module.metrics.flush_duration.observe)
+    engine.load()
+    rates = engine.provider(module.RATES.name, digits=module.RATES.digits, source=source)
+
+    saved = {name: getattr(module, name) for name in _STATE}
+    for name, value in zip(_STATE, (engine, engine.cache, engine.rendered, engine.writer, rates, source)):
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(module, name, value)
+        engine.writer.stop()
+        scratch.cleanup()
+
+
+async def _start(module) -> None:
+    """Start the module's background tasks, without its production startup hook."""
+    await module.refresher.start()
+    await module.loop_monitor.start()
+
+
+async def _stop(module) -> None:
+    await module.refresher.stop()
+    await module.loop_monitor.stop()
+    await module.upstream.aclose()
+
+
+def _bench_app(module):
+    """The module's app, with ``_start``/``_stop`` as its lifespan (for uvicorn)."""
+    async def app(scope, receive, send):
+        if scope["type"] != "lifespan":
+            return await module.app(scope, receive, send)
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await _start(module)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await _stop(module)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    return app
+
+
+async def _drive(client: httpx.AsyncClient, requests: List[Request], concurrency: int) -> dict:
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    pending = iter(requests)
+
+    async def worker():
+        for method, path, params, body in pending:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, params=params, json=body)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {"duration": time.perf_counter() - started, "latencies": latencies, "statuses": statuses}
+
+
+async def _run_asgi(module, requests: List[Request], concurrency: int) -> dict:
+    await _start(module)
+    try:
+        transport = httpx.ASGITransport(app=module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            return await _drive(client, requests, concurrency)
+    finally:
+        await _stop(module)
+
+
+async def _run_socket(port: int, requests: List[Request], concurrency: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+        return await _drive(client, requests, concurrency)
+
+
+def run_benchmark(server: str = "free", transport: str = "asgi", requests: int = 2000, concurrency: int = 32,
+                  mix: Optional[Dict[str, float]] = None, pairs: Optional[int] = None, amounts: int = 200,
+                  zipf: float = 1.1, batch_size: int = 20, upstream: Optional[str] = None,
+                  upstream_latency: str = "const:0", upstream_error_rate: float = 0.0, seed: int = 0) -> dict:
+    """
+    Run one benchmark against a server and return the report.
+
+    Args:
+        server (str): "free" or "paid"
+        transport (str): "asgi" (in-process) or "socket" (local uvicorn)
+        requests (int): Number of requests
+        concurrency (int): Number of concurrent clients
+        mix (dict): Weights per request kind (convert, batch, health)
+        pairs (int): Number of distinct currency pairs (default: all)
+        amounts (int): Number of distinct amounts
+        zipf (float): Zipf exponent for pairs and amounts
+        batch_size (int): Items per batch request
+        upstream (str): Base URL of a running upstream such as the mock;
+                        default is an in-process mock
+        upstream_latency (str): Latency spec of the in-process mock
+        upstream_error_rate (float): Error rate of the in-process mock
+        seed (int): Random seed for the workload and the mock
+
+    Returns:
+        dict: Throughput, latency percentiles (ms), status counts, cache
+              hit ratio and upstream call count
+    """
+    if server not in SERVERS:
+        raise ValueError(f"Unknown server '{server}', expected one of {list(SERVERS)}")
+    if transport not in ("asgi", "socket"):
+        raise ValueError(f"Unknown transport '{transport}', expected 'asgi' or 'socket'")
+
+    module = importlib.import_module(SERVERS[server])
+    workload = Workload(requests, mix, pairs, amounts, zipf, batch_size, seed)
+    mock = MockUpstream(latency=LatencyModel.parse(upstream_latency), error_rate=upstream_error_rate, seed=seed)
+
+    with _bench_setup(module, upstream, mock):
+        cache_before = module.CACHE.stats()
+        upstream_before = module.metrics.upstream_latency.total()
+        if transport == "asgi":
+            run = asyncio.run(_run_asgi(module, workload.requests, concurrency))
+        else:
+            with ThreadServer(_bench_app(module)) as thread:
+                run = asyncio.run(_run_socket(thread.port, workload.requests, concurrency))
+        cache_after = module.CACHE.stats()
+        upstream_calls = module.metrics.upstream_latency.total() - upstream_before
+
+    hits = (cache_after["hits"] + cache_after["stale_hits"]) - (cache_before["hits"] + cache_before["stale_hits"])
+    lookups = hits + cache_after["misses"] - cache_before["misses"]
+    latencies = run["latencies"]
+    errors = sum(count for status, count in run["statuses"].items() if not status.startswith(("2", "3")))
+    return {
+        "server": server,
+        "transport": transport,
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "mix": workload.mix,
+        "zipf": zipf,
+        "pairs": len(workload.pairs),
+        "amounts": amounts,
+        "seed": seed,
+        "duration_s": round(run["duration"], 3),
+        "throughput_rps": round(len(latencies) / run["duration"], 1) if run["duration"] else None,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+            "p50": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99": round(percentile(latencies, 0.99) * 1000, 3),
+            "max": round(max(latencies, default=0.0) * 1000, 3),
+        },
+        "status": run["statuses"],
+        "errors": errors,
+        "cache_hit_ratio": round(hits / lookups, 4) if lookups else None,
+        "upstream_calls": upstream_calls,
+    }
@@ -0,0 +1,198 @@
+"""
+Bounded in-memory rate cache for the API servers.
+
+``RateCache`` replaces the plain ``CACHE`` dict. It keeps the same
+``key -> {"timestamp": ..., "data": {...}}`` layout and dict interface, and
+adds:
+
+- LRU eviction once a maximum entry count or byte budget is exceeded
+- An expiry heap, so removing expired entries never scans the whole cache
+- Hit, miss, stale, eviction and expiration counters plus size accounting
+"""
+
+import heapq
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+def estimate_size(key: str, entry: dict) -> int:
+    """Approximate memory used by one cache entry, in bytes."""
+    size = sys.getsizeof(key) + sys.getsizeof(entry)
+    stack: List[Any] = list(entry.values())
+    while stack:
+        value = stack.pop()
+        size += sys.getsizeof(value)
+        if isinstance(value, dict):
+            stack.extend(value.values())
+    return size
+
+
+class RateCache:
+    """
+    Dict-like LRU cache with TTL expiry and memory accounting.
+
+    Reading an entry through ``get`` marks it as recently used. Entries
+    older than ``max_age`` seconds are dropped by ``expire``. It only looks
+    at the front of the expiry heap, so it is cheap to call on every request.
+    """
+
+    def __init__(self, max_entries: Optional[int] = 10000, max_bytes: Optional[int] = None,
+                 max_age: Optional[float] = None):
+        """
+        Args:
+            max_entries (int): Maximum number of entries, or None for no limit
+            max_bytes (int): Approximate memory budget in bytes, or None
+            max_age (float): Seconds after an entry's timestamp at which
+                             ``expire`` removes it, or None to keep entries
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+        self._data: "OrderedDict[str, dict]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    # -- dict interface --------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __getitem__(self, key: str) -> dict:
+        return self._data[key]
+
+    def __setitem__(self, key: str, entry: dict) -> None:
+        if key in self._data:
+            self.bytes -= self._sizes[key]
+        self._data[key] = entry
+        self._data.move_to_end(key)
+        size = estimate_size(key, entry)
+        self._sizes[key] = size
+        self.bytes += size
+        if self.max_age is not None:
+            heapq.heappush(self._heap, (entry["timestamp"] + self.max_age, key))
+            if len(self._heap) > 2 * len(self._data) + 64:
+                self._rebuild_heap()
+        self._evict()
+
+    def __delitem__(self, key: str) -> None:
+        del self._data[key]
+        self.bytes -= self._sizes.pop(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return an entry and mark it as most recently used."""
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        self._data.move_to_end(key)
+        return entry
+
+    def keys(self):
+        return self._data.keys()
+
+    def values(self):
+        return self._data.values()
+
+    def items(self):
+        return self._data.items()
+
+    def snapshot(self) -> List[Tuple[str, dict]]:
+        """Return a list of (key, entry) pairs, safe to use from another thread."""
+        while True:
+            try:
+                return list(self._data.items())
+            except RuntimeError:
+                continue  # mutated while copying; try again
+
+    def update(self, entries: Dict[str, dict]) -> None:
+        for key, entry in entries.items():
+            self[key] = entry
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._sizes.clear()
+        self._heap.clear()
+        self.bytes = 0
+
+    # -- bounds ----------------------------------------------------------
+
+    def set_limits(self, max_entries: Optional[int] = 10000, max_bytes: Optional[int] = None) -> None:
+        """Change the bounds, evicting entries that no longer fit."""
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def _over_budget(self) -> bool:
+        if self.max_entries is not None and len(self._data) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self.bytes > self.max_bytes
+
+    def _evict(self) -> None:
+        while self._data and self._over_budget():
+            key, _ = self._data.popitem(last=False)
+            self.bytes -= self._sizes.pop(key)
+            self.evictions += 1
+
+    def _rebuild_heap(self) -> None:
+        self._heap = [(entry["timestamp"] + self.max_age, key) for key, entry in self._data.items()]
+        heapq.heapify(self._heap)
+
+    def expire(self, now: Optional[float] = None) -> List[str]:
+        """
+        Remove entries older than ``max_age``.
+
+        Only heap records that are due are inspected. Records made obsolete
+        by a newer timestamp, including timestamps updated in place, are
+        re-queued or discarded as they come up.
+
+        Returns:
+            list: Keys that were removed
+        """
+        if self.max_age is None:
+            return []
+        now = time.time() if now is None else now
+        removed = []
+        while self._heap and self._heap[0][0] <= now:
+            _, key = heapq.heappop(self._heap)
+            entry = self._data.get(key)
+            if entry is None:
+                continue
+            expires_at = entry["timestamp"] + self.max_age
+            if expires_at > now:
+                heapq.heappush(self._heap, (expires_at, key))
+                continue
+            del self[key]
+            self.expirations += 1
+            removed.append(key)
+        return removed
+
+    def stats(self) -> dict:
+        """Return counters and size information."""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
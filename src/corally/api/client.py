@@ -0,0 +1,201 @@
+"""
+HTTP client for a running Corally API server.
+
+The GUI and ``manage_api_server.py`` used to call ``requests.get`` twice per
+conversion: a health probe and then ``/convert``, each on a new
+TCP connection. ``ApiClient`` keeps one ``requests.Session`` with a
+keep-alive connection pool and tracks the server's health passively: every
+response marks the server as up, every refused connection marks it as
+down. That state is trusted for ``health_ttl`` seconds, so a conversion
+needs no extra probe, and a server known to be down fails at once.
+
+The session may be shared by several worker threads. ``probe_health`` is
+the readiness check shared with the lifecycle manager.
+"""
+
+import json
+import threading
+import time
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_URL = "http://127.0.0.1:8000"
+HEALTH_PATH = "/health"  # served by the free and the paid app alike
+STREAM_READ_TIMEOUT = 30.0  # seconds without data (the server sends a heartbeat every 15s)
+
+Pair = Tuple[str, str]
+
+
+class ServerUnavailable(requests.exceptions.ConnectionError):
+    """The server refused a connection within the health TTL."""
+
+
+def probe_health(url: str, timeout: float = 0.5, session: Optional[requests.Session] = None) -> Optional[str]:
+    """
+    Probe ``GET /health`` of the server at ``url``.
+
+    Args:
+        url (str): Server URL, e.g. ``http://127.0.0.1:8000``
+        timeout (float): Seconds to wait for the answer
+        session (requests.Session): Session to send the probe on (default: none)
+
+    Returns:
+        str: Why the server is not ready, or None if it answered with 200
+    """
+    try:
+        response = (session or requests).get(url.rstrip("/") + HEALTH_PATH, timeout=timeout)
+    except requests.exceptions.RequestException as e:
+        return str(e)
+    if response.status_code != 200:
+        return f"status {response.status_code}"
+    return None
+
+
+class ApiClient:
+    """
+    Pooled client for the local API with a cached health state.
+
+    Features:
+    - One keep-alive ``Session``, sized for a small pool of worker threads
+    - Health derived from real responses, cached for ``health_ttl`` seconds
+    - ``check_health`` only probes when the cached state is stale
+    """
+
+    def __init__(self, base_url: str = DEFAULT_URL, timeout: float = 15.0, health_ttl: float = 5.0,
+                 probe_timeout: float = 2.0, pool_size: int = 4):
+        """
+        Args:
+            base_url (str): Server URL, e.g. ``http://127.0.0.1:8000``
+            timeout (float): Seconds per request
+            health_ttl (float): Seconds a known health state is trusted
+            probe_timeout (float): Seconds for an explicit health probe
+            pool_size (int): Keep-alive connections (one per worker thread)
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.health_ttl = health_ttl
+        self.probe_timeout = probe_timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._lock = threading.Lock()
+        self._healthy: Optional[bool] = None
+        self._checked_at = 0.0
+        self.last_error: Optional[str] = None
+        self.requests = 0
+
+    def set_port(self, port: int, host: str = "127.0.0.1") -> None:
+        """Point the client at another local port and forget the health state."""
+        self.base_url = f"http://{host}:{port}"
+        self.mark(None)
+
+    def mark(self, healthy: Optional[bool], error: Optional[str] = None) -> None:
+        """Record the server's health (None = unknown)."""
+        with self._lock:
+            self._healthy = healthy
+            self._checked_at = time.monotonic()
+            self.last_error = error
+
+    def is_healthy(self) -> Optional[bool]:
+        """Return the health state if it is younger than ``health_ttl``, else None."""
+        with self._lock:
+            if self._healthy is None or time.monotonic() - self._checked_at >= self.health_ttl:
+                return None
+            return self._healthy
+
+    def request(self, method: str, path: str, fail_fast: bool = True, **kwargs) -> requests.Response:
+        """
+        Send a request and update the health state from its outcome.
+
+        Args:
+            method (str): HTTP method
+            path (str): Path below the base URL, e.g. ``/convert``
+            fail_fast (bool): Raise ``ServerUnavailable`` without a request
+                              if the server is known to be down
+
+        Raises:
+            ServerUnavailable: The server was down within the health TTL
+            requests.exceptions.RequestException: The request failed
+        """
+        if fail_fast and self.is_healthy() is False:
+            raise ServerUnavailable(f"API server not reachable at {self.base_url}: {self.last_error}")
+        kwargs.setdefault("timeout", self.timeout)
+        self.requests += 1
+        try:
+            response = self.session.request(method, self.base_url + path, **kwargs)
+        except requests.exceptions.ConnectionError as e:
+            self.mark(False, str(e))
+            raise
+        # Any HTTP answer, even an upstream error, proves the server is up
+        self.mark(True)
+        return response
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def convert(self, from_currency: str, to_currency: str, amount) -> requests.Response:
+        """Request ``/convert`` for an amount."""
+        return self.get("/convert", params={
+            "from_currency": from_currency,
+            "to_currency": to_currency,
+            "amount": str(amount),
+        })
+
+    def rates(self, pairs: Iterable[Pair]) -> Dict[Pair, float]:
+        """
+        Fetch the current rate of several pairs with one ``/convert/batch`` request.
+
+        Returns:
+            dict: (from, to) -> rate for every pair the server could resolve
+        """
+        items = [{"from": f, "to": t, "amount": 1} for f, t in pairs]
+        if not items:
+            return {}
+        response = self.request("POST", "/convert/batch", json=items)
+        response.raise_for_status()
+        return {(item["from"], item["to"]): item["info"]["rate"]
+                for item in response.json()["results"] if "error" not in item}
+
+    def open_stream(self, pairs: Iterable[Pair]) -> requests.Response:
+        """
+        Subscribe to ``/stream`` for rate updates; read it with ``iter_rate_events``.
+
+        Closing the returned response from another thread ends the subscription.
+
+        Raises:
+            requests.exceptions.HTTPError: The server has no stream endpoint
+        """
+        query = ",".join(f"{f}-{t}" for f, t in pairs)
+        response = self.request("GET", "/stream", params={"pairs": query}, stream=True,
+                                timeout=(self.probe_timeout, STREAM_READ_TIMEOUT))
+        response.raise_for_status()
+        return response
+
+    @staticmethod
+    def iter_rate_events(response: requests.Response) -> Iterator[Tuple[str, str, float, float]]:
+        """Yield (from, to, rate, timestamp) for every SSE ``rate`` event of a stream."""
+        for line in response.iter_lines(decode_unicode=True):
+            if line and line.startswith("data:"):
+                data = json.loads(line[5:])
+                yield data["from"], data["to"], data["rate"], data["timestamp"]
+
+    def check_health(self, force: bool = False) -> bool:
+        """Return whether the server is up, probing ``/health`` only if the cached state is stale."""
+        if not force:
+            healthy = self.is_healthy()
+            if healthy is not None:
+                return healthy
+        self.requests += 1
+        error = probe_health(self.base_url, self.probe_timeout, self.session)
+        self.mark(error is None, error)
+        return error is None
+
+    def stats(self) -> dict:
+        return {"base_url": self.base_url, "requests": self.requests, "healthy": self.is_healthy(),
+                "last_error": self.last_error}
+
+    def close(self) -> None:
+        self.session.close()
@@ -0,0 +1,436 @@
+"""
+Rate cache and persistence shared by all API servers of a process.
+
+The free and the paid server used to keep their own ``CACHE`` and their own
+writer for ``data/cache.csv``. Running both in one process (or mounting
+both apps) made each rewrite the file with only its own entries, so the
+cache file was overwritten back and forth and half of it was lost on
+every flush.
+
+``RateEngine`` owns one bounded ``RateCache``, one ``CacheWriter``, the
+optional shared SQLite store and the pre-rendered responses. Each provider
+(a ``RateProvider`` upstream) gets a ``ProviderCache`` namespace: its keys
+are prefixed with the provider name, e.g. ``free:EUR-USD-1.0``, and the CSV
+file has a ``provider`` column. All namespaces are written in one coalesced
+flush.
+
+Cache files from older versions have no ``provider`` column. Their rows
+hold real rates, so every provider adopts a copy of them until they expire.
+
+Creating an engine does no I/O. The servers load the cache on startup with
+``start_loading``: the file is read in chunks on a worker thread and merged
+into the cache between requests, so a large cache does not delay the first
+response. Entries written by requests in the meantime are never replaced by
+older rows from the file.
+"""
+
+import asyncio
+import csv
+import logging
+import os
+import time
+from functools import partial
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .cache import RateCache
+from .persistence import CacheWriter
+from .serialization import RenderedResponses
+from .shared_cache import SQLiteRateStore
+from .upstream import RateProvider
+
+CSV_FIELDS = ["provider", "from", "to", "amount", "result", "rate", "timestamp"]
+LOAD_CHUNK = 2000  # entries merged per event loop turn while loading
+
+
+def _copy_entry(entry: dict) -> dict:
+    data = entry["data"]
+    return {"timestamp": entry["timestamp"], "data": {**data, "info": dict(data["info"])}}
+
+
+class ProviderCache:
+    """The cache namespace of one rate provider inside a ``RateEngine``."""
+
+    def __init__(self, engine: "RateEngine", name: str, digits: Optional[int] = None,
+                 source: Optional[RateProvider] = None):
+        """
+        Args:
+            engine (RateEngine): Engine holding the entries
+            name (str): Provider name, used as key prefix
+            digits (int): Round conversion results to this many digits, or None
+            source (RateProvider): Upstream the rates come from
+        """
+        self.engine = engine
+        self.name = name
+        self.digits = digits
+        self.source = source
+        self.prefix = f"{name}:"
+
+    async def fetch_rate(self, from_currency: str, to_currency: str) -> float:
+        """Fetch a rate from the provider's upstream (bypassing the cache)."""
+        if self.source is None:
+            raise RuntimeError(f"Provider '{self.name}' has no rate source")
+        return await self.source.fetch_rate(from_currency, to_currency)
+
+    def key(self, from_currency: str, to_currency: str, amount: float) -> str:
+        return f"{self.prefix}{from_currency.upper()}-{to_currency.upper()}-{amount}"
+
+    def result(self, amount: float, rate: float) -> float:
+        value = amount * rate
+        return round(value, self.digits) if self.digits is not None else value
+
+    async def get(self, key: str) -> Tuple[Optional[dict], bool]:
+        """
+        Return (data, stale) for a cache entry, or (None, False) on a miss.
+
+        Entries past the TTL are still returned, flagged as stale, for
+        another ``stale_ttl`` seconds so that a background refresh can
+        replace them. A fresh local entry is returned without touching the
+        shared store; otherwise the store is read on the executor, not on
+        the event loop.
+        """
+        engine = self.engine
+        cache, shared = engine.cache, engine.shared
+        cache.expire()
+        item = cache.get(key)
+        if shared is not None and (item is None or time.time() - item["timestamp"] >= engine.ttl):
+            # Another worker may already have fetched or refreshed this entry
+            stored = await asyncio.get_running_loop().run_in_executor(None, shared.get, key)
+            item = cache.get(key)  # may have been set while the store was read
+            if stored and (item is None or stored["timestamp"] > item["timestamp"]):
+                cache[key] = item = stored
+        if item:
+            age = time.time() - item["timestamp"]
+            if age < engine.ttl:
+                cache.hits += 1
+                return item["data"], False
+            if age < engine.ttl + engine.stale_ttl:
+                cache.stale_hits += 1
+                return item["data"], True
+            del cache[key]
+            if shared is not None:
+                engine.writer.request(f"put:{key}", partial(shared.delete, key))
+            engine.save()
+        cache.misses += 1
+        return None, False
+
+    def timestamp(self, key: str) -> float:
+        return self.engine.cache[key]["timestamp"]
+
+    def set(self, key: str, value: dict) -> float:
+        """Store a conversion result and return its timestamp."""
+        engine = self.engine
+        now = time.time()
+        engine.cache[key] = {"timestamp": now, "data": value}
+        if engine.shared is not None:
+            engine.writer.request(f"put:{key}", partial(engine.shared.put, key, engine.cache[key]))
+        engine.save()
+        return now
+
+    async def recent_shared_rate(self, from_currency: str, to_currency: str,
+                                 max_age: float) -> Optional[Tuple[float, float]]:
+        """Return (rate, timestamp) if another worker refreshed the pair within ``max_age`` seconds."""
+        shared = self.engine.shared
+        if shared is None:
+            return None
+        key = self.key(from_currency, to_currency, 1.0)
+        stored = await asyncio.get_running_loop().run_in_executor(None, shared.get, key)
+        if stored and time.time() - stored["timestamp"] < max_age and stored["data"]["info"].get("rate") is not None:
+            return stored["data"]["info"]["rate"], stored["timestamp"]
+        return None
+
+    def apply_rate(self, from_currency: str, to_currency: str, rate: float, timestamp: float) -> None:
+        """Apply a refreshed rate to every entry of a pair, including its unit-amount entry."""
+        engine = self.engine
+        for key, entry in engine.cache.snapshot():
+            data = entry["data"]
+            if key.startswith(self.prefix) and data["from"] == from_currency and data["to"] == to_currency:
+                data["result"] = self.result(data["amount"], rate)
+                data["info"]["rate"] = rate
+                entry["timestamp"] = timestamp
+        unit_key = self.key(from_currency, to_currency, 1.0)
+        if unit_key not in engine.cache:
+            engine.cache[unit_key] = {"timestamp": timestamp, "data": {
+                "from": from_currency,
+                "to": to_currency,
+                "amount": 1.0,
+                "result": self.result(1.0, rate),
+                "info": {
+                    "rate": rate
+                }
+            }}
+        if engine.shared is not None:
+            engine.writer.request(f"pair:{self.prefix}{from_currency}-{to_currency}", partial(
+                engine.shared.update_pair, from_currency, to_currency, rate, timestamp,
+                digits=self.digits, key_prefix=self.prefix))
+            engine.writer.request(f"put:{unit_key}", partial(engine.shared.put, unit_key, engine.cache[unit_key]))
+        engine.save()
+
+    def __len__(self) -> int:
+        return sum(1 for key in self.engine.cache.keys() if key.startswith(self.prefix))
+
+
+class RateEngine:
+    """
+    One rate cache and persistence engine for any number of providers.
+
+    Features:
+    - Shared ``RateCache`` with one memory budget for all providers
+    - One ``CacheWriter``: all namespaces are written in a single CSV flush
+    - Optional ``SQLiteRateStore`` shared with other worker processes
+    """
+
+    def __init__(self, cache_file: str, ttl: float = 3600, stale_ttl: float = 600,
+                 shared: Optional[SQLiteRateStore] = None, max_entries: Optional[int] = 10000,
+                 max_bytes: Optional[int] = None):
+        """
+        Args:
+            cache_file (str): CSV file used when there is no shared store
+            ttl (float): Seconds a rate stays fresh
+            stale_ttl (float): Seconds an expired rate may still be served
+            shared (SQLiteRateStore): Store shared by all workers, or None
+            max_entries (int): Maximum number of cached entries
+            max_bytes (int): Approximate memory budget in bytes, or None
+        """
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.shared = shared
+        self.cache = RateCache(max_entries=max_entries, max_bytes=max_bytes, max_age=ttl + stale_ttl)
+        self.rendered = RenderedResponses(max_entries=max_entries or 10000)
+        self.writer = CacheWriter(on_flush=self._flushed)
+        self.providers: Dict[str, ProviderCache] = {}
+        self.flush_observers: List[Callable[[float], None]] = []
+        self.loaded = False
+        self.loaded_entries = 0
+        self.load_seconds: Optional[float] = None
+        self._loading: Optional[asyncio.Task] = None
+        self._save_pending = False
+        self._legacy: List[Tuple[str, dict]] = []
+
+    def use_backend(self, backend: str = "csv", db_path: Optional[str] = None) -> None:
+        """Select the persistence backend; only possible before the cache is loaded."""
+        if self.loaded or self._loading is not None:
+            return
+        self.shared = SQLiteRateStore(db_path) if backend == "sqlite" and db_path else None
+
+    def set_limits(self, max_entries: Optional[int] = 10000, max_bytes: Optional[int] = None) -> None:
+        """Change the memory bounds, e.g. to settings read on startup."""
+        self.cache.set_limits(max_entries, max_bytes)
+        self.rendered.max_entries = max_entries or 10000
+
+    def _flushed(self, seconds: float) -> None:
+        for observer in self.flush_observers:
+            observer(seconds)
+
+    def provider(self, name: str, digits: Optional[int] = None,
+                 source: Optional[RateProvider] = None) -> ProviderCache:
+        """Return the namespace of a provider, creating it on first use."""
+        namespace = self.providers.get(name)
+        if namespace is None:
+            namespace = self.providers[name] = ProviderCache(self, name, digits, source)
+            self._adopt_legacy(namespace)
+        elif source is not None:
+            namespace.source = source
+        return namespace
+
+    def _adopt_legacy(self, namespace: ProviderCache) -> None:
+        for key, entry in self._legacy:
+            namespaced = namespace.prefix + key
+            if namespaced not in self.cache:
+                self.cache[namespaced] = _copy_entry(entry)
+
+    def load(self) -> None:
+        """Load cache entries from the shared store or the CSV file (once)."""
+        if self.loaded or self._loading is not None:
+            return
+        started = time.perf_counter()
+        self._merge(self._read_entries())
+        self._finish_load(started)
+
+    def start_loading(self, chunk_size: int = LOAD_CHUNK) -> Optional[asyncio.Task]:
+        """
+        Load the cache in the background of the running event loop.
+
+        Args:
+            chunk_size (int): Entries read and merged per step
+
+        Returns:
+            asyncio.Task: The loading task, or None if the cache is already loaded
+        """
+        if self.loaded:
+            return None
+        if self._loading is None:
+            self._loading = asyncio.get_running_loop().create_task(self._load_incrementally(chunk_size))
+        return self._loading
+
+    async def _load_incrementally(self, chunk_size: int) -> None:
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            if self.shared is not None:
+                entries = await loop.run_in_executor(None, self._read_entries)
+                for i in range(0, len(entries), chunk_size):
+                    self._merge(entries[i:i + chunk_size])
+                    await asyncio.sleep(0)
+            else:
+                rows = self._iter_file()
+                while True:
+                    chunk = await loop.run_in_executor(None, lambda: list(islice(rows, chunk_size)))
+                    if not chunk:
+                        break
+                    self._merge(chunk)
+        except asyncio.CancelledError:
+            # Partially loaded: never rewrite the file from this state
+            self._loading = None
+            self._save_pending = False
+            raise
+        self._finish_load(started)
+
+    async def stop_loading(self) -> None:
+        """Cancel a background load that is still running."""
+        task = self._loading
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def _read_entries(self) -> List[Tuple[str, dict]]:
+        entries: List[Tuple[str, dict]] = []
+        if self.shared is not None:
+            try:
+                entries = list(self.shared.load_all().items())
+            except Exception as e:
+                logging.error(f"Error loading shared cache: {e}")
+        if not entries:
+            entries = self._read_file()
+            if entries and self.shared is not None:
+                # One-time import of the CSV into the empty database
+                self.shared.put_many(entries)
+        return entries
+
+    def _merge(self, entries: List[Tuple[str, dict]]) -> None:
+        for key, entry in entries:
+            if ":" not in key:
+                self._legacy.append((key, entry))
+                continue
+            # A request may already have stored a newer entry while loading
+            if key not in self.cache or self.cache[key]["timestamp"] < entry["timestamp"]:
+                self.cache[key] = entry
+        self.loaded_entries += len(entries)
+
+    def _finish_load(self, started: float) -> None:
+        self.loaded = True
+        self._loading = None
+        self.load_seconds = time.perf_counter() - started
+        for namespace in self.providers.values():
+            self._adopt_legacy(namespace)
+        logging.info(f"Loaded {self.loaded_entries} cache entries in {self.load_seconds:.3f}s")
+        self.cleanup()
+        if self._save_pending:
+            self._save_pending = False
+            self.save()
+
+    def _iter_file(self) -> Iterator[Tuple[str, dict]]:
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, mode="r", newline="") as f:
+                for row in csv.DictReader(f):
+                    key = f"{row['from'].upper()}-{row['to'].upper()}-{float(row['amount'])}"
+                    if row.get("provider"):
+                        key = f"{row['provider']}:{key}"
+                    yield key, {
+                        "timestamp": float(row["timestamp"]),
+                        "data": {
+                            "from": row["from"],
+                            "to": row["to"],
+                            "amount": float(row["amount"]),
+                            "result": float(row["result"]),
+                            "info": {
+                                "rate": float(row["rate"]) if row["rate"] not in (None, '', 'None') else None
+                            }
+                        }
+                    }
+        except Exception as e:
+            logging.error(f"Error loading cache: {e}")
+
+    def _read_file(self) -> List[Tuple[str, dict]]:
+        return list(self._iter_file())
+
+    def save(self) -> None:
+        """Schedule a CSV rewrite on the writer thread; bursts are written once."""
+        if self.shared is not None:  # entries are written to the database one by one
+            return
+        if self._loading is not None:
+            # Rewriting the file now would drop the rows that are not loaded yet
+            self._save_pending = True
+            return
+        self.writer.request("csv", self.write_file)
+
+    def write_file(self) -> None:
+        """Write all namespaces to the CSV file (runs on the writer thread)."""
+        try:
+            # Write a temporary file first so readers never see a half-written cache
+            tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+            os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+            with open(tmp_file, mode="w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+                writer.writeheader()
+                for key, entry in self.cache.snapshot():
+                    provider, sep, _ = key.partition(":")
+                    if not sep:
+                        continue
+                    data = entry["data"]
+                    writer.writerow({
+                        "provider": provider,
+                        "from": data["from"],
+                        "to": data["to"],
+                        "amount": data["amount"],
+                        "result": data["result"],
+                        "rate": data["info"].get("rate", None),
+                        "timestamp": entry["timestamp"]
+                    })
+            os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            logging.error(f"Error saving cache: {e}")
+
+    def cleanup(self) -> None:
+        """Remove all expired cache entries."""
+        removed = self.cache.expire()
+        if self.shared is not None:
+            self.writer.request("purge", partial(self.shared.purge, self.ttl + self.stale_ttl))
+        if removed:
+            self.save()
+
+    def stats(self) -> dict:
+        return {
+            "providers": {name: len(namespace) for name, namespace in self.providers.items()},
+            "backend": "sqlite" if self.shared is not None else "csv",
+            "loading": {
+                "done": self.loaded,
+                "entries": self.loaded_entries,
+                "seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            },
+        }
+
+
+_ENGINE: Optional[RateEngine] = None
+
+
+def get_engine(cache_file: str, ttl: float = 3600, stale_ttl: float = 600, backend: str = "csv",
+               db_path: Optional[str] = None, max_entries: Optional[int] = 10000,
+               max_bytes: Optional[int] = None) -> RateEngine:
+    """
+    Return the process-wide engine, creating it on the first call.
+
+    Later calls return the same engine; their settings are ignored, so all
+    servers of a process share one cache and one cache file.
+    """
+    global _ENGINE
+    if _ENGINE is None:
+        _ENGINE = RateEngine(cache_file, ttl, stale_ttl, None, max_entries, max_bytes)
+        _ENGINE.use_backend(backend, db_path)
+    return _ENGINE
@@ -1,107 +1,116 @@
 import os
 import time
-import csv
-import httpx
 import logging
-from pathlib import Path
-from fastapi import FastAPI, HTTPException, Query
-
-# Create data directory if it doesn't exist
-data_dir = Path("data")
-data_dir.mkdir(exist_ok=True)
-
-logging.basicConfig(
-    level=logging.INFO,
-    filename=str(data_dir / "api.log"),
-    filemode="w",
-    format="%(asctime)s %(levelname)s %(message)s"
-)
-
-# Free API endpoints that don't require API keys
+from typing import Any
+from fastapi import Body, FastAPI, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+
+from .batch import convert_batch
+from .engine import get_engine
+from .hosting import add_shutdown_endpoint
+from .http_cache import caching_headers, etag_matches, not_modified
+from .metrics import CONTENT_TYPE, ApiMetrics, MetricsMiddleware
+from .monitor import LoopLagMonitor
+from .refresh import RateRefresher
+from .runtime import DATA_DIR, prepare_runtime
+from .serialization import FastJSONResponse
+from .stream import RateBroadcaster, format_event, parse_pairs
+from .upstream import CircuitBreaker, Provider, ProviderChain
+
+# Data directory and logging are set up on startup (see runtime.prepare_runtime).
+# Settings from the environment are read by configure() after that; the values
+# below are the defaults.
+data_dir = DATA_DIR
+
+# Free API endpoints, in order of preference
 FREE_API_ENDPOINTS = [
     "https://api.exchangerate-api.com/v4/latest/",  # Free, no key required
+    "https://api.frankfurter.app/latest",           # Free, no key required (ECB rates)
     "https://api.fixer.io/latest?access_key=",      # Backup (requires key)
 ]
+# FREE_API_ENDPOINTS overrides the list (comma-separated), e.g. to use the local
+# mock (corally.api.mock_upstream); FIXER_API_KEY enables the fixer.io backup
+FIXER_API_KEY = ""
+
+# Upstream resilience
+UPSTREAM_TIMEOUT = 15  # seconds per request
+UPSTREAM_HEDGE_DELAY = 1.0  # hedge delay until enough latencies for a p95 are known
+UPSTREAM_FAILURE_THRESHOLD = 3  # consecutive failures that open a provider's circuit
+UPSTREAM_RESET_TIMEOUT = 30  # seconds before an open circuit gets a trial request
 
 CACHE_FILE = str(data_dir / "cache.csv")
 CACHE_TTL = 3600  # 60 minutes
+CACHE_STALE_TTL = 600  # serve expired entries for 10 more minutes while refreshing
+
+# Cache backend: "csv" (single process) or "sqlite" (shared by all workers);
+# set with CACHE_BACKEND and CACHE_DB
+CACHE_BACKEND = "csv"
+CACHE_DB = str(data_dir / "cache.db")
+
+# Bounds for the in-memory cache (least recently used entries are evicted first);
+# set with CACHE_MAX_ENTRIES and CACHE_MAX_BYTES (0 = no byte budget)
+CACHE_MAX_ENTRIES = 10000
+CACHE_MAX_BYTES = None
+
+# Background refresh of hot pairs
+REFRESH_LEAD = 60  # refresh this many seconds before expiry
+REFRESH_JITTER = 30  # plus up to this many seconds of random jitter
+REFRESH_HOT_HITS = 3  # hits per TTL window that make a pair hot
+REFRESH_MAX_CONCURRENCY = 4  # parallel upstream refreshes
 
 app = FastAPI(title="Free Currency Converter with CSV Cache")
 
-# Cache: Memory + CSV
-CACHE: dict = {}
+# Cache: Memory + CSV, or memory + shared SQLite database. The engine is shared
+# with the paid server if both run in this process; entries are kept apart by
+# the provider name "free".
+ENGINE = get_engine(
+    CACHE_FILE,
+    ttl=CACHE_TTL,
+    stale_ttl=CACHE_STALE_TTL,
+    backend=CACHE_BACKEND,
+    db_path=CACHE_DB,
+    max_entries=CACHE_MAX_ENTRIES,
+    max_bytes=CACHE_MAX_BYTES,
+)
+CACHE = ENGINE.cache
+RENDERED = ENGINE.rendered  # encoded bodies of cached conversions
+cache_writer = ENGINE.writer
+metrics = ApiMetrics()
+loop_monitor = LoopLagMonitor()
+ENGINE.flush_observers.append(metrics.flush_duration.observe)
+metrics.register_cache(CACHE)
+metrics.register_loop_monitor(loop_monitor)
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+def build_providers() -> list:
+    """Create the upstream providers from FREE_API_ENDPOINTS"""
+    providers = []
+    for url in FREE_API_ENDPOINTS:
+        if url.endswith("access_key="):
+            if not FIXER_API_KEY:
+                continue  # backup provider needs a key
+            url += FIXER_API_KEY
+        providers.append(Provider(
+            url,
+            timeout=UPSTREAM_TIMEOUT,
+            default_hedge_delay=UPSTREAM_HEDGE_DELAY,
+            breaker=CircuitBreaker(UPSTREAM_FAILURE_THRESHOLD, UPSTREAM_RESET_TIMEOUT),
+        ))
+    return providers
+
+upstream = ProviderChain(build_providers(), metrics=metrics, name="free")
+RATES = ENGINE.provider("free", digits=2, source=upstream)
 
 def get_cache_key(from_currency: str, to_currency: str, amount: float) -> str:
-    return f"{from_currency.upper()}-{to_currency.upper()}-{amount}"
+    return RATES.key(from_currency, to_currency, amount)
 
-def load_cache():
-    """Load existing cache entries from CSV"""
-    if not os.path.exists(CACHE_FILE):
-        return
-    try:
-        with open(CACHE_FILE, mode="r", newline="") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                key = get_cache_key(row["from"], row["to"], float(row["amount"]))
-                CACHE[key] = {
-                    "timestamp": float(row["timestamp"]),
-                    "data": {
-                        "from": row["from"],
-                        "to": row["to"],
-                        "amount": float(row["amount"]),
-                        "result": float(row["result"]),
-                        "info": {
-                            "rate": float(row["rate"]) if row["rate"] not in (None, '', 'None') else None
-                        }
-                    }
-                }
-    except Exception as e:
-        logging.error(f"Error loading cache: {e}")
-
-def save_cache():
-    """Write cache to CSV file"""
-    try:
-        with open(CACHE_FILE, mode="w", newline="") as f:
-            fieldnames = ["from", "to", "amount", "result", "rate", "timestamp"]
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            for entry in CACHE.values():
-                data = entry["data"]
-                writer.writerow({
-                    "from": data["from"],
-                    "to": data["to"],
-                    "amount": data["amount"],
-                    "result": data["result"],
-                    "rate": data["info"].get("rate", None),
-                    "timestamp": entry["timestamp"]
-                })
-    except Exception as e:
-        logging.error(f"Error saving cache: {e}")
-
-def get_cache(key: str):
-    item = CACHE.get(key)
-    if item:
-        if time.time() - item["timestamp"] < CACHE_TTL:
-            item["timestamp"] = time.time()
-            save_cache()
-            return item["data"]
-        else:
-            del CACHE[key]
-            save_cache()
-    return None
+async def get_cache(key: str):
+    """Return (data, stale) for a cache entry, or (None, False) on a miss"""
+    return await RATES.get(key)
 
 def set_cache(key: str, value: dict):
-    CACHE[key] = {"timestamp": time.time(), "data": value}
-    save_cache()
-
-def cleanup_cache():
-    """Remove all expired cache entries"""
-    now = time.time()
-    keys_to_delete = [key for key, entry in CACHE.items() if now - entry["timestamp"] >= CACHE_TTL]
-    for key in keys_to_delete:
-        del CACHE[key]
-    if keys_to_delete:
-        save_cache()
+    now = RATES.set(key, value)
+    broadcaster.publish(value["from"], value["to"], value["info"].get("rate"), now)
 
 async def get_exchange_rate(from_currency: str, to_currency: str):
     """Get exchange rate using free API"""
@@ -110,56 +119,71 @@ async def get_exchange_rate(from_currency: str, to_currency: str):
 
     logging.info(f"Getting exchange rate: {from_currency} -> {to_currency}")
 
-    # Try the free API first
-    try:
-        async with httpx.AsyncClient() as client:
-            url = f"https://api.exchangerate-api.com/v4/latest/{from_currency}"
-            logging.info(f"Making request to: {url}")
-
-            response = await client.get(url, timeout=15)
-            logging.info(f"Response status: {response.status_code}")
-
-            if response.status_code == 200:
-                data = response.json()
-                rates = data.get("rates", {})
-                logging.info(f"Got {len(rates)} exchange rates")
-
-                if to_currency in rates:
-                    rate = rates[to_currency]
-                    logging.info(f"Exchange rate {from_currency}/{to_currency}: {rate}")
-                    return rate
-                else:
-                    available_currencies = list(rates.keys())[:10]  # Show first 10
-                    error_msg = f"Currency {to_currency} not supported. Available: {available_currencies}..."
-                    logging.error(error_msg)
-                    raise HTTPException(status_code=400, detail=error_msg)
-            else:
-                error_msg = f"External API returned status {response.status_code}: {response.text}"
-                logging.error(error_msg)
-                raise HTTPException(status_code=response.status_code, detail=error_msg)
-
-    except HTTPException:
-        # Re-raise HTTP exceptions as-is
-        raise
-    except httpx.TimeoutException as e:
-        error_msg = f"Request timeout: {str(e)}"
-        logging.error(error_msg)
-        raise HTTPException(status_code=504, detail=error_msg)
-    except httpx.RequestError as e:
-        error_msg = f"Network error: {str(e)}"
-        logging.error(error_msg)
-        raise HTTPException(status_code=503, detail=error_msg)
-    except Exception as e:
-        error_msg = f"Unexpected error: {str(e)}"
-        logging.error(error_msg)
-        raise HTTPException(status_code=500, detail=error_msg)
+    # Ask the providers in order, hedging slow and skipping unhealthy ones
+    rate = await RATES.fetch_rate(from_currency, to_currency)
+    logging.info(f"Exchange rate {from_currency}/{to_currency}: {rate}")
+    return rate
+
+async def refresh_pair(from_currency: str, to_currency: str):
+    """Fetch a fresh rate for a pair and update all of its cache entries"""
+    # Adopt the rate if another worker has just refreshed this pair
+    shared = await RATES.recent_shared_rate(from_currency, to_currency, CACHE_TTL - REFRESH_LEAD - REFRESH_JITTER)
+    if shared:
+        rate, now = shared
+    else:
+        rate, now = await get_exchange_rate(from_currency, to_currency), time.time()
+    RATES.apply_rate(from_currency, to_currency, rate, now)
+    broadcaster.publish(from_currency, to_currency, rate, now)
+    logging.info(f"Refreshed {from_currency}/{to_currency}: {rate}")
+
+broadcaster = RateBroadcaster()
+
+refresher = RateRefresher(
+    refresh_pair,
+    ttl=CACHE_TTL,
+    lead=REFRESH_LEAD,
+    jitter=REFRESH_JITTER,
+    hot_threshold=REFRESH_HOT_HITS,
+    max_concurrency=REFRESH_MAX_CONCURRENCY,
+    keep_warm=broadcaster.has_subscribers,
+)
 
-# Load cache on startup
-load_cache()
-cleanup_cache()
+def configure():
+    """Read the settings from the environment and apply them to the upstream and the cache"""
+    global FREE_API_ENDPOINTS, FIXER_API_KEY, CACHE_BACKEND, CACHE_DB, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES
+    if os.getenv("FREE_API_ENDPOINTS"):
+        FREE_API_ENDPOINTS = [url.strip() for url in os.getenv("FREE_API_ENDPOINTS").split(",") if url.strip()]
+    FIXER_API_KEY = os.getenv("FIXER_API_KEY", FIXER_API_KEY)
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", CACHE_BACKEND).lower()
+    CACHE_DB = os.getenv("CACHE_DB", CACHE_DB)
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", CACHE_MAX_ENTRIES))
+    CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", CACHE_MAX_BYTES or 0)) or None
+
+    upstream.providers = build_providers()
+    ENGINE.set_limits(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES)
+    ENGINE.use_backend(CACHE_BACKEND, CACHE_DB)
+
+@app.on_event("startup")
+async def start_background_tasks():
+    prepare_runtime(data_dir)
+    # .env is only read now, so the upstream and cache settings may come from it
+    configure()
+    # Requests are answered while the cache loads; misses go upstream
+    ENGINE.start_loading()
+    await refresher.start()
+    await loop_monitor.start()
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    await ENGINE.stop_loading()
+    await refresher.stop()
+    await loop_monitor.stop()
+    await upstream.aclose()
+    cache_writer.stop()  # flush pending writes
 
 @app.get("/convert")
 async def convert(
+    request: Request,
     from_currency: str,
     to_currency: str,
     amount: str = Query(...)
@@ -186,12 +210,31 @@ async def convert(
     cache_key = get_cache_key(from_currency, to_currency, amount_float)
     logging.info(f"Cache key: {cache_key}")
 
+    from_currency = from_currency.upper()
+    to_currency = to_currency.upper()
+
     # 1. Check cache
     try:
-        cached = get_cache(cache_key)
+        cached, stale = await get_cache(cache_key)
         if cached:
-            logging.info("Returning cached result")
-            return {"cached": True, **cached}
+            if stale:
+                logging.info("Returning stale cached result, refresh pending")
+                refresher.request_refresh(from_currency, to_currency)
+            else:
+                logging.info("Returning cached result")
+                expires_at = CACHE[cache_key]["timestamp"] + CACHE_TTL
+                refresher.touch(from_currency, to_currency, expires_at)
+            # Clients that already hold this rate version get an empty 304
+            headers = caching_headers(cache_key, CACHE[cache_key]["timestamp"], CACHE_TTL, CACHE_STALE_TTL)
+            if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+                logging.info("Rate unchanged, returning 304")
+                return not_modified(headers)
+            # Hot entries reuse their encoded body until the rate or stale flag changes
+            version = (CACHE[cache_key]["timestamp"], stale)
+            body = RENDERED.get(cache_key, version)
+            if body is None:
+                body = RENDERED.render(cache_key, version, {"cached": True, "stale": stale, **cached})
+            return Response(body, media_type="application/json", headers=headers)
     except Exception as e:
         logging.warning(f"Cache lookup failed: {e}")
 
@@ -225,23 +268,107 @@ async def convert(
         # 4. Save to cache
         try:
             set_cache(cache_key, result)
+            refresher.touch(from_currency, to_currency, time.time() + CACHE_TTL)
+            headers = caching_headers(cache_key, CACHE[cache_key]["timestamp"], CACHE_TTL, CACHE_STALE_TTL)
         except Exception as e:
             logging.warning(f"Failed to save to cache: {e}")
+            headers = None
 
-        return {"cached": False, **result}
+        return FastJSONResponse({"cached": False, "stale": False, **result}, headers=headers)
 
     except Exception as e:
         error_msg = f"Calculation failed: {str(e)}"
         logging.error(error_msg)
         raise HTTPException(status_code=500, detail=error_msg)
 
+async def get_cached_rate(from_currency: str, to_currency: str):
+    """Return (rate, timestamp) from the pair's unit-amount cache entry, or None"""
+    cache_key = get_cache_key(from_currency, to_currency, 1.0)
+    cached, stale = await get_cache(cache_key)
+    if not cached or cached["info"].get("rate") is None:
+        return None
+    timestamp = CACHE[cache_key]["timestamp"]
+    if stale:
+        refresher.request_refresh(from_currency, to_currency)
+    else:
+        refresher.touch(from_currency, to_currency, timestamp + CACHE_TTL)
+    return cached["info"]["rate"], timestamp
+
+async def resolve_rate(from_currency: str, to_currency: str):
+    """Return (rate, cached) for a pair via its unit-amount cache entry"""
+    hit = await get_cached_rate(from_currency, to_currency)
+    if hit:
+        return hit[0], True
+
+    rate = await get_exchange_rate(from_currency, to_currency)
+    set_cache(get_cache_key(from_currency, to_currency, 1.0), {
+        "from": from_currency,
+        "to": to_currency,
+        "amount": 1.0,
+        "result": round(rate, 2),
+        "info": {
+            "rate": rate
+        }
+    })
+    refresher.touch(from_currency, to_currency, time.time() + CACHE_TTL)
+    return rate, False
+
+@app.post("/convert/batch")
+async def convert_many(payload: Any = Body(...)):
+    """Convert many amounts at once, resolving each currency pair only once"""
+    batch = await convert_batch(payload, resolve_rate, digits=2)
+    logging.info(f"Batch conversion: {batch['count']} items, {batch['pairs']} pairs, {batch['errors']} errors")
+    return FastJSONResponse(batch)
+
+@app.get("/stream")
+async def stream(
+    request: Request,
+    pairs: str = Query(..., description="Comma-separated pairs, e.g. EUR-USD,EUR-GBP")
+):
+    """Server-Sent Events stream of rate updates for the subscribed pairs"""
+    try:
+        pair_list = parse_pairs(pairs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    logging.info(f"Stream subscription: {pair_list}")
+    subscription = broadcaster.subscribe(pair_list)
+    for from_currency, to_currency in pair_list:
+        hit = await get_cached_rate(from_currency, to_currency)
+        if hit:
+            subscription.offer(format_event(from_currency, to_currency, *hit))
+        else:
+            refresher.request_refresh(from_currency, to_currency)
+
+    return StreamingResponse(
+        broadcaster.events(subscription, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
 @app.get("/")
 async def root():
     return {"message": "Free Currency Converter API", "status": "running"}
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Metrics in the Prometheus text exposition format"""
+    return Response(metrics.registry.render(), media_type=CONTENT_TYPE)
+
 @app.get("/health")
 async def health():
-    return {"status": "healthy", "cache_entries": len(CACHE)}
+    return {
+        "status": "healthy",
+        "cache_entries": len(RATES),
+        "cache": CACHE.stats(),
+        "rendered_responses": RENDERED.stats(),
+        "persistence": {**cache_writer.stats(), **ENGINE.stats()},
+        "event_loop_lag": loop_monitor.stats(),
+        "upstream": upstream.stats(),
+    }
+
+# POST /shutdown for the lifecycle manager; disabled unless the host sets a token
+add_shutdown_endpoint(app)
 
 
 def create_free_app() -> FastAPI:
@@ -252,6 +379,7 @@ def create_free_app() -> FastAPI:
 def start_free_server(host: str = "127.0.0.1", port: int = 8000) -> None:
     """Start the free API server."""
     import uvicorn
+    prepare_runtime(data_dir)
     uvicorn.run(app, host=host, port=port)
 
 
@@ -0,0 +1,359 @@
+"""
+Host an API server inside the calling program.
+
+The GUI used to run ``uvicorn`` as an external command, sleep two seconds
+and hope the server was up. Here the listening socket is bound first, so
+the port is known at once (port 0 picks a free one), and readiness is
+signalled when uvicorn has run the app's startup and accepts connections:
+
+- ``ThreadServer`` runs uvicorn on a background thread of this process
+- ``ProcessServer`` runs it in a child process that reports over a pipe
+
+Both stop on request without a polling delay and expose the same methods
+(``wait_ready``, ``stop``, ``port``, ``url``, ``pid``). ``host_server``
+starts one and waits until it is ready.
+
+A server given a ``shutdown_token`` can also be stopped remotely through
+``POST /shutdown`` with an ``X-Shutdown-Token`` header (see
+``add_shutdown_endpoint`` and ``corally.api.lifecycle``).
+"""
+
+import asyncio
+import hmac
+import importlib
+import inspect
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from typing import Callable, Optional, Union
+
+APPS = {
+    "free": "corally.api.free_server:app",
+    "paid": "corally.api.server:app",
+}
+GRACEFUL_SHUTDOWN_TIMEOUT = 5  # seconds open connections may delay a stop
+
+
+def bind_socket(host: str = "127.0.0.1", port: int = 0) -> socket.socket:
+    """Bind a TCP socket; uvicorn starts listening on it when the app is ready."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if os.name != "nt":  # on Windows SO_REUSEADDR would allow two servers on one port
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        sock.bind((host, port))
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def _app_target(app: Union[str, object]) -> Union[str, object]:
+    return APPS.get(app, app) if isinstance(app, str) else app
+
+
+def load_app(app: Union[str, object]):
+    """
+    Return the ASGI app for "free", "paid", an import string or an app.
+
+    Raises:
+        RuntimeError: The app cannot be imported
+    """
+    target = _app_target(app)
+    if not isinstance(target, str):
+        return target
+    module_name, _, attr = target.partition(":")
+    try:
+        return getattr(importlib.import_module(module_name), attr or "app")
+    except (ImportError, AttributeError) as e:
+        raise RuntimeError(f"Cannot load app '{target}': {e}") from e
+
+
+def add_shutdown_endpoint(app) -> None:
+    """
+    Add ``POST /shutdown`` to an app.
+
+    The endpoint answers 404 unless the hosting server has set
+    ``app.state.shutdown_token``; a wrong ``X-Shutdown-Token`` gets 403.
+    """
+    from fastapi import Header, HTTPException
+
+    @app.post("/shutdown", include_in_schema=False)
+    async def shutdown(x_shutdown_token: str = Header(default="")):
+        token = getattr(app.state, "shutdown_token", None)
+        if not token:
+            raise HTTPException(status_code=404, detail="Not Found")
+        if not hmac.compare_digest(x_shutdown_token.encode(), token.encode()):
+            raise HTTPException(status_code=403, detail="Invalid shutdown token")
+        app.state.request_exit()
+        return {"status": "shutting down"}
+
+
+def make_server(app, on_ready: Callable[[], None], log_level: str = "warning",
+                shutdown_token: Optional[str] = None):
+    """
+    Create a uvicorn server for an app; run it with ``server.run(sockets=[sock])``.
+
+    Args:
+        app: "free", "paid", an import string or an ASGI app
+        on_ready: Called once the app has started and the socket listens
+        log_level (str): uvicorn log level
+        shutdown_token (str): Enables ``POST /shutdown`` with this token
+
+    Returns:
+        A uvicorn server with a thread-safe ``request_exit()``
+    """
+    import uvicorn
+
+    class _Server(uvicorn.Server):
+        """uvicorn server that reports readiness and stops without polling."""
+
+        async def startup(self, sockets=None):
+            self._stop_event = asyncio.Event()
+            self._loop = asyncio.get_running_loop()
+            await super().startup(sockets=sockets)
+            if not self.should_exit:
+                on_ready()
+
+        async def main_loop(self):
+            while not self.should_exit:
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    continue  # re-check should_exit, e.g. after a signal
+                self.should_exit = True
+
+        def request_exit(self):
+            self.should_exit = True
+            loop = getattr(self, "_loop", None)
+            if loop is not None and not loop.is_closed():
+                loop.call_soon_threadsafe(self._stop_event.set)
+
+    app = load_app(app)
+    options = {}
+    if "timeout_graceful_shutdown" in inspect.signature(uvicorn.Config).parameters:
+        # uvicorn >= 0.24: open streams cannot delay a shutdown for longer
+        options["timeout_graceful_shutdown"] = GRACEFUL_SHUTDOWN_TIMEOUT
+    config = uvicorn.Config(app, log_level=log_level, lifespan="on", **options)
+    server = _Server(config)
+    if hasattr(app, "state"):  # reset, the app object outlives earlier servers
+        app.state.shutdown_token = shutdown_token
+        app.state.request_exit = server.request_exit
+    return server
+
+
+class ThreadServer:
+    """An API app served by uvicorn on a background thread."""
+
+    def __init__(self, app: Union[str, object] = "free", host: str = "127.0.0.1", port: int = 0,
+                 log_level: str = "warning", shutdown_token: Optional[str] = None):
+        """
+        Args:
+            app: "free", "paid", an import string ("module:app") or an ASGI app
+            host (str): Interface to listen on
+            port (int): Port, or 0 for a free one
+            log_level (str): uvicorn log level
+            shutdown_token (str): Enables ``POST /shutdown`` with this token
+        """
+        self.host = host
+        self.shutdown_token = shutdown_token
+        self.sock = bind_socket(host, port)
+        self.port = self.sock.getsockname()[1]
+        self.pid = os.getpid()
+        self.error: Optional[str] = None
+        self._ready = threading.Event()
+        try:
+            self.server = make_server(app, self._ready.set, log_level, shutdown_token)
+        except RuntimeError:
+            self.sock.close()
+            raise
+        self.thread = threading.Thread(target=self._run, name=f"api-server-{self.port}", daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _run(self) -> None:
+        try:
+            self.server.run(sockets=[self.sock])
+        except BaseException as e:  # uvicorn exits via SystemExit if the app fails to start
+            self.error = f"{type(e).__name__}: {e}"
+        finally:
+            if not self._ready.is_set() and self.error is None:
+                self.error = "server exited during startup"
+            self._ready.set()  # wake up waiters
+
+    def start(self) -> "ThreadServer":
+        self.thread.start()
+        return self
+
+    def wait_ready(self, timeout: float = 10.0) -> None:
+        """
+        Block until the server accepts connections.
+
+        Raises:
+            RuntimeError: The server failed or did not start within ``timeout``
+        """
+        if not self._ready.wait(timeout):
+            raise RuntimeError(f"API server on port {self.port} not ready after {timeout}s")
+        if self.error:
+            raise RuntimeError(f"API server failed to start: {self.error}")
+
+    def is_running(self) -> bool:
+        return self.thread.is_alive() and self._ready.is_set() and not self.error
+
+    def stop(self, timeout: float = 5.0) -> bool:
+        """Shut the server down gracefully; returns True once it has stopped."""
+        self.server.request_exit()
+        if self.thread.is_alive():
+            self.thread.join(timeout)
+        self.sock.close()
+        return not self.thread.is_alive()
+
+    def __enter__(self) -> "ThreadServer":
+        self.start().wait_ready()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def _serve_child(app: str, host: str, port: int, conn) -> None:
+    """Entry point of the child process of ``ProcessServer``."""
+    try:
+        sock = bind_socket(host, port)
+    except OSError as e:
+        conn.send(("error", f"cannot bind {host}:{port}: {e}"))
+        return
+    conn.send(("bound", sock.getsockname()[1]))
+    try:
+        server = make_server(app, lambda: conn.send(("ready", os.getpid())))
+    except RuntimeError as e:
+        conn.send(("error", str(e)))
+        return
+
+    def watch_parent():
+        try:
+            conn.recv()  # "stop", or EOF when the parent is gone
+        except (EOFError, OSError):
+            pass
+        server.request_exit()
+
+    threading.Thread(target=watch_parent, name="parent-watch", daemon=True).start()
+    try:
+        server.run(sockets=[sock])
+    except SystemExit:
+        conn.send(("error", "app startup failed"))
+
+
+class ProcessServer:
+    """An API app served by uvicorn in a child process."""
+
+    def __init__(self, app: str = "free", host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            app (str): "free", "paid" or an import string ("module:app")
+            host (str): Interface to listen on
+            port (int): Port, or 0 for a free one (known once the child has bound it)
+        """
+        self.host = host
+        self.port = port
+        self.error: Optional[str] = None
+        self._ready = False
+        ctx = multiprocessing.get_context("spawn")
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_serve_child, args=(_app_target(app), host, port, child_conn),
+                                   name="corally-api-server", daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid
+
+    def start(self) -> "ProcessServer":
+        self.process.start()
+        return self
+
+    def wait_ready(self, timeout: float = 20.0) -> None:
+        """
+        Block until the child reports that it accepts connections.
+
+        Raises:
+            RuntimeError: The child failed or did not report within ``timeout``
+        """
+        deadline = time.monotonic() + timeout
+        while not self._ready:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RuntimeError(f"API server process not ready after {timeout}s")
+            if not self.conn.poll(min(remaining, 0.1)):
+                if not self.process.is_alive():
+                    raise RuntimeError(f"API server process exited with code {self.process.exitcode}")
+                continue
+            try:
+                kind, value = self.conn.recv()
+            except EOFError:
+                self.process.join(1)
+                raise RuntimeError(f"API server process exited with code {self.process.exitcode}")
+            if kind == "bound":
+                self.port = value
+            elif kind == "ready":
+                self._ready = True
+            else:
+                self.error = value
+                raise RuntimeError(f"API server failed to start: {value}")
+
+    def is_running(self) -> bool:
+        return self._ready and self.process.is_alive()
+
+    def stop(self, timeout: float = 5.0) -> bool:
+        """Ask the child to shut down gracefully, terminating it after ``timeout``."""
+        if self.process.is_alive():
+            try:
+                self.conn.send("stop")
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(1)
+        self.conn.close()
+        return not self.process.is_alive()
+
+    def __enter__(self) -> "ProcessServer":
+        self.start().wait_ready()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def host_server(app: str = "free", mode: str = "thread", host: str = "127.0.0.1", port: int = 0,
+                timeout: float = 20.0) -> Union[ThreadServer, ProcessServer]:
+    """
+    Start an API server and wait until it is ready.
+
+    Args:
+        app (str): "free", "paid" or an import string
+        mode (str): "thread" (this process) or "process" (child process)
+        host (str): Interface to listen on
+        port (int): Port, or 0 for a free one
+        timeout (float): Seconds to wait for readiness
+
+    Returns:
+        The running server; call ``stop()`` to shut it down
+    """
+    if mode not in ("thread", "process"):
+        raise ValueError(f"Unknown mode '{mode}', expected 'thread' or 'process'")
+    server = ThreadServer(app, host, port) if mode == "thread" else ProcessServer(app, host, port)
+    server.start()
+    try:
+        server.wait_ready(timeout)
+    except RuntimeError:
+        server.stop(timeout=1)
+        raise
+    return server
@@ -0,0 +1,73 @@
+"""
+HTTP caching headers for conversion responses.
+
+A conversion only changes when its rate is refreshed, and every refresh
+gives the cache entry a new timestamp. The timestamp therefore serves as
+the rate version:
+
+- ``ETag`` is a weak validator built from the cache key and the timestamp
+- ``Cache-Control: max-age`` is the entry's remaining TTL, so clients and
+  intermediary caches keep the response exactly as long as the server would
+- A request whose ``If-None-Match`` matches is answered with ``304 Not
+  Modified`` and no body
+"""
+
+import time
+from typing import Dict, Optional
+
+from fastapi import Response
+
+
+def make_etag(cache_key: str, timestamp: float) -> str:
+    """Return a weak ETag for a cache entry version."""
+    return f'W/"{cache_key}-{int(timestamp * 1000):x}"'
+
+
+def cache_control(timestamp: float, ttl: float, stale_ttl: float = 0, now: Optional[float] = None) -> str:
+    """
+    Build a Cache-Control value from an entry's remaining lifetime.
+
+    Args:
+        timestamp (float): Time the rate was fetched
+        ttl (float): Seconds a rate stays fresh
+        stale_ttl (float): Seconds a stale rate may still be served while
+                           it is refreshed
+        now (float): Current time (default: ``time.time()``)
+    """
+    now = time.time() if now is None else now
+    max_age = max(0, int(timestamp + ttl - now))
+    if max_age == 0:
+        return "public, max-age=0, must-revalidate"
+    value = f"public, max-age={max_age}"
+    if stale_ttl:
+        value += f", stale-while-revalidate={int(stale_ttl)}"
+    return value
+
+
+def caching_headers(cache_key: str, timestamp: float, ttl: float, stale_ttl: float = 0) -> Dict[str, str]:
+    """Return the ETag and Cache-Control headers for a cache entry."""
+    return {
+        "ETag": make_etag(cache_key, timestamp),
+        "Cache-Control": cache_control(timestamp, ttl, stale_ttl),
+    }
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag (RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    """Return an empty 304 response carrying the validators."""
+    return Response(status_code=304, headers=headers)
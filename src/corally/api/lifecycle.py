@@ -0,0 +1,331 @@
+"""
+Start, find and stop API servers across processes and platforms.
+
+Servers started by the GUI, ``corally server`` or ``manage_api_server.py``
+register in a runtime directory (``data/run``, or ``CORALLY_RUNTIME_DIR``):
+one JSON file per port holding the PID, the app and a random shutdown
+token. Any of these tools can then
+
+- check readiness over HTTP (``GET /health``)
+- stop a server through ``POST /shutdown`` with its token, and fall back to
+  SIGTERM (TerminateProcess on Windows) and SIGKILL for the recorded PID
+
+This replaces parsing localized ``netstat`` output and calling ``taskkill``.
+Servers embedded in another program (the GUI hosts one on a thread) are
+only stopped through the endpoint, never by signalling their PID.
+
+Run a registered server in the foreground with
+``python -m corally.api.lifecycle serve --app free --port 8000``.
+"""
+
+import argparse
+import json
+import os
+import secrets
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+RUNTIME_DIR = Path(os.getenv("CORALLY_RUNTIME_DIR", "data/run"))
+POLL_INTERVAL = 0.02  # seconds between readiness / exit checks
+
+# Servers started by this process; used to reap them and to tell them
+# apart from unrelated processes that reuse a recorded PID
+_children: Dict[int, subprocess.Popen] = {}
+
+
+def record_path(port: int) -> Path:
+    return RUNTIME_DIR / f"server-{port}.json"
+
+
+def write_record(record: dict) -> None:
+    """Write a server record atomically, readable only by the owner."""
+    RUNTIME_DIR.mkdir(parents=True, exist_ok=True)
+    path = record_path(record["port"])
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)  # holds the token
+    with os.fdopen(fd, "w") as f:
+        json.dump(record, f)
+    os.replace(tmp, path)
+
+
+def read_record(port: int) -> Optional[dict]:
+    try:
+        with open(record_path(port)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def remove_record(port: int, pid: Optional[int] = None) -> None:
+    """Remove a record; with ``pid`` only if it still belongs to that process."""
+    if pid is not None:
+        record = read_record(port)
+        if record is None or record.get("pid") != pid:
+            return
+    try:
+        record_path(port).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def read_records() -> List[dict]:
+    records = []
+    for path in sorted(RUNTIME_DIR.glob("server-*.json")):
+        try:
+            records.append(read_record(int(path.stem.split("-", 1)[1])))
+        except ValueError:
+            continue
+    return [record for record in records if record]
+
+
+def pid_alive(pid: int) -> bool:
+    """Return whether a process exists, without signalling it."""
+    child = _children.get(pid)
+    if child is not None:
+        return child.poll() is None  # also reaps the zombie
+    if os.name == "nt":
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        try:
+            code = ctypes.c_ulong()
+            kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+            return code.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    try:
+        # An exited process stays a zombie until its parent (often init) reaps it
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rpartition(")")[2].split()[0] != "Z"
+    except (OSError, IndexError):
+        return True  # no procfs (macOS)
+
+
+def _url(record: dict) -> str:
+    return f"http://{record.get('host', '127.0.0.1')}:{record['port']}"
+
+
+def probe(url: str, timeout: float = 0.5) -> bool:
+    """Return whether the server at ``url`` answers ``GET /health`` with 200."""
+    from .client import probe_health
+
+    return probe_health(url, timeout) is None
+
+
+def _wait(condition: Callable[[], bool], timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(POLL_INTERVAL)
+    return True
+
+
+def _is_running(record: dict) -> bool:
+    if record.get("embedded"):
+        return probe(_url(record))
+    return pid_alive(record["pid"])
+
+
+def list_servers() -> List[dict]:
+    """
+    Return the registered servers that are still running.
+
+    Records of servers that are gone are removed. Each returned record has
+    an additional ``ready`` flag from an HTTP probe.
+    """
+    servers = []
+    for record in read_records():
+        if not _is_running(record):
+            remove_record(record["port"], pid=record["pid"])
+            continue
+        servers.append({**record, "ready": probe(_url(record))})
+    return servers
+
+
+def find_server(port: int) -> Optional[dict]:
+    """Return the record of a running, ready server on ``port``, or None."""
+    record = read_record(port)
+    if record and _is_running(record) and probe(_url(record)):
+        return record
+    return None
+
+
+def serve(app: str = "free", host: str = "127.0.0.1", port: int = 8000) -> None:
+    """
+    Run a registered server in the foreground until it is stopped.
+
+    The record is written once the port is bound and removed on exit.
+    SIGINT / SIGTERM shut the server down gracefully.
+    """
+    from .hosting import bind_socket, make_server
+
+    sock = bind_socket(host, port)
+    port = sock.getsockname()[1]
+    token = secrets.token_urlsafe(32)
+    server = make_server(app, on_ready=lambda: print(f"✅ API server ready on http://{host}:{port}", flush=True),
+                         shutdown_token=token)
+    write_record({"pid": os.getpid(), "host": host, "port": port, "app": app, "token": token,
+                  "embedded": False, "started": time.time()})
+    try:
+        server.run(sockets=[sock])
+    finally:
+        remove_record(port, pid=os.getpid())
+        sock.close()
+
+
+def start_server(app: str = "free", host: str = "127.0.0.1", port: int = 8000, timeout: float = 30.0) -> dict:
+    """
+    Start a registered server in a detached process and wait until it answers.
+
+    A ready server already registered on ``port`` is reused.
+
+    Returns:
+        dict: The server record (pid, host, port, app, ...)
+
+    Raises:
+        RuntimeError: The server exited or did not answer within ``timeout``
+    """
+    existing = find_server(port)
+    if existing:
+        return existing
+
+    RUNTIME_DIR.mkdir(parents=True, exist_ok=True)
+    log_path = RUNTIME_DIR / f"server-{port}.log"
+    if os.name == "nt":
+        options = {"creationflags": getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0)
+                   | getattr(subprocess, "DETACHED_PROCESS", 0)}
+    else:
+        options = {"start_new_session": True}  # not killed with the terminal
+    with open(log_path, "wb") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "corally.api.lifecycle", "serve", "--app", app, "--host", host, "--port", str(port)],
+            stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, **options,
+        )
+    _children[process.pid] = process
+
+    url = f"http://{host}:{port}"
+
+    def ready() -> bool:
+        if process.poll() is not None:
+            return True
+        record = read_record(port)
+        return bool(record and record["pid"] == process.pid and probe(url, timeout=0.2))
+
+    if not _wait(ready, timeout):
+        process.terminate()
+        raise RuntimeError(f"API server on port {port} not ready after {timeout}s, see {log_path}")
+    if process.poll() is not None:
+        raise RuntimeError(f"API server exited with code {process.returncode}, see {log_path}")
+    return read_record(port)
+
+
+def start_embedded(app: str = "free", host: str = "127.0.0.1", port: int = 0, timeout: float = 20.0):
+    """
+    Host a registered server on a thread of this process (used by the GUI).
+
+    Returns:
+        ThreadServer: The running server; stop it with ``stop_server(port)``
+    """
+    from .hosting import ThreadServer
+
+    server = ThreadServer(app, host, port, shutdown_token=secrets.token_urlsafe(32)).start()
+    try:
+        server.wait_ready(timeout)
+    except RuntimeError:
+        server.stop(timeout=1)
+        raise
+    write_record({"pid": os.getpid(), "host": host, "port": server.port, "app": app,
+                  "token": server.shutdown_token, "embedded": True, "started": time.time()})
+    return server
+
+
+def request_shutdown(record: dict, timeout: float = 1.0) -> bool:
+    """Ask a server to shut down through its token-protected endpoint."""
+    import requests
+
+    try:
+        response = requests.post(_url(record) + "/shutdown", headers={"X-Shutdown-Token": record["token"]},
+                                 timeout=timeout)
+    except requests.exceptions.RequestException:
+        return False
+    return response.status_code == 200
+
+
+def _terminate(pid: int, timeout: float) -> bool:
+    os.kill(pid, signal.SIGTERM)  # TerminateProcess on Windows
+    if _wait(lambda: not pid_alive(pid), timeout):
+        return True
+    if os.name != "nt":
+        os.kill(pid, signal.SIGKILL)
+        return _wait(lambda: not pid_alive(pid), 1.0)
+    return False
+
+
+def stop_server(port: int, timeout: float = 5.0) -> bool:
+    """
+    Stop the registered server on ``port``.
+
+    The server is asked through ``POST /shutdown`` first. A detached server
+    that does not exit within ``timeout`` is terminated by signal, but only
+    if it answered on its port or was started by this process, so a PID
+    reused by an unrelated process is never signalled.
+
+    Returns:
+        bool: True if the server is no longer running
+    """
+    record = read_record(port)
+    if record is None:
+        return False
+    if not _is_running(record):
+        remove_record(port)
+        return True
+
+    answered = request_shutdown(record)
+    if _wait(lambda: not _is_running(record), timeout if answered else 0.1):
+        remove_record(port)
+        return True
+    if record.get("embedded"):
+        return False
+
+    pid = record["pid"]
+    if not answered and pid not in _children and not probe(_url(record)):
+        remove_record(port)  # stale record, the PID belongs to another process now
+        return False
+    if _terminate(pid, timeout=2.0):
+        remove_record(port)
+        return True
+    return False
+
+
+def stop_all(timeout: float = 5.0) -> Dict[int, bool]:
+    """Stop every registered server; returns port -> stopped."""
+    return {record["port"]: stop_server(record["port"], timeout) for record in read_records()}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run a registered Corally API server.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("serve", help="serve in the foreground")
+    run.add_argument("--app", default="free", help="free, paid or an import string (module:app)")
+    run.add_argument("--host", default="127.0.0.1")
+    run.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+    serve(args.app, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+Prometheus-compatible metrics for the API servers.
+
+A small, dependency-free implementation of counters, gauges and
+histograms, rendered in the Prometheus text exposition format (0.0.4).
+Recording a value is a dict update, so the per-request overhead stays
+negligible. Values that are already counted elsewhere (e.g. the cache
+counters) are read through callbacks when ``/metrics`` is scraped.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FLUSH_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+LabelValues = Tuple[str, ...]
+CallbackResult = Union[float, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts plus sum and count per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            self._sums[key] = 0.0
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        self._sums[key] += value
+
+    def count(self, **labels: str) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def total(self) -> int:
+        """Number of observations across all label sets."""
+        return sum(sum(counts) for counts in self._counts.values())
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key in sorted(self._counts):
+            counts = self._counts[key]
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(self._sums[key])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """Counter or gauge whose value is read from a callback at scrape time."""
+
+    def __init__(self, name: str, documentation: str, kind: str,
+                 callback: Callable[[], CallbackResult]):
+        super().__init__(name, documentation)
+        self.kind = kind
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        result = self.callback()
+        if isinstance(result, list):
+            for labels, value in result:
+                names = tuple(labels)
+                lines.append(f"{self.name}{_format_labels(names, [labels[n] for n in names])} "
+                             f"{_format_value(value)}")
+        elif result is not None:
+            lines.append(f"{self.name} {_format_value(result)}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, kind: str,
+                 callback: Callable[[], CallbackResult]) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, kind, callback))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class ApiMetrics:
+    """
+    The standard metric set of one API server.
+
+    Attributes:
+        registry: Registry rendered by ``/metrics``
+        requests: Request latency histogram by method, endpoint and status
+        upstream_latency: Upstream latency histogram by provider
+        upstream_errors: Upstream error counter by provider and reason
+        upstream_inflight: Upstream requests currently in flight by provider
+        flush_duration: Persistence flush duration histogram
+    """
+
+    def __init__(self, prefix: str = "corally"):
+        self.prefix = prefix
+        self.registry = Registry()
+        self.requests = self.registry.histogram(
+            f"{prefix}_http_request_duration_seconds",
+            "HTTP request latency by endpoint and status.",
+            ("method", "endpoint", "status"),
+        )
+        self.upstream_latency = self.registry.histogram(
+            f"{prefix}_upstream_request_duration_seconds",
+            "Latency of requests to upstream rate providers.",
+            ("provider",),
+        )
+        self.upstream_errors = self.registry.counter(
+            f"{prefix}_upstream_errors_total",
+            "Failed upstream requests by provider and reason.",
+            ("provider", "reason"),
+        )
+        self.upstream_inflight = self.registry.gauge(
+            f"{prefix}_upstream_requests_in_flight",
+            "Upstream requests currently in flight.",
+            ("provider",),
+        )
+        self.flush_duration = self.registry.histogram(
+            f"{prefix}_persistence_flush_duration_seconds",
+            "Duration of background cache persistence flushes.",
+            buckets=FLUSH_BUCKETS,
+        )
+
+    @contextmanager
+    def upstream(self, provider: str) -> Iterator[None]:
+        """Track an upstream request: in-flight gauge, latency and exceptions."""
+        self.upstream_inflight.inc(provider=provider)
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.upstream_errors.inc(provider=provider, reason=type(e).__name__)
+            raise
+        finally:
+            self.upstream_inflight.dec(provider=provider)
+            self.upstream_latency.observe(time.perf_counter() - started, provider=provider)
+
+    def register_cache(self, cache) -> None:
+        """Export the counters of a ``RateCache``."""
+        p = self.prefix
+        self.registry.callback(f"{p}_cache_hits_total", "Fresh cache hits.", "counter", lambda: cache.hits)
+        self.registry.callback(f"{p}_cache_stale_hits_total", "Stale cache hits served while refreshing.",
+                               "counter", lambda: cache.stale_hits)
+        self.registry.callback(f"{p}_cache_misses_total", "Cache misses.", "counter", lambda: cache.misses)
+        self.registry.callback(f"{p}_cache_evictions_total", "Entries evicted by the LRU bounds.",
+                               "counter", lambda: cache.evictions)
+        self.registry.callback(f"{p}_cache_expirations_total", "Entries removed after expiry.",
+                               "counter", lambda: cache.expirations)
+        self.registry.callback(f"{p}_cache_entries", "Entries in the in-memory cache.", "gauge",
+                               lambda: len(cache))
+        self.registry.callback(f"{p}_cache_bytes", "Approximate memory used by the cache.", "gauge",
+                               lambda: cache.bytes)
+
+    def register_loop_monitor(self, monitor) -> None:
+        """Export the event-loop lag of a ``LoopLagMonitor``."""
+        self.registry.callback(
+            f"{self.prefix}_event_loop_lag_seconds", "Event-loop scheduling lag over the recent window.",
+            "gauge", lambda: [({"quantile": quantile}, monitor.stats()[f"{name}_ms"] / 1000)
+                              for quantile, name in (("0.5", "p50"), ("0.99", "p99"), ("1", "max"))],
+        )
+
+
+class MetricsMiddleware:
+    """ASGI middleware that records request latency per endpoint and status."""
+
+    def __init__(self, app, metrics: Optional[ApiMetrics] = None):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.metrics is None:
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or "unmatched"
+            self.metrics.requests.observe(
+                time.perf_counter() - started,
+                method=scope.get("method", ""),
+                endpoint=endpoint,
+                status=str(status["code"]),
+            )
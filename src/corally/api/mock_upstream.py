@@ -0,0 +1,256 @@
+"""
+Local stand-in for the upstream exchange-rate services.
+
+The mock answers in the formats both servers expect, so caching and
+concurrency changes can be load-tested offline and reproducibly:
+
+- ``GET /v4/latest/{base}`` like exchangerate-api.com (free server)
+- ``GET /latest?base=EUR&symbols=USD`` like fixer.io / frankfurter.app
+- ``GET /convert?from=EUR&to=USD&amount=10`` like exchangerate.host
+  (paid server; any ``access_key`` is accepted)
+- ``GET /stats`` with request and error counts
+
+Latency follows a configurable distribution, a fraction of requests fails
+or hangs, and rates drift as a random walk.
+
+Start it with ``python -m corally.api.mock_upstream --port 8099`` and point
+the servers at it::
+
+    FREE_API_ENDPOINTS=http://127.0.0.1:8099/v4/latest/
+    API_BASE_URL=http://127.0.0.1:8099/convert
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import time
+from typing import Dict, Optional
+
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse
+
+# EUR-based starting rates
+BASE_RATES = {
+    "EUR": 1.0,
+    "USD": 1.08,
+    "GBP": 0.85,
+    "JPY": 162.0,
+    "CHF": 0.95,
+    "CAD": 1.47,
+    "AUD": 1.63,
+    "CNY": 7.8,
+    "SEK": 11.4,
+    "NOK": 11.6,
+    "PLN": 4.3,
+    "INR": 90.0,
+}
+
+
+class LatencyModel:
+    """
+    Random response delay.
+
+    Specs have the form ``kind:param[:param]``:
+
+    - ``const:0.05`` - always 50 ms
+    - ``uniform:0.01:0.2`` - between 10 and 200 ms
+    - ``exp:0.05`` - exponential with a mean of 50 ms
+    - ``lognormal:0.05:0.5`` - median 50 ms, sigma 0.5 (long tail)
+    """
+
+    KINDS = ("const", "uniform", "exp", "lognormal")
+
+    def __init__(self, kind: str = "const", a: float = 0.0, b: float = 0.0):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution '{kind}', expected one of {self.KINDS}")
+        self.kind = kind
+        self.a = a
+        self.b = b
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        """Create a model from a spec string such as ``lognormal:0.05:0.5``."""
+        kind, *params = spec.split(":")
+        values = [float(p) for p in params] + [0.0, 0.0]
+        return cls(kind, values[0], values[1])
+
+    def sample(self, rng: random.Random) -> float:
+        """Return one delay in seconds."""
+        if self.kind == "uniform":
+            return rng.uniform(self.a, self.b)
+        if self.kind == "exp":
+            return rng.expovariate(1 / self.a) if self.a > 0 else 0.0
+        if self.kind == "lognormal":
+            return self.a * math.exp(rng.gauss(0, self.b)) if self.a > 0 else 0.0
+        return self.a
+
+    def __repr__(self) -> str:
+        return f"LatencyModel({self.kind}, {self.a}, {self.b})"
+
+
+class MockUpstream:
+    """State of the mock: rate table, drift, fault injection and counters."""
+
+    def __init__(self, latency: Optional[LatencyModel] = None, error_rate: float = 0.0,
+                 error_status: int = 503, timeout_rate: float = 0.0, hang: float = 30.0,
+                 drift: float = 0.0, seed: Optional[int] = None, rates: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            latency (LatencyModel): Response delay (default: none)
+            error_rate (float): Fraction of requests answered with ``error_status``
+            error_status (int): HTTP status of injected errors
+            timeout_rate (float): Fraction of requests that hang for ``hang`` seconds
+            hang (float): Seconds a hanging request waits before answering
+            drift (float): Rate volatility per sqrt(second) of the random walk
+            seed (int): Random seed for reproducible runs
+            rates (dict): EUR-based starting rates (default: ``BASE_RATES``)
+        """
+        self.latency = latency or LatencyModel()
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.timeout_rate = timeout_rate
+        self.hang = hang
+        self.drift = drift
+        self.rng = random.Random(seed)
+        self.rates = dict(rates or BASE_RATES)
+        self._last_drift = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+
+    def _advance(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._last_drift
+        self._last_drift = now
+        if self.drift <= 0 or elapsed <= 0:
+            return
+        scale = self.drift * math.sqrt(elapsed)
+        for currency in self.rates:
+            if currency != "EUR":
+                self.rates[currency] *= math.exp(self.rng.gauss(0, scale))
+
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        return self.rates[to_currency] / self.rates[from_currency]
+
+    def table(self, base: str) -> Dict[str, float]:
+        return {currency: self.rate(base, currency) for currency in self.rates}
+
+    async def delay(self) -> Optional[JSONResponse]:
+        """Wait like a real upstream; return an error response if one is injected."""
+        self.requests += 1
+        self._advance()
+        roll = self.rng.random()
+        if roll < self.timeout_rate:
+            self.timeouts += 1
+            await asyncio.sleep(self.hang)
+        else:
+            await asyncio.sleep(self.latency.sample(self.rng))
+        if self.rng.random() < self.error_rate:
+            self.errors += 1
+            return JSONResponse({"error": "injected failure"}, status_code=self.error_status)
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "latency": repr(self.latency),
+            "error_rate": self.error_rate,
+            "drift": self.drift,
+        }
+
+
+def create_mock_app(mock: Optional[MockUpstream] = None) -> FastAPI:
+    """Create the mock upstream app around a ``MockUpstream`` state."""
+    mock = mock or MockUpstream()
+    app = FastAPI(title="Mock Exchange Rate Upstream")
+    app.state.mock = mock
+
+    @app.get("/v4/latest/{base}")
+    async def latest_path(base: str):
+        error = await mock.delay()
+        if error is not None:
+            return error
+        base = base.upper()
+        if base not in mock.rates:
+            return JSONResponse({"result": "error", "error-type": "unsupported-code"}, status_code=404)
+        return {
+            "base": base,
+            "date": time.strftime("%Y-%m-%d"),
+            "time_last_updated": int(time.time()),
+            "rates": mock.table(base),
+        }
+
+    @app.get("/latest")
+    async def latest_query(base: str = "EUR", symbols: Optional[str] = None):
+        error = await mock.delay()
+        if error is not None:
+            return error
+        base = base.upper()
+        if base not in mock.rates:
+            return {"success": False, "error": {"code": 201, "type": "invalid_base_currency"}}
+        rates = mock.table(base)
+        if symbols:
+            wanted = {s.strip().upper() for s in symbols.split(",")}
+            rates = {c: r for c, r in rates.items() if c in wanted}
+        return {"success": True, "timestamp": int(time.time()), "base": base, "rates": rates}
+
+    @app.get("/convert")
+    async def convert(
+        from_currency: str = Query(..., alias="from"),
+        to_currency: str = Query(..., alias="to"),
+        amount: float = 1.0,
+        access_key: Optional[str] = None,
+    ):
+        error = await mock.delay()
+        if error is not None:
+            return error
+        from_currency, to_currency = from_currency.upper(), to_currency.upper()
+        if from_currency not in mock.rates or to_currency not in mock.rates:
+            return {"success": False, "error": {"code": 402, "info": "Invalid currency code."}}
+        rate = mock.rate(from_currency, to_currency)
+        return {
+            "success": True,
+            "query": {"from": from_currency, "to": to_currency, "amount": amount},
+            "info": {"timestamp": int(time.time()), "quote": rate},
+            "result": amount * rate,
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return mock.stats()
+
+    return app
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Run a local mock exchange-rate upstream.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", default="const:0", help="e.g. const:0.05, uniform:0.01:0.2, "
+                                                            "exp:0.05, lognormal:0.05:0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--hang", type=float, default=30.0)
+    parser.add_argument("--drift", type=float, default=0.0, help="rate volatility per sqrt(second)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    mock = MockUpstream(
+        latency=LatencyModel.parse(args.latency),
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        timeout_rate=args.timeout_rate,
+        hang=args.hang,
+        drift=args.drift,
+        seed=args.seed,
+    )
+    import uvicorn
+    uvicorn.run(create_mock_app(mock), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
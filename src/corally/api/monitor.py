@@ -0,0 +1,68 @@
+"""
+Event-loop lag measurement for the API servers.
+
+``LoopLagMonitor`` sleeps for a fixed interval on the event loop and
+records how much later than requested it wakes up. Anything that blocks
+the loop shows up as lag, e.g. synchronous file I/O in a handler. Lag
+that tracks cache size points to blocking persistence.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Optional
+
+
+def percentile(values, fraction: float) -> float:
+    """Return the nearest-rank percentile of a sequence (0.0 if empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+class LoopLagMonitor:
+    """Samples event-loop scheduling lag in a background task."""
+
+    def __init__(self, interval: float = 0.1, window: int = 600):
+        """
+        Args:
+            interval (float): Seconds between samples
+            window (int): Number of recent samples kept for percentiles
+        """
+        self.interval = interval
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.max_lag = 0.0
+        self._task: Optional["asyncio.Task"] = None
+
+    async def start(self) -> None:
+        """Start sampling on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop sampling."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self.samples.append(lag)
+            if lag > self.max_lag:
+                self.max_lag = lag
+
+    def stats(self) -> dict:
+        """Return lag percentiles over the recent window, in milliseconds."""
+        samples = list(self.samples)
+        return {
+            "samples": len(samples),
+            "p50_ms": round(percentile(samples, 0.50) * 1000, 3),
+            "p99_ms": round(percentile(samples, 0.99) * 1000, 3),
+            "max_ms": round(self.max_lag * 1000, 3),
+        }
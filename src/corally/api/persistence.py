@@ -0,0 +1,144 @@
+"""
+Background persistence for the API servers.
+
+Writing the cache CSV or the shared SQLite database from inside an
+``async def`` handler blocks every connection for the length of the disk
+write. ``CacheWriter`` moves that work to one writer thread. Jobs are
+identified by a name and coalesced: if a job is requested again before the
+writer gets to it, only the latest version runs. A burst of cache updates
+therefore results in one CSV rewrite.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+
+class CacheWriter:
+    """
+    Single background thread that runs coalesced persistence jobs.
+
+    Features:
+    - ``request(name, job)`` never blocks the caller on I/O
+    - Jobs with the same name are merged; the most recent one wins
+    - A short delay collects bursts of requests into one flush
+    - Pending jobs are flushed on ``stop()`` and at interpreter exit
+    """
+
+    def __init__(self, name: str = "cache-writer", delay: float = 0.2,
+                 on_flush: Optional[Callable[[float], None]] = None):
+        """
+        Args:
+            name (str): Thread name
+            delay (float): Seconds to wait after the first request before
+                           flushing, so that bursts are written once
+            on_flush: Optional callback receiving each flush duration in
+                      seconds, e.g. a metrics histogram
+        """
+        self.name = name
+        self.delay = delay
+        self.on_flush = on_flush
+
+        self._pending: "OrderedDict[str, Callable[[], None]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.flushes = 0
+        self.jobs_run = 0
+        self.errors = 0
+        self.last_flush_seconds = 0.0
+        self.total_flush_seconds = 0.0
+
+    def request(self, name: str, job: Callable[[], None]) -> None:
+        """
+        Queue a job, replacing any pending job with the same name.
+
+        Args:
+            name (str): Coalescing key, e.g. ``"csv"`` or ``"put:EUR-USD-1.0"``
+            job: Callable that performs the write
+        """
+        with self._lock:
+            self._pending.pop(name, None)
+            self._pending[name] = job
+            self._idle.clear()
+            if self._thread is None:
+                self._start()
+        self._wakeup.set()
+
+    def _start(self) -> None:
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait()
+            if not self._stopping and self.delay:
+                time.sleep(self.delay)
+            with self._lock:
+                jobs = list(self._pending.items())
+                self._pending.clear()
+                self._wakeup.clear()
+                stopping = self._stopping
+            if jobs:
+                self._flush(jobs)
+            with self._lock:
+                if not self._pending:
+                    self._idle.set()
+            if stopping:
+                return
+
+    def _flush(self, jobs) -> None:
+        started = time.perf_counter()
+        for name, job in jobs:
+            try:
+                job()
+                self.jobs_run += 1
+            except Exception as e:
+                self.errors += 1
+                logging.error("Persistence job %s failed: %s", name, e)
+        self.last_flush_seconds = time.perf_counter() - started
+        self.total_flush_seconds += self.last_flush_seconds
+        self.flushes += 1
+        if self.on_flush is not None:
+            self.on_flush(self.last_flush_seconds)
+
+    def pending(self) -> int:
+        """Return the number of queued jobs."""
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all queued jobs have run. Returns False on timeout."""
+        self._wakeup.set()
+        return self._idle.wait(timeout)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Run any pending jobs and stop the writer thread."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+            self._stopping = True
+        if thread is None:
+            return
+        self._wakeup.set()
+        thread.join(timeout)
+        atexit.unregister(self.stop)
+
+    def stats(self) -> dict:
+        """Return counters for monitoring."""
+        return {
+            "pending": self.pending(),
+            "flushes": self.flushes,
+            "jobs": self.jobs_run,
+            "errors": self.errors,
+            "last_flush_ms": round(self.last_flush_seconds * 1000, 3),
+        }
@@ -0,0 +1,184 @@
+"""
+Background refresh of hot currency pairs for the API servers.
+
+Cache entries expire after ``CACHE_TTL``. Without help, the first request
+after expiry pays the full upstream latency. ``RateRefresher`` counts hits
+per currency pair and re-fetches the hot ones shortly before their entries
+expire, so clients keep getting cached values.
+"""
+
+import asyncio
+import heapq
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+Pair = Tuple[str, str]
+RefreshFunc = Callable[[str, str], Awaitable[None]]
+KeepWarmFunc = Callable[[str, str], bool]
+
+
+class RateRefresher:
+    """
+    Schedules jittered background refreshes for frequently used pairs.
+
+    Features:
+    - Hit counting per pair; only pairs with enough hits are refreshed
+    - Refresh ``lead`` seconds before expiry, minus a random jitter
+    - Upstream concurrency bounded by a semaphore
+    - At most one refresh in flight per pair
+    - Pairs selected by ``keep_warm`` are refreshed every TTL regardless of hits
+    """
+
+    def __init__(
+        self,
+        refresh: RefreshFunc,
+        ttl: float = 3600.0,
+        lead: float = 60.0,
+        jitter: float = 30.0,
+        hot_threshold: int = 3,
+        max_concurrency: int = 4,
+        keep_warm: Optional[KeepWarmFunc] = None,
+    ):
+        """
+        Args:
+            refresh: Coroutine function ``refresh(from_currency, to_currency)``
+                     that fetches the pair upstream and updates the cache.
+            ttl (float): Cache TTL, used to reschedule kept-warm pairs.
+            lead (float): Seconds before expiry at which a refresh is due.
+            jitter (float): Maximum random offset subtracted from the due time.
+            hot_threshold (int): Hits per TTL window that make a pair hot.
+            max_concurrency (int): Maximum parallel upstream refreshes.
+            keep_warm: Optional ``keep_warm(from_currency, to_currency)``
+                       returning True for pairs that must stay fresh, e.g.
+                       pairs with streaming subscribers.
+        """
+        self.refresh = refresh
+        self.ttl = ttl
+        self.keep_warm = keep_warm
+        self.lead = lead
+        self.jitter = jitter
+        self.hot_threshold = hot_threshold
+        self.max_concurrency = max_concurrency
+
+        self._hits: Dict[Pair, int] = {}
+        self._due: Dict[Pair, float] = {}
+        self._heap: List[Tuple[float, Pair]] = []
+        self._forced: Set[Pair] = set()
+        self._inflight: Set[Pair] = set()
+        self._tasks: Set["asyncio.Task"] = set()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._runner: Optional["asyncio.Task"] = None
+        self._stopping = False
+
+    @staticmethod
+    def _pair(from_currency: str, to_currency: str) -> Pair:
+        return from_currency.upper(), to_currency.upper()
+
+    def touch(self, from_currency: str, to_currency: str, expires_at: float) -> None:
+        """
+        Record a hit for a pair and schedule a refresh ahead of its expiry.
+
+        Args:
+            from_currency (str): Source currency code
+            to_currency (str): Target currency code
+            expires_at (float): Unix time at which the cached rate expires
+        """
+        pair = self._pair(from_currency, to_currency)
+        self._hits[pair] = self._hits.get(pair, 0) + 1
+        if pair not in self._due:
+            due = expires_at - self.lead - random.uniform(0, self.jitter)
+            self._schedule(pair, due)
+
+    def request_refresh(self, from_currency: str, to_currency: str) -> None:
+        """Refresh a pair as soon as possible, regardless of its hit count."""
+        pair = self._pair(from_currency, to_currency)
+        self._forced.add(pair)
+        self._schedule(pair, time.time())
+
+    def is_refreshing(self, from_currency: str, to_currency: str) -> bool:
+        """Return True while a refresh for the pair is in flight."""
+        return self._pair(from_currency, to_currency) in self._inflight
+
+    def _schedule(self, pair: Pair, due: float) -> None:
+        current = self._due.get(pair)
+        if current is not None and current <= due:
+            return
+        self._due[pair] = due
+        heapq.heappush(self._heap, (due, pair))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        """Start the scheduler task on the running event loop."""
+        if self._runner is not None:
+            return
+        self._stopping = False
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._wakeup = asyncio.Event()
+        self._runner = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the scheduler and any refreshes still in flight."""
+        # The flag ends the scheduler loop even if the cancel is lost to a
+        # wakeup arriving in the same loop iteration.
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+        tasks = list(self._tasks)
+        if self._runner is not None:
+            tasks.append(self._runner)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._runner = None
+        self._wakeup = None
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                due, pair = heapq.heappop(self._heap)
+                if self._due.get(pair) != due:
+                    continue  # superseded by an earlier schedule
+                del self._due[pair]
+                hot = self._hits.pop(pair, 0) >= self.hot_threshold
+                if hot or pair in self._forced or self._is_kept_warm(pair):
+                    self._forced.discard(pair)
+                    self._spawn(pair)
+
+            timeout = self._heap[0][0] - now if self._heap else None
+            self._wakeup.clear()
+            waiter = asyncio.ensure_future(self._wakeup.wait())
+            try:
+                await asyncio.wait({waiter}, timeout=timeout)
+            finally:
+                waiter.cancel()
+
+    def _is_kept_warm(self, pair: Pair) -> bool:
+        return self.keep_warm is not None and self.keep_warm(*pair)
+
+    def _spawn(self, pair: Pair) -> None:
+        if self._stopping or pair in self._inflight:
+            return
+        self._inflight.add(pair)
+        task = asyncio.ensure_future(self._refresh(pair))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, pair: Pair) -> None:
+        try:
+            async with self._semaphore:
+                logging.info("Background refresh: %s -> %s", *pair)
+                await self.refresh(*pair)
+            if self._is_kept_warm(pair):
+                due = time.time() + self.ttl - self.lead - random.uniform(0, self.jitter)
+                self._schedule(pair, due)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.warning("Background refresh of %s -> %s failed: %s", pair[0], pair[1], e)
+        finally:
+            self._inflight.discard(pair)
@@ -0,0 +1,44 @@
+"""
+Process setup of the API servers.
+
+Importing a server module has no side effects, so tools, tests and the CLI
+can import it cheaply. ``prepare_runtime`` does the work a running server
+needs, once per process, from the app's startup hook (or right before
+``uvicorn.run``):
+
+- create the ``data`` directory
+- log to ``data/api.log`` (truncated on every start)
+- read a ``.env`` file into the environment
+"""
+
+import logging
+from pathlib import Path
+
+DATA_DIR = Path("data")
+
+_prepared = False
+
+
+def prepare_runtime(data_dir: Path = DATA_DIR, log_file: str = "api.log") -> None:
+    """
+    Create the data directory, configure logging and load ``.env`` (once).
+
+    Args:
+        data_dir (Path): Directory for the log, the cache file and the database
+        log_file (str): Log file name inside ``data_dir``
+    """
+    global _prepared
+    if _prepared:
+        return
+    _prepared = True
+
+    data_dir.mkdir(exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        filename=str(data_dir / log_file),
+        filemode="w",  # Overwrite log file on each start
+        format="%(asctime)s %(levelname)s %(message)s"
+    )
+
+    from dotenv import load_dotenv
+    load_dotenv()
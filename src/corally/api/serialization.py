@@ -0,0 +1,131 @@
+"""
+Fast JSON responses for the API servers.
+
+FastAPI sends every returned dict through ``jsonable_encoder`` and the
+standard ``json`` module. For the hot paths the servers return ready-made
+responses instead:
+
+- ``dumps`` uses orjson when it is installed (``pip install corally[fast]``)
+  and falls back to the standard library otherwise
+- ``FastJSONResponse`` serializes with ``dumps`` and skips
+  ``jsonable_encoder`` when returned directly from an endpoint
+- ``RenderedResponses`` keeps the encoded body of cached conversions, keyed
+  by the entry's version, so a repeated hit returns stored bytes
+
+Run ``python -m corally.api.serialization`` to compare the paths.
+"""
+
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize ``obj`` to compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered with ``dumps``."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class RenderedResponses:
+    """
+    LRU store of encoded response bodies.
+
+    A body is only returned for the same version it was rendered for, so
+    a refreshed rate (new timestamp) or a stale flag change renders anew.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        """
+        Args:
+            max_entries (int): Maximum number of stored bodies
+        """
+        self.max_entries = max_entries
+        self._bodies: "OrderedDict[str, Tuple[Any, bytes]]" = OrderedDict()
+        self.hits = 0
+        self.renders = 0
+
+    def __len__(self) -> int:
+        return len(self._bodies)
+
+    def get(self, key: str, version: Any) -> Optional[bytes]:
+        """Return the stored body for ``key`` if it was rendered for ``version``."""
+        stored = self._bodies.get(key)
+        if stored is None or stored[0] != version:
+            return None
+        self._bodies.move_to_end(key)
+        self.hits += 1
+        return stored[1]
+
+    def render(self, key: str, version: Any, content: Any) -> bytes:
+        """Encode ``content``, store it for ``version`` and return the bytes."""
+        body = dumps(content)
+        self._bodies[key] = (version, body)
+        self._bodies.move_to_end(key)
+        while len(self._bodies) > self.max_entries:
+            self._bodies.popitem(last=False)
+        self.renders += 1
+        return body
+
+    def clear(self) -> None:
+        self._bodies.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._bodies), "hits": self.hits, "renders": self.renders, "backend": BACKEND}
+
+
+def benchmark(iterations: int = 100_000) -> dict:
+    """
+    Time the response paths for a cached conversion.
+
+    Returns:
+        dict: Microseconds per response for the FastAPI default path
+              (``jsonable_encoder`` + ``json``), ``dumps`` and a stored body
+    """
+    from fastapi.encoders import jsonable_encoder
+
+    cached = {"from": "EUR", "to": "USD", "amount": 100.0, "result": 108.37, "info": {"rate": 1.0837}}
+    rendered = RenderedResponses()
+    rendered.render("EUR-USD-100.0", (1.0, False), {"cached": True, "stale": False, **cached})
+
+    def default():
+        content = {"cached": True, "stale": False, **cached}
+        json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False,
+                   separators=(",", ":")).encode("utf-8")
+
+    def fast():
+        dumps({"cached": True, "stale": False, **cached})
+
+    def prerendered():
+        rendered.get("EUR-USD-100.0", (1.0, False))
+
+    results = {"backend": BACKEND, "iterations": iterations}
+    for name, func in (("default_us", default), ("dumps_us", fast), ("prerendered_us", prerendered)):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        results[name] = round((time.perf_counter() - started) / iterations * 1e6, 3)
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(benchmark(), indent=2))
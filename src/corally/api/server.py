@@ -1,176 +1,295 @@
 import os
 import time
-import csv
-import httpx
 import logging
-from pathlib import Path
-from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Query
-
-# Create data directory if it doesn't exist
-data_dir = Path("data")
-data_dir.mkdir(exist_ok=True)
-
-logging.basicConfig(
-    level=logging.INFO,
-    filename=str(data_dir / "api.log"),      # Log file name
-    filemode="w",            # Overwrite log file on each start
-    format="%(asctime)s %(levelname)s %(message)s"
-)
+from typing import Any
+from fastapi import Body, FastAPI, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+
+from .batch import convert_batch
+from .engine import get_engine
+from .hosting import add_shutdown_endpoint
+from .http_cache import caching_headers, etag_matches, not_modified
+from .metrics import CONTENT_TYPE, ApiMetrics, MetricsMiddleware
+from .monitor import LoopLagMonitor
+from .refresh import RateRefresher
+from .runtime import DATA_DIR, prepare_runtime
+from .serialization import FastJSONResponse
+from .stream import RateBroadcaster, format_event, parse_pairs
+from .upstream import ExchangeRateHostProvider
 
-# .env laden
-load_dotenv()
-API_KEY = os.getenv("API_KEY")
+# Datenverzeichnis, Logging und .env werden erst beim Start eingerichtet
+# (siehe runtime.prepare_runtime). Die Einstellungen aus der Umgebung liest
+# configure() danach; hier stehen nur die Vorgaben.
+data_dir = DATA_DIR
+
+API_KEY = None
 # Note: API_KEY will be checked when the server starts, not at import time
 
+# Überschreibbar mit API_BASE_URL, z.B. für den lokalen Mock (corally.api.mock_upstream)
 BASE_URL = "https://api.exchangerate.host/convert"
 CACHE_FILE = str(data_dir / "cache.csv")
 CACHE_TTL = 3600  # 60 Minuten
+CACHE_STALE_TTL = 600  # abgelaufene Einträge noch 10 Minuten ausliefern
+
+# Cache-Backend: "csv" (ein Prozess) oder "sqlite" (mehrere Worker teilen sich den Cache);
+# überschreibbar mit CACHE_BACKEND und CACHE_DB
+CACHE_BACKEND = "csv"
+CACHE_DB = str(data_dir / "cache.db")
+
+# Obergrenzen für den Speicher-Cache (älteste Einträge werden zuerst verdrängt);
+# überschreibbar mit CACHE_MAX_ENTRIES und CACHE_MAX_BYTES (0 = keine Byte-Grenze)
+CACHE_MAX_ENTRIES = 10000
+CACHE_MAX_BYTES = None
+
+# Hintergrund-Aktualisierung häufig genutzter Paare
+REFRESH_LEAD = 60  # so viele Sekunden vor Ablauf aktualisieren
+REFRESH_JITTER = 30  # plus bis zu so vielen Sekunden Zufallsversatz
+REFRESH_HOT_HITS = 3  # Treffer pro TTL-Fenster, ab denen ein Paar "heiß" ist
+REFRESH_MAX_CONCURRENCY = 4  # parallele Upstream-Aktualisierungen
 
 app = FastAPI(title="Währungsrechner mit CSV-Cache")
 
 # -----------------------------
-# Cache: Speicher im Speicher + CSV
+# Cache: Speicher + CSV bzw. gemeinsame SQLite-Datenbank. Die Engine wird mit
+# dem Free-Server geteilt, falls beide in diesem Prozess laufen; die Einträge
+# sind über den Providernamen "paid" getrennt.
 # -----------------------------
-CACHE: dict = {}
+ENGINE = get_engine(
+    CACHE_FILE,
+    ttl=CACHE_TTL,
+    stale_ttl=CACHE_STALE_TTL,
+    backend=CACHE_BACKEND,
+    db_path=CACHE_DB,
+    max_entries=CACHE_MAX_ENTRIES,
+    max_bytes=CACHE_MAX_BYTES,
+)
+CACHE = ENGINE.cache
+RENDERED = ENGINE.rendered  # vorgerenderte Antworten für Cache-Treffer
+cache_writer = ENGINE.writer
+metrics = ApiMetrics()
+loop_monitor = LoopLagMonitor()
+ENGINE.flush_observers.append(metrics.flush_duration.observe)
+metrics.register_cache(CACHE)
+metrics.register_loop_monitor(loop_monitor)
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+upstream = ExchangeRateHostProvider(BASE_URL, API_KEY, metrics=metrics)
+RATES = ENGINE.provider("paid", source=upstream)
 
 def get_cache_key(from_currency: str, to_currency: str, amount: float) -> str:
-    return f"{from_currency.upper()}-{to_currency.upper()}-{amount}"
-
-def load_cache():
-    """Lädt vorhandene Cache-Einträge aus der CSV"""
-    if not os.path.exists(CACHE_FILE):
-        return
-    with open(CACHE_FILE, mode="r", newline="") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            key = get_cache_key(row["from"], row["to"], float(row["amount"]))
-            CACHE[key] = {
-                "timestamp": float(row["timestamp"]),
-                "data": {
-                    "from": row["from"],
-                    "to": row["to"],
-                    "amount": float(row["amount"]),
-                    "result": float(row["result"]),
-                    "info": {
-                        "rate": float(row["rate"]) if row["rate"] not in (None, '', 'None') else None
-                    }
-                }
-            }
-
-def save_cache():
-    """Schreibt den Cache in die CSV-Datei"""
-    with open(CACHE_FILE, mode="w", newline="") as f:
-        fieldnames = ["from", "to", "amount", "result", "rate", "timestamp"]
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for entry in CACHE.values():
-            data = entry["data"]
-            writer.writerow({
-                "from": data["from"],
-                "to": data["to"],
-                "amount": data["amount"],
-                "result": data["result"],
-                "rate": data["info"].get("rate", None),  # <-- Fix here
-                "timestamp": entry["timestamp"]
-            })
-
-def get_cache(key: str):
-    item = CACHE.get(key)
-    if item:
-        if time.time() - item["timestamp"] < CACHE_TTL:
-            # Update the timestamp to extend TTL
-            item["timestamp"] = time.time()
-            save_cache()
-            return item["data"]
-        else:
-            del CACHE[key]
-            save_cache()
-    return None
+    return RATES.key(from_currency, to_currency, amount)
+
+async def get_cache(key: str):
+    """Liefert (data, stale) für einen Cache-Eintrag oder (None, False)."""
+    return await RATES.get(key)
 
 def set_cache(key: str, value: dict):
-    CACHE[key] = {"timestamp": time.time(), "data": value}
-    save_cache()
-    
-    
-def cleanup_cache():
-    """Entfernt alle abgelaufenen Cache-Einträge."""
-    now = time.time()
-    keys_to_delete = [key for key, entry in CACHE.items() if now - entry["timestamp"] >= CACHE_TTL]
-    for key in keys_to_delete:
-        del CACHE[key]
-    if keys_to_delete:
-        save_cache()
-
-# Lade Cache beim Start und bereinige abgelaufene Einträge
-load_cache()
-cleanup_cache()
+    now = RATES.set(key, value)
+    broadcaster.publish(value["from"], value["to"], value["info"].get("rate"), now)
+
+# -----------------------------
+# Upstream-Abfrage
+# -----------------------------
+async def fetch_conversion(from_currency: str, to_currency: str, amount_float: float) -> dict:
+    """Fragt die Umrechnung bei exchangerate.host ab."""
+    return await upstream.fetch_conversion(from_currency, to_currency, amount_float)
+
+
+async def refresh_pair(from_currency: str, to_currency: str):
+    """Holt den Kurs eines Paares neu und aktualisiert alle zugehörigen Einträge."""
+    # Hat ein anderer Worker das Paar gerade erneuert, dessen Kurs übernehmen
+    shared = await RATES.recent_shared_rate(from_currency, to_currency, CACHE_TTL - REFRESH_LEAD - REFRESH_JITTER)
+    if shared:
+        rate, now = shared
+    else:
+        rate, now = await RATES.fetch_rate(from_currency, to_currency), time.time()
+    RATES.apply_rate(from_currency, to_currency, rate, now)
+    broadcaster.publish(from_currency, to_currency, rate, now)
+
+
+broadcaster = RateBroadcaster()
+
+refresher = RateRefresher(
+    refresh_pair,
+    ttl=CACHE_TTL,
+    lead=REFRESH_LEAD,
+    jitter=REFRESH_JITTER,
+    hot_threshold=REFRESH_HOT_HITS,
+    max_concurrency=REFRESH_MAX_CONCURRENCY,
+    keep_warm=broadcaster.has_subscribers,
+)
+
+def configure():
+    """Liest die Einstellungen aus der Umgebung und wendet sie auf Upstream und Cache an."""
+    global API_KEY, BASE_URL, CACHE_BACKEND, CACHE_DB, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES
+    API_KEY = os.getenv("API_KEY", API_KEY)
+    BASE_URL = os.getenv("API_BASE_URL", BASE_URL)
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", CACHE_BACKEND).lower()
+    CACHE_DB = os.getenv("CACHE_DB", CACHE_DB)
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", CACHE_MAX_ENTRIES))
+    CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", CACHE_MAX_BYTES or 0)) or None
+
+    upstream.url = BASE_URL
+    upstream.api_key = API_KEY
+    ENGINE.set_limits(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES)
+    ENGINE.use_backend(CACHE_BACKEND, CACHE_DB)
+
+
+@app.on_event("startup")
+async def start_background_tasks():
+    prepare_runtime(data_dir)
+    # .env ist erst jetzt geladen: API-Key, Upstream und Cache können daraus stammen
+    configure()
+    # Der Cache lädt im Hintergrund, Anfragen werden währenddessen schon beantwortet
+    ENGINE.start_loading()
+    await refresher.start()
+    await loop_monitor.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    await ENGINE.stop_loading()
+    await refresher.stop()
+    await loop_monitor.stop()
+    await upstream.aclose()  # gepoolte Verbindungen schließen
+    cache_writer.stop()  # ausstehende Schreibvorgänge abschließen
+
 # -----------------------------
 # API-Endpunkt
 # -----------------------------
 @app.get("/convert")
 async def convert(
+    request: Request,
     from_currency: str,
     to_currency: str,
     amount: str = Query(...)
 ):
+    logging.info("Umrechnung angefragt: %s %s -> %s", amount, from_currency, to_currency)
+
     # Allow comma as decimal separator
     try:
         amount_float = float(amount.replace(",", "."))
     except ValueError:
         raise HTTPException(status_code=400, detail="Ungültiger Betrag. Bitte Zahl mit Punkt oder Komma eingeben.")
 
+    from_currency = from_currency.upper()
+    to_currency = to_currency.upper()
     cache_key = get_cache_key(from_currency, to_currency, amount_float)
 
     # 1. Cache prüfen
-    cached = get_cache(cache_key)
+    cached, stale = await get_cache(cache_key)
     if cached:
-        return {"cached": True, **cached}
+        logging.info("Cache-Treffer für %s%s", cache_key, " (abgelaufen, wird erneuert)" if stale else "")
+        if stale:
+            refresher.request_refresh(from_currency, to_currency)
+        else:
+            expires_at = CACHE[cache_key]["timestamp"] + CACHE_TTL
+            refresher.touch(from_currency, to_currency, expires_at)
+        # Unveränderter Kurs: 304 ohne Body
+        headers = caching_headers(cache_key, CACHE[cache_key]["timestamp"], CACHE_TTL, CACHE_STALE_TTL)
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            return not_modified(headers)
+        # Vorgerenderter Body, solange sich Kurs und stale-Status nicht ändern
+        version = (CACHE[cache_key]["timestamp"], stale)
+        body = RENDERED.get(cache_key, version)
+        if body is None:
+            body = RENDERED.render(cache_key, version, {"cached": True, "stale": stale, **cached})
+        return Response(body, media_type="application/json", headers=headers)
 
     # 2. API-Aufruf
-    params = {
-        "access_key": API_KEY,
-        "from": from_currency.upper(),
-        "to": to_currency.upper(),
-        "amount": amount_float
-    }
-
-    async with httpx.AsyncClient() as client:
-        response = await client.get(BASE_URL, params=params)
-
-    logging.info("API response: %s", response.json())
-
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=f"API-Anfrage fehlgeschlagen: {response.status_code}")
-
-    data = response.json()
-    if not data.get("success", False):
-        err = data.get("error", {})
-        raise HTTPException(status_code=400, detail=f"API-Fehler: {err}")
-
-    # Extract rate safely
-    rate = None
-    if "info" in data and isinstance(data["info"], dict):
-        rate = data["info"].get("rate")
-        if rate is None:
-            rate = data["info"].get("quote")
-    elif "rate" in data:
-        rate = data.get("rate")
-
-    result = {
-        "from": from_currency.upper(),
-        "to": to_currency.upper(),
-        "amount": amount_float,
-        "result": data.get("result"),
-        "info": {
-            "rate": rate
-        }
-    }
+    result = await fetch_conversion(from_currency, to_currency, amount_float)
 
     # 3. Cache speichern
     set_cache(cache_key, result)
+    refresher.touch(from_currency, to_currency, time.time() + CACHE_TTL)
+    headers = None
+    if cache_key in CACHE:
+        headers = caching_headers(cache_key, CACHE[cache_key]["timestamp"], CACHE_TTL, CACHE_STALE_TTL)
+
+    return FastJSONResponse({"cached": False, "stale": False, **result}, headers=headers)
+
+
+async def get_cached_rate(from_currency: str, to_currency: str):
+    """Liefert (rate, timestamp) aus dem Cache-Eintrag mit Betrag 1 oder None."""
+    cache_key = get_cache_key(from_currency, to_currency, 1.0)
+    cached, stale = await get_cache(cache_key)
+    if not cached or cached["info"].get("rate") is None:
+        return None
+    timestamp = CACHE[cache_key]["timestamp"]
+    if stale:
+        refresher.request_refresh(from_currency, to_currency)
+    else:
+        refresher.touch(from_currency, to_currency, timestamp + CACHE_TTL)
+    return cached["info"]["rate"], timestamp
+
+
+async def resolve_rate(from_currency: str, to_currency: str):
+    """Liefert (rate, cached) für ein Paar über den Cache-Eintrag mit Betrag 1."""
+    hit = await get_cached_rate(from_currency, to_currency)
+    if hit:
+        return hit[0], True
+
+    result = await fetch_conversion(from_currency, to_currency, 1.0)
+    set_cache(get_cache_key(from_currency, to_currency, 1.0), result)
+    refresher.touch(from_currency, to_currency, time.time() + CACHE_TTL)
+    return result["info"]["rate"], False
+
+
+@app.post("/convert/batch")
+async def convert_many(payload: Any = Body(...)):
+    """Rechnet viele Beträge auf einmal um; jeder Kurs wird nur einmal ermittelt."""
+    batch = await convert_batch(payload, resolve_rate)
+    logging.info("Batch-Umrechnung: %d Einträge, %d Paare, %d Fehler", batch["count"], batch["pairs"], batch["errors"])
+    return FastJSONResponse(batch)
+
+
+@app.get("/stream")
+async def stream(
+    request: Request,
+    pairs: str = Query(..., description="Kommagetrennte Paare, z.B. EUR-USD,EUR-GBP")
+):
+    """Server-Sent Events mit Kursänderungen der abonnierten Paare."""
+    try:
+        pair_list = parse_pairs(pairs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    logging.info("Stream-Abo: %s", pair_list)
+    subscription = broadcaster.subscribe(pair_list)
+    for from_currency, to_currency in pair_list:
+        hit = await get_cached_rate(from_currency, to_currency)
+        if hit:
+            subscription.offer(format_event(from_currency, to_currency, *hit))
+        else:
+            refresher.request_refresh(from_currency, to_currency)
+
+    return StreamingResponse(
+        broadcaster.events(subscription, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Metriken im Prometheus-Textformat."""
+    return Response(metrics.registry.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/health")
+async def health():
+    return {
+        "status": "healthy",
+        "cache_entries": len(RATES),
+        "cache": CACHE.stats(),
+        "rendered_responses": RENDERED.stats(),
+        "persistence": {**cache_writer.stats(), **ENGINE.stats()},
+        "event_loop_lag": loop_monitor.stats(),
+        "upstream": upstream.stats(),
+    }
 
-    return {"cached": False, **result}
+# POST /shutdown für den Lifecycle-Manager; ohne Token des Hosts deaktiviert
+add_shutdown_endpoint(app)
 
 
 def create_app() -> FastAPI:
@@ -180,7 +299,8 @@ def create_app() -> FastAPI:
 
 def start_server(host: str = "127.0.0.1", port: int = 8000) -> None:
     """Start the API server."""
-    if not API_KEY:
+    prepare_runtime(data_dir)
+    if not os.getenv("API_KEY"):
         raise RuntimeError("Missing API_KEY in environment variables. Please set API_KEY in .env file.")
     import uvicorn
     uvicorn.run(app, host=host, port=port)
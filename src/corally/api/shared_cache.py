@@ -0,0 +1,167 @@
+"""
+SQLite-backed rate cache shared between API server worker processes.
+
+With ``uvicorn --workers N`` every worker has its own in-memory ``CACHE``.
+``SQLiteRateStore`` keeps one cache table in a WAL-mode SQLite database. All
+workers read it when their local copy is missing or expired and write each
+new entry as a single-row upsert. An upstream fetch in one worker then
+benefits all of them, and no worker has to rewrite a shared CSV file.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rates (
+    key TEXT PRIMARY KEY,
+    from_currency TEXT NOT NULL,
+    to_currency TEXT NOT NULL,
+    amount REAL NOT NULL,
+    result REAL,
+    rate REAL,
+    timestamp REAL NOT NULL
+)
+"""
+
+# Only overwrite a row with newer data, so a slow worker cannot roll back
+# a rate that another worker has already refreshed.
+UPSERT = """
+INSERT INTO rates (key, from_currency, to_currency, amount, result, rate, timestamp)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(key) DO UPDATE SET
+    result = excluded.result,
+    rate = excluded.rate,
+    timestamp = excluded.timestamp
+WHERE excluded.timestamp >= rates.timestamp
+"""
+
+
+def _row_to_entry(row: tuple) -> dict:
+    from_currency, to_currency, amount, result, rate, timestamp = row
+    return {
+        "timestamp": timestamp,
+        "data": {
+            "from": from_currency,
+            "to": to_currency,
+            "amount": amount,
+            "result": result,
+            "info": {
+                "rate": rate
+            }
+        }
+    }
+
+
+def _entry_to_row(key: str, entry: dict) -> tuple:
+    data = entry["data"]
+    return (key, data["from"], data["to"], data["amount"], data["result"],
+            data["info"].get("rate"), entry["timestamp"])
+
+
+class SQLiteRateStore:
+    """
+    Cross-process cache table in a SQLite database running in WAL mode.
+
+    Entries use the same ``{"timestamp": ..., "data": {...}}`` layout as the
+    in-memory ``CACHE`` of the API servers. Connections are per thread.
+    """
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        """
+        Args:
+            path (str): Database file, created on first use
+            timeout (float): Seconds to wait for a lock held by another worker
+        """
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(SCHEMA)
+            conn.execute("CREATE INDEX IF NOT EXISTS rates_pair ON rates (from_currency, to_currency)")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the entry for a key, or None."""
+        row = self._connection().execute(
+            "SELECT from_currency, to_currency, amount, result, rate, timestamp FROM rates WHERE key = ?",
+            (key,),
+        ).fetchone()
+        return _row_to_entry(row) if row else None
+
+    def put(self, key: str, entry: dict) -> None:
+        """Insert or update one entry."""
+        self._connection().execute(UPSERT, _entry_to_row(key, entry))
+
+    def put_many(self, items: Iterable[Tuple[str, dict]]) -> None:
+        """Insert or update several entries in one transaction."""
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany(UPSERT, (_entry_to_row(key, entry) for key, entry in items))
+
+    def update_pair(self, from_currency: str, to_currency: str, rate: float,
+                    timestamp: float, digits: Optional[int] = None, key_prefix: str = "") -> int:
+        """
+        Apply a new rate to every entry of a pair, including those only
+        other workers have seen.
+
+        Args:
+            from_currency (str): Source currency code
+            to_currency (str): Target currency code
+            rate (float): New exchange rate
+            timestamp (float): Time the rate was fetched
+            digits (int): Round results to this many digits, or None
+            key_prefix (str): Only update keys with this prefix, e.g. the
+                              provider namespace ``"free:"``
+
+        Returns:
+            int: Number of updated entries
+        """
+        result = "ROUND(amount * ?, ?)" if digits is not None else "amount * ?"
+        params = [rate, digits] if digits is not None else [rate]
+        cursor = self._connection().execute(
+            f"UPDATE rates SET result = {result}, rate = ?, timestamp = ? "
+            "WHERE from_currency = ? AND to_currency = ? AND timestamp < ? AND key LIKE ?",
+            (*params, rate, timestamp, from_currency, to_currency, timestamp, key_prefix + "%"),
+        )
+        return cursor.rowcount
+
+    def delete(self, key: str) -> None:
+        """Remove one entry."""
+        self._connection().execute("DELETE FROM rates WHERE key = ?", (key,))
+
+    def purge(self, max_age: float) -> int:
+        """Remove entries older than ``max_age`` seconds and return how many."""
+        cursor = self._connection().execute(
+            "DELETE FROM rates WHERE timestamp < ?", (time.time() - max_age,)
+        )
+        return cursor.rowcount
+
+    def load_all(self) -> Dict[str, dict]:
+        """Return all entries keyed by cache key."""
+        rows = self._connection().execute(
+            "SELECT key, from_currency, to_currency, amount, result, rate, timestamp FROM rates"
+        )
+        return {row[0]: _row_to_entry(row[1:]) for row in rows}
+
+    def count(self) -> int:
+        """Return the number of stored entries."""
+        return self._connection().execute("SELECT COUNT(*) FROM rates").fetchone()[0]
+
+    def close(self) -> None:
+        """Close this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
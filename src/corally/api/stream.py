@@ -0,0 +1,139 @@
+"""
+Server-Sent Events fan-out of rate updates for the API servers.
+
+Clients subscribe to a set of currency pairs and receive an event whenever
+the server's cache gets a new rate for one of them. Each update is encoded
+once and handed to every subscriber of the pair. Every subscriber has a
+bounded queue; when a slow consumer falls behind, its oldest pending
+events are dropped.
+"""
+
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+
+Pair = Tuple[str, str]
+
+QUEUE_SIZE = 32  # pending events per subscriber
+HEARTBEAT_INTERVAL = 15  # seconds between keep-alive comments
+
+
+def parse_pairs(pairs: str) -> List[Pair]:
+    """
+    Parse a comma-separated pair list such as ``"EUR-USD,gbp/jpy"``.
+
+    Raises:
+        ValueError: If a pair is not two 3-letter currency codes
+    """
+    result = []
+    for raw in pairs.split(","):
+        raw = raw.strip().upper().replace("/", "-")
+        if not raw:
+            continue
+        parts = raw.split("-")
+        if len(parts) != 2 or len(parts[0]) != 3 or len(parts[1]) != 3:
+            raise ValueError(f"Invalid currency pair '{raw}'. Use e.g. EUR-USD")
+        pair = (parts[0], parts[1])
+        if pair not in result:
+            result.append(pair)
+    if not result:
+        raise ValueError("At least one currency pair is required")
+    return result
+
+
+def format_event(from_currency: str, to_currency: str, rate: float,
+                 timestamp: Optional[float] = None) -> bytes:
+    """Encode a rate update as an SSE ``rate`` event."""
+    data = json.dumps({
+        "from": from_currency,
+        "to": to_currency,
+        "rate": rate,
+        "timestamp": timestamp if timestamp is not None else time.time(),
+    })
+    return f"event: rate\ndata: {data}\n\n".encode("utf-8")
+
+
+class Subscription:
+    """A subscriber's pairs and its bounded queue of encoded events."""
+
+    def __init__(self, pairs: Iterable[Pair], queue_size: int = QUEUE_SIZE):
+        self.pairs = list(pairs)
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def offer(self, event: bytes) -> None:
+        """Queue an event, dropping the oldest one if the queue is full."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+class RateBroadcaster:
+    """Fans out rate updates from the cache to SSE subscribers."""
+
+    def __init__(self, queue_size: int = QUEUE_SIZE, heartbeat: float = HEARTBEAT_INTERVAL):
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self._subscribers: Dict[Pair, Set[Subscription]] = {}
+
+    def subscribe(self, pairs: Iterable[Pair]) -> Subscription:
+        """Register a new subscription for the given pairs."""
+        subscription = Subscription(pairs, self.queue_size)
+        for pair in subscription.pairs:
+            self._subscribers.setdefault(pair, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscription from all of its pairs."""
+        for pair in subscription.pairs:
+            subscribers = self._subscribers.get(pair)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[pair]
+
+    def has_subscribers(self, from_currency: str, to_currency: str) -> bool:
+        """Return True if anyone is subscribed to the pair."""
+        return (from_currency.upper(), to_currency.upper()) in self._subscribers
+
+    def publish(self, from_currency: str, to_currency: str, rate: Optional[float],
+                timestamp: Optional[float] = None) -> int:
+        """
+        Push a rate update to all subscribers of the pair.
+
+        Returns:
+            int: Number of subscribers the event was handed to
+        """
+        if rate is None:
+            return 0
+        subscribers = self._subscribers.get((from_currency.upper(), to_currency.upper()))
+        if not subscribers:
+            return 0
+        event = format_event(from_currency.upper(), to_currency.upper(), rate, timestamp)
+        for subscription in subscribers:
+            subscription.offer(event)
+        return len(subscribers)
+
+    async def events(self, subscription: Subscription, request=None) -> AsyncIterator[bytes]:
+        """
+        Yield encoded events for a subscription until the client disconnects.
+
+        A comment line is sent every ``heartbeat`` seconds so that proxies
+        keep the connection open and disconnects are noticed.
+        """
+        try:
+            yield b": subscribed\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    if request is not None and await request.is_disconnected():
+                        break
+                    yield b": keep-alive\n\n"
+                    continue
+                yield event
+        finally:
+            self.unsubscribe(subscription)
@@ -0,0 +1,478 @@
+"""
+Upstream rate providers for the API servers.
+
+Every upstream implements ``RateProvider``: an async ``fetch_rate`` plus
+``stats`` for ``/health``. A provider is plugged into the shared
+``RateEngine`` together with its cache namespace (see ``engine.py``).
+
+- ``ExchangeRateHostProvider`` - exchangerate.host with an API key (paid server)
+- ``ProviderChain`` - several keyless APIs with failover (free server)
+
+``ProviderChain`` asks a list of providers for an exchange rate, in order
+of preference:
+
+- Every provider has a ``CircuitBreaker``. After repeated failures the
+  provider is skipped until a cool-down has passed, then one trial request
+  decides whether it is healthy again
+- Latencies are tracked per provider, including requests cancelled by a
+  faster hedge (their elapsed time is a lower bound). If the current request
+  takes longer than the provider's p95, a hedged request goes to the next
+  provider and the first answer wins
+- A failed request fails over to the next provider immediately
+
+With one degraded upstream, a lookup therefore costs roughly the healthy
+provider's latency plus the hedge delay instead of a full timeout.
+
+Every upstream keeps one pooled ``httpx.AsyncClient`` (``ClientPool``), so
+connections are reused across requests. The servers close them on shutdown
+through ``RateProvider.aclose``.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+from fastapi import HTTPException
+
+from .monitor import percentile
+
+
+class ClientPool:
+    """
+    One pooled ``httpx.AsyncClient`` per upstream, kept for the app's lifetime.
+
+    A client belongs to the event loop it was created on, so a new loop (or a
+    new transport, as swapped in by the benchmark) gets a new client.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, Tuple[asyncio.AbstractEventLoop, object, httpx.AsyncClient]] = {}
+
+    def get(self, key: str, transport=None) -> httpx.AsyncClient:
+        """Return the client for ``key`` (call from the event loop)."""
+        loop = asyncio.get_running_loop()
+        entry = self._clients.get(key)
+        if entry is not None:
+            owner, owner_transport, client = entry
+            if owner is loop and owner_transport is transport and not client.is_closed:
+                return client
+            if owner is loop:
+                asyncio.ensure_future(client.aclose())
+        client = httpx.AsyncClient(transport=transport)
+        self._clients[key] = (loop, transport, client)
+        return client
+
+    async def aclose(self) -> None:
+        """Close the clients of the running event loop and forget all others."""
+        loop = asyncio.get_running_loop()
+        clients, self._clients = self._clients, {}
+        for owner, _, client in clients.values():
+            if owner is loop:
+                await client.aclose()
+
+
+class RateProvider:
+    """Interface of an upstream exchange-rate source."""
+
+    name = "provider"
+
+    async def fetch_rate(self, from_currency: str, to_currency: str) -> float:
+        """
+        Return the exchange rate from ``from_currency`` to ``to_currency``.
+
+        Raises:
+            HTTPException: With the status code to report to the client
+        """
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+    async def aclose(self) -> None:
+        """Close pooled connections (called on server shutdown)."""
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker.
+
+    The breaker opens after ``failure_threshold`` consecutive failures.
+    While open, ``allow`` returns False until ``reset_timeout`` seconds have
+    passed. Then a single trial request is let through (half-open). Its
+    outcome closes the breaker or opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        """
+        Args:
+            failure_threshold (int): Consecutive failures that open the breaker
+            reset_timeout (float): Seconds to wait before a trial request
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._trial or time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Return True if a request may be sent now."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial:
+            self._trial = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._trial = False
+
+    def release(self) -> None:
+        """Give back a trial slot whose request was cancelled."""
+        self._trial = False
+
+
+class ProviderError(Exception):
+    """A provider request that failed."""
+
+    def __init__(self, status_code: int, detail: str, counts_as_failure: bool = True):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.counts_as_failure = counts_as_failure
+
+
+class Provider:
+    """
+    One upstream rate API.
+
+    Two URL styles are understood:
+
+    - A URL ending in ``/`` gets the base currency appended, e.g.
+      ``https://api.exchangerate-api.com/v4/latest/EUR``
+    - Any other URL is queried with ``base`` and ``symbols`` parameters,
+      as used by fixer.io and frankfurter.app
+
+    Both answer with a JSON object containing a ``rates`` mapping.
+    """
+
+    def __init__(self, url: str, name: Optional[str] = None, timeout: float = 15.0,
+                 window: int = 100, min_samples: int = 20, default_hedge_delay: float = 1.0,
+                 breaker: Optional[CircuitBreaker] = None):
+        """
+        Args:
+            url (str): Endpoint URL
+            name (str): Label for logs and metrics (default: the host name)
+            timeout (float): Request timeout in seconds
+            window (int): Number of recent latencies kept for the p95
+            min_samples (int): Latencies needed before the p95 is trusted
+            default_hedge_delay (float): Hedge delay until then, in seconds
+            breaker (CircuitBreaker): Circuit breaker (default: a new one)
+        """
+        self.url = url
+        self.name = name or urlparse(url).hostname or url
+        self.timeout = timeout
+        self.min_samples = min_samples
+        self.default_hedge_delay = default_hedge_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+
+    def request_args(self, from_currency: str, to_currency: str) -> dict:
+        if self.url.endswith("/"):
+            return {"url": f"{self.url}{from_currency}"}
+        return {"url": self.url, "params": {"base": from_currency, "symbols": to_currency}}
+
+    def hedge_delay(self) -> float:
+        """Seconds after which a request to this provider counts as slow."""
+        if len(self.latencies) < self.min_samples:
+            return min(self.default_hedge_delay, self.timeout)
+        return percentile(list(self.latencies), 0.95)
+
+    def stats(self) -> dict:
+        latencies = list(self.latencies)
+        return {
+            "state": self.breaker.state,
+            "requests": self.requests,
+            "errors": self.errors,
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        }
+
+
+class ProviderChain(RateProvider):
+    """Fetches rates from the first healthy provider, with hedging and failover."""
+
+    def __init__(self, providers: List[Provider], metrics=None, transport=None, name: str = "chain"):
+        """
+        Args:
+            providers (list): Providers in order of preference
+            metrics: Optional ``ApiMetrics`` for upstream latency and errors
+            transport: Optional httpx transport (used by tests)
+            name (str): Name of the chain
+        """
+        self.name = name
+        self.providers = providers
+        self.metrics = metrics
+        self.transport = transport
+        self.clients = ClientPool()
+        self.hedges = 0
+        self.failovers = 0
+
+    async def fetch_rate(self, from_currency: str, to_currency: str) -> float:
+        """
+        Return the exchange rate from ``from_currency`` to ``to_currency``.
+
+        Raises:
+            HTTPException: 400/404 if the currency is rejected, 504 if every
+                           attempt timed out, 503 if no provider could answer
+        """
+        queue = [p for p in self.providers if p.breaker.state != "open"]
+        tasks: Dict["asyncio.Task", Provider] = {}
+        trials = set()
+        errors: List[ProviderError] = []
+
+        def launch() -> Optional["asyncio.Task"]:
+            while queue:
+                provider = queue.pop(0)
+                trial = provider.breaker.state == "half_open"
+                if not provider.breaker.allow():
+                    continue
+                task = asyncio.ensure_future(self._request(provider, from_currency, to_currency))
+                tasks[task] = provider
+                if trial:
+                    trials.add(task)
+                return task
+            return None
+
+        latest = launch()
+        if latest is None:
+            raise HTTPException(status_code=503, detail="All upstream providers are unavailable (circuit open)")
+        pending = {latest}
+        try:
+            while pending:
+                timeout = tasks[latest].hedge_delay() if queue else None
+                done, pending = await asyncio.wait(pending, timeout=timeout,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedge = launch()
+                    if hedge is not None:
+                        self.hedges += 1
+                        logging.info(f"{tasks[latest].name} slower than {timeout:.3f}s, "
+                                     f"hedging to {tasks[hedge].name}")
+                        latest = hedge
+                        pending.add(hedge)
+                    continue
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        return task.result()
+                    errors.append(error)
+                if not pending:
+                    failover = launch()
+                    if failover is not None:
+                        self.failovers += 1
+                        latest = failover
+                        pending.add(failover)
+        finally:
+            for task, provider in tasks.items():
+                if not task.done():
+                    task.cancel()
+                    if task in trials:
+                        provider.breaker.release()
+
+        raise self._final_error(errors)
+
+    async def _request(self, provider: Provider, from_currency: str, to_currency: str) -> float:
+        provider.requests += 1
+        started = time.perf_counter()
+        try:
+            rate = await self._fetch(provider, from_currency, to_currency)
+        except asyncio.CancelledError:
+            # Lost to a hedge or failover: the request took at least this long,
+            # and leaving it out would bias the p95 (and the hedge delay) low
+            provider.latencies.append(time.perf_counter() - started)
+            raise
+        except Exception as e:
+            if not isinstance(e, ProviderError):
+                # e.g. a JSON answer of the wrong shape: a failed request like any other
+                if self.metrics is not None:
+                    self.metrics.upstream_errors.inc(provider=provider.name, reason="invalid_response")
+                e = ProviderError(502, f"External API returned an unexpected response: {type(e).__name__}: {e}")
+            provider.errors += 1
+            if e.counts_as_failure:
+                provider.breaker.record_failure()
+            else:
+                provider.breaker.record_success()
+            logging.error(f"{provider.name}: {e.detail}")
+            raise e
+        provider.breaker.record_success()
+        provider.latencies.append(time.perf_counter() - started)
+        return rate
+
+    async def _fetch(self, provider: Provider, from_currency: str, to_currency: str) -> float:
+        reason = None
+        try:
+            tracked = self.metrics.upstream(provider.name) if self.metrics is not None else nullcontext()
+            client = self.clients.get(provider.name, self.transport)
+            with tracked:
+                response = await client.get(timeout=provider.timeout,
+                                            **provider.request_args(from_currency, to_currency))
+        except httpx.TimeoutException as e:
+            raise ProviderError(504, f"Request timeout: {str(e)}")
+        except httpx.RequestError as e:
+            raise ProviderError(503, f"Network error: {str(e)}")
+
+        try:
+            if response.status_code != 200:
+                reason = f"http_{response.status_code}"
+                # 4xx means the request was rejected, not that the provider is down
+                rejected = 400 <= response.status_code < 500 and response.status_code != 429
+                raise ProviderError(response.status_code,
+                                    f"External API returned status {response.status_code}: {response.text}",
+                                    counts_as_failure=not rejected)
+            try:
+                data = response.json()
+            except ValueError:
+                reason = "invalid_json"
+                raise ProviderError(502, "External API returned invalid JSON")
+            if data.get("success") is False:
+                reason = "api_error"
+                raise ProviderError(502, f"External API error: {data.get('error')}")
+            rates = data.get("rates") or {}
+            if to_currency not in rates:
+                available_currencies = list(rates.keys())[:10]  # Show first 10
+                raise ProviderError(400, f"Currency {to_currency} not supported. Available: {available_currencies}...",
+                                    counts_as_failure=False)
+            return rates[to_currency]
+        finally:
+            if reason is not None and self.metrics is not None:
+                self.metrics.upstream_errors.inc(provider=provider.name, reason=reason)
+
+    @staticmethod
+    def _final_error(errors: List[ProviderError]) -> HTTPException:
+        rejected = [e for e in errors if not e.counts_as_failure]
+        if rejected:
+            return HTTPException(status_code=rejected[0].status_code, detail=rejected[0].detail)
+        if errors and all(e.status_code == 504 for e in errors):
+            return HTTPException(status_code=504, detail=errors[-1].detail)
+        detail = "; ".join(e.detail for e in errors) or "No upstream provider answered"
+        return HTTPException(status_code=503, detail=detail)
+
+    def stats(self) -> dict:
+        return {
+            "hedges": self.hedges,
+            "failovers": self.failovers,
+            "providers": {p.name: p.stats() for p in self.providers},
+        }
+
+    async def aclose(self) -> None:
+        await self.clients.aclose()
+
+
+class ExchangeRateHostProvider(RateProvider):
+    """exchangerate.host ``/convert`` endpoint, which requires an access key."""
+
+    def __init__(self, url: str, api_key: Optional[str], name: str = "exchangerate.host",
+                 metrics=None, transport=None):
+        """
+        Args:
+            url (str): URL of the convert endpoint
+            api_key (str): Access key
+            name (str): Label for logs and metrics
+            metrics: Optional ``ApiMetrics`` for upstream latency and errors
+            transport: Optional httpx transport (e.g. the in-process mock)
+        """
+        self.url = url
+        self.api_key = api_key
+        self.name = name
+        self.metrics = metrics
+        self.transport = transport
+        self.clients = ClientPool()
+        self.requests = 0
+
+    async def fetch_conversion(self, from_currency: str, to_currency: str, amount: float) -> dict:
+        """Convert ``amount`` upstream and return a conversion result dict."""
+        params = {
+            "access_key": self.api_key,
+            "from": from_currency.upper(),
+            "to": to_currency.upper(),
+            "amount": amount
+        }
+
+        self.requests += 1
+        tracked = self.metrics.upstream(self.name) if self.metrics is not None else nullcontext()
+        client = self.clients.get(self.name, self.transport)
+        with tracked:
+            response = await client.get(self.url, params=params)
+
+        logging.info("API response: %s", response.text)
+
+        if response.status_code != 200:
+            self._error(f"http_{response.status_code}")
+            raise HTTPException(status_code=response.status_code,
+                                detail=f"API-Anfrage fehlgeschlagen: {response.status_code}")
+
+        data = response.json()
+        if not data.get("success", False):
+            self._error("api_error")
+            err = data.get("error", {})
+            raise HTTPException(status_code=400, detail=f"API-Fehler: {err}")
+
+        # Extract rate safely
+        rate = None
+        if "info" in data and isinstance(data["info"], dict):
+            rate = data["info"].get("rate")
+            if rate is None:
+                rate = data["info"].get("quote")
+        elif "rate" in data:
+            rate = data.get("rate")
+
+        return {
+            "from": from_currency.upper(),
+            "to": to_currency.upper(),
+            "amount": amount,
+            "result": data.get("result"),
+            "info": {
+                "rate": rate
+            }
+        }
+
+    async def fetch_rate(self, from_currency: str, to_currency: str) -> float:
+        rate = (await self.fetch_conversion(from_currency, to_currency, 1.0))["info"]["rate"]
+        if rate is None:
+            self._error("no_rate")
+            raise HTTPException(status_code=502, detail="Antwort enthält keinen Kurs")
+        return rate
+
+    def _error(self, reason: str) -> None:
+        if self.metrics is not None:
+            self.metrics.upstream_errors.inc(provider=self.name, reason=reason)
+
+    def stats(self) -> dict:
+        return {"requests": self.requests}
+
+    async def aclose(self) -> None:
+        await self.clients.aclose()
@@ -0,0 +1,100 @@
+"""
+Benchmark commands for Corally (``corally bench ...``).
+"""
+
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="corally bench", description="Benchmarks for the Corally suite.")
+    sub = parser.add_subparsers(dest="target", required=True)
+
+    api = sub.add_parser("api", help="Load-test the API servers")
+    api.add_argument("--server", choices=["free", "paid", "both"], default="free")
+    api.add_argument("--transport", choices=["asgi", "socket"], default="asgi",
+                     help="in-process ASGI transport or a local uvicorn socket")
+    api.add_argument("-n", "--requests", type=int, default=2000)
+    api.add_argument("-c", "--concurrency", type=int, default=32)
+    api.add_argument("--mix", default="convert=0.9,batch=0.05,health=0.05",
+                     help="request mix, e.g. convert=0.8,batch=0.2")
+    api.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent for pairs and amounts (0 = uniform)")
+    api.add_argument("--pairs", type=int, default=None, help="number of distinct currency pairs")
+    api.add_argument("--amounts", type=int, default=200, help="number of distinct amounts")
+    api.add_argument("--batch-size", type=int, default=20)
+    api.add_argument("--upstream", default=None,
+                     help="base URL of a running upstream (default: in-process mock)")
+    api.add_argument("--upstream-latency", default="const:0", help="latency of the in-process mock")
+    api.add_argument("--upstream-error-rate", type=float, default=0.0)
+    api.add_argument("--seed", type=int, default=0)
+    api.add_argument("-o", "--output", default=None, help="write the JSON report to a file")
+
+    sub.add_parser("json", help="Compare the JSON response paths")
+
+    imports = sub.add_parser("imports", help="Check the import time of the CLI entry points")
+    imports.add_argument("--budget", type=float, default=None, help="budget per entry point in ms")
+    imports.add_argument("--repeat", type=int, default=5, help="fresh interpreters per entry point")
+    imports.add_argument("-o", "--output", default=None, help="write the JSON report to a file")
+
+    gui = sub.add_parser("gui", help="Check the GUI cold start to first paint (needs a display)")
+    gui.add_argument("--budget", type=float, default=None, help="budget in ms")
+    gui.add_argument("--repeat", type=int, default=3, help="GUI starts to measure")
+    gui.add_argument("-o", "--output", default=None, help="write the JSON report to a file")
+    return parser
+
+
+def bench_cli(argv: Optional[List[str]] = None) -> None:
+    """Run a benchmark and print its JSON report."""
+    args = build_parser().parse_args(argv)
+
+    if args.target == "json":
+        from ..api.serialization import benchmark
+        report = benchmark()
+    elif args.target == "imports":
+        from .importtime import BUDGET_MS, check_imports
+        report = check_imports(budget_ms=args.budget or BUDGET_MS, repeat=args.repeat)
+    elif args.target == "gui":
+        from ..gui.startup import BUDGET_MS, measure_startup
+        try:
+            report = measure_startup(budget_ms=args.budget or BUDGET_MS, repeat=args.repeat)
+        except RuntimeError as e:
+            sys.exit(f"❌ {e}")
+    else:
+        from ..api.bench import parse_mix, run_benchmark
+        try:
+            mix = parse_mix(args.mix)
+        except ValueError as e:
+            sys.exit(f"❌ {e}")
+        servers = ["free", "paid"] if args.server == "both" else [args.server]
+        reports = {}
+        for server in servers:
+            reports[server] = run_benchmark(
+                server=server,
+                transport=args.transport,
+                requests=args.requests,
+                concurrency=args.concurrency,
+                mix=mix,
+                pairs=args.pairs,
+                amounts=args.amounts,
+                zipf=args.zipf,
+                batch_size=args.batch_size,
+                upstream=args.upstream,
+                upstream_latency=args.upstream_latency,
+                upstream_error_rate=args.upstream_error_rate,
+                seed=args.seed,
+            )
+        report = reports[servers[0]] if len(servers) == 1 else reports
+
+    text = json.dumps(report, indent=2)
+    if getattr(args, "output", None):
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    if report.get("ok") is False:
+        sys.exit(1)  # over the budget
+
+
+if __name__ == "__main__":
+    bench_cli()
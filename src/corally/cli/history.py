@@ -0,0 +1,76 @@
+"""
+Browse the calculation log from the shell (``corally history ...``).
+"""
+
+import argparse
+import csv
+import os
+import sys
+from typing import List, Optional
+
+from ..core.history import SORT_KEYS, CalcLog, LogRow
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="corally history",
+        description="Browse the calculation log (and rotated segments) page by page.")
+    parser.add_argument("--file", help="log file (default: data/rechner_log.csv)")
+    parser.add_argument("--operator", "--op", help="only this operator: + - * / (or add, sub, mul, div)")
+    parser.add_argument("--since", help="only rows at or after this time, e.g. 2024-05-01 or '2024-05-01 12:00'")
+    parser.add_argument("--until", help="only rows up to this time; a date includes the whole day")
+    parser.add_argument("--sort", choices=SORT_KEYS, default="time")
+    parser.add_argument("--desc", action="store_true", help="newest / largest first")
+    paging = parser.add_mutually_exclusive_group()
+    paging.add_argument("--page", type=int, default=1, help="page to show, starting at 1 (default: 1)")
+    paging.add_argument("--all", action="store_true", help="print every matching row")
+    paging.add_argument("--count", action="store_true", help="only print the number of matching rows")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--format", choices=["table", "csv"], default="table")
+    return parser
+
+
+def _print_rows(rows, output_format: str) -> None:
+    if output_format == "csv":
+        writer = csv.writer(sys.stdout, lineterminator="\n")
+        writer.writerow(LogRow._fields)
+        writer.writerows(rows)
+        return
+    for row in rows:
+        print(f"{row.timestamp:<19}  {row.a:>14} {row.operator} {row.b:<14} = {row.result}")
+
+
+def history_cli(argv: Optional[List[str]] = None) -> None:
+    """Print one page (or all) of the calculation log, filtered and sorted."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.page < 1 or args.page_size < 1:
+        parser.error("--page and --page-size must be at least 1")
+
+    log = CalcLog(args.file, page_size=args.page_size)
+    log.refresh()
+    try:
+        query = log.query(operator=args.operator, since=args.since, until=args.until,
+                          sort=args.sort, descending=args.desc)
+    except ValueError as e:
+        parser.error(str(e))
+
+    try:
+        if args.count:
+            print(query.count())
+        elif args.all:
+            _print_rows(query, args.format)
+        else:
+            try:
+                rows = query.page(args.page - 1)
+            except IndexError:
+                sys.exit(f"❌ Page {args.page} is past the last matching row")
+            _print_rows(rows, args.format)
+            if args.format == "table":
+                total = query.count_known
+                of = f" of {-(-total // args.page_size)}" if total is not None else ""
+                print(f"-- page {args.page}{of} ({len(rows)} rows, {log.rows} in log)", file=sys.stderr)
+        sys.stdout.flush()
+    except BrokenPipeError:  # e.g. piped into head
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
@@ -0,0 +1,107 @@
+"""
+Import-time budget for the command-line entry points.
+
+Each entry point module is imported in a fresh interpreter with
+``python -X importtime``. Modules the interpreter loads on its own are
+subtracted, so the figure is the cost of the Corally import alone. An
+entry point fails its budget if it is too slow or pulls in one of the
+heavy subsystems (tkinter, FastAPI, httpx, ...), which must only be
+imported when the user picks the GUI or a server.
+
+Run it with ``corally bench imports``.
+"""
+
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional, Set, Tuple
+
+# Console script -> module it imports
+ENTRY_POINTS = {
+    "corally": "corally.cli.main",
+    "corally-calc": "corally.cli.calculator",
+    "corally-currency": "corally.cli.currency",
+}
+BUDGET_MS = 50.0
+HEAVY_MODULES = ("tkinter", "fastapi", "starlette", "httpx", "uvicorn", "dotenv", "requests")
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """
+    Parse ``-X importtime`` output.
+
+    Returns:
+        list: (module, depth, cumulative microseconds) per imported module
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative_us, name = line.split("|", 2)
+        if not cumulative_us.strip().isdigit():
+            continue  # header line
+        # One space after the bar, then two more per nesting level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), depth, int(cumulative_us)))
+    return imports
+
+
+def _run(code: str) -> str:
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, check=True)
+    return result.stderr
+
+
+def _startup_modules() -> Set[str]:
+    return {name for name, _, _ in parse_importtime(_run("pass"))}
+
+
+def measure(module: str, baseline: Optional[Set[str]] = None) -> Tuple[float, List[str]]:
+    """
+    Import a module in a fresh interpreter.
+
+    Returns:
+        tuple: (milliseconds spent in imports beyond interpreter startup,
+                top-level packages imported beyond interpreter startup)
+    """
+    baseline = _startup_modules() if baseline is None else baseline
+    imports = [(name, depth, us) for name, depth, us in parse_importtime(_run(f"import {module}"))
+               if name not in baseline]
+    # Nested imports are already part of their parent's cumulative time
+    total_us = sum(us for _, depth, us in imports if depth == 0)
+    packages = sorted({name.split(".")[0] for name, _, _ in imports})
+    return total_us / 1000, packages
+
+
+def check_imports(entry_points: Optional[Dict[str, str]] = None, budget_ms: float = BUDGET_MS,
+                  repeat: int = 5) -> dict:
+    """
+    Measure the import time of the entry points against a budget.
+
+    Args:
+        entry_points (dict): Console script -> module (default: ``ENTRY_POINTS``)
+        budget_ms (float): Maximum median import time per entry point
+        repeat (int): Fresh interpreters per entry point
+
+    Returns:
+        dict: Per entry point the median and minimum time, heavy modules
+              that were imported and whether it is within the budget
+    """
+    baseline = _startup_modules()
+    report = {"budget_ms": budget_ms, "entry_points": {}}
+    for script, module in (entry_points or ENTRY_POINTS).items():
+        times, heavy = [], set()
+        for _ in range(repeat):
+            ms, packages = measure(module, baseline)
+            times.append(ms)
+            heavy.update(p for p in packages if p in HEAVY_MODULES)
+        median = statistics.median(times)
+        report["entry_points"][script] = {
+            "module": module,
+            "median_ms": round(median, 2),
+            "min_ms": round(min(times), 2),
+            "heavy_modules": sorted(heavy),
+            "ok": median <= budget_ms and not heavy,
+        }
+    report["ok"] = all(entry["ok"] for entry in report["entry_points"].values())
+    return report
@@ -3,16 +3,34 @@ Main CLI entry point for Corally calculator suite.
 """
 
 import sys
-from typing import Optional
+from typing import List, Optional
 
 from ..core import CalculatorCore, CurrencyConverter, InterestCalculator
-from ..gui.launcher import launch_gui
-from ..api.server import start_server
-from ..api.free_server import start_free_server
 
+# The GUI (tkinter) and the API servers (FastAPI, httpx) are imported only
+# when their menu option is chosen, so the text menu starts quickly.
 
-def main_cli() -> None:
+
+def main_cli(argv: Optional[List[str]] = None) -> None:
     """Main CLI interface for Corally calculator suite."""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "bench":
+        from .bench import bench_cli
+        bench_cli(argv[1:])
+        return
+    if argv and argv[0] == "server":
+        from .server import server_cli
+        server_cli(argv[1:])
+        return
+    if argv and argv[0] in ("calc", "convert", "interest"):
+        from .pipeline import pipeline_cli
+        pipeline_cli(argv)
+        return
+    if argv and argv[0] == "history":
+        from .history import history_cli
+        history_cli(argv[1:])
+        return
+
     print("🧮 Corally Calculator Suite")
     print("=" * 40)
     
@@ -43,12 +61,15 @@ def main_cli() -> None:
             interest_cli()
         elif choice == 4:
             print("🚀 Launching GUI...")
+            from ..gui.launcher import launch_gui
             launch_gui()
         elif choice == 5:
             print("🌐 Starting Free API Server...")
+            from ..api.free_server import start_free_server
             start_free_server()
         elif choice == 6:
             print("🌐 Starting Paid API Server...")
+            from ..api.server import start_server
             start_server()
         else:
             print("❌ Invalid choice. Please select 1-7.")
@@ -0,0 +1,144 @@
+"""
+Non-interactive calculator commands for scripts and pipes.
+
+``corally calc``, ``corally convert`` and ``corally interest`` take one
+calculation from their arguments, or read records from stdin or files and
+stream the results to stdout as CSV or NDJSON::
+
+    corally calc add 1 2
+    paste -d, a.txt b.txt | corally calc mul --no-log > products.csv
+    corally convert --from EUR --to USD -i amounts.csv --header -f ndjson
+    corally interest 1000 5 01.01.2024 31.12.2024 --method act/360
+
+Records are processed in chunks through the batch processors of
+``corally.core.batch``, so there is no prompt or print per line.
+"""
+
+import argparse
+import io
+import os
+import sys
+from typing import List, Optional
+
+from ..core.batch import (BatchProgress, calc_processor, currency_processor, interest_processor,
+                          stream_records)
+from ..core.calculator import CalculatorCore, CurrencyConverter, InterestCalculator
+from ..core.history import OPERATORS
+
+# Operation spelling (add, +, mul, ×, ...) -> CalculatorCore operation name
+OPERATIONS = {alias: name for alias, symbol in OPERATORS.items()
+              for name, (op_symbol, _) in CalculatorCore.OPERATIONS.items() if symbol == op_symbol}
+
+
+def _add_stream_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("-i", "--input", action="append", metavar="FILE",
+                        help="read records from FILE ('-' for stdin; repeatable). Default: stdin")
+    parser.add_argument("--header", action="store_true", help="the first line of each input holds column names")
+    parser.add_argument("-d", "--delimiter", help="field delimiter (default: ',' or detected from the header)")
+    parser.add_argument("-f", "--format", choices=["csv", "ndjson"],
+                        help="output format (default: csv; a single calculation prints just the result)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="corally", description="Calculate from arguments, stdin or files.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    calc = sub.add_parser("calc", help="Basic arithmetic", description=(
+        "Apply an operation to two numbers, or to the a,b records read from the input."))
+    calc.add_argument("operation", metavar="OPERATION", help="add, sub, mul, div (or + - * /)")
+    calc.add_argument("operands", nargs="*", metavar="NUMBER", help="two numbers; none: read records")
+    calc.add_argument("--no-log", action="store_true", help="do not append to data/rechner_log.csv")
+    _add_stream_options(calc)
+
+    convert = sub.add_parser("convert", help="Currency conversion (static rates)", description=(
+        "Convert amounts given as arguments, or the first (or 'amount') column of the input."))
+    convert.add_argument("amounts", nargs="*", metavar="AMOUNT", help="amounts; none: read records")
+    convert.add_argument("--from", dest="from_currency", required=True, metavar="CUR")
+    convert.add_argument("--to", dest="to_currency", required=True, metavar="CUR")
+    _add_stream_options(convert)
+
+    interest = sub.add_parser("interest", help="Interest calculation", description=(
+        "Calculate interest from arguments, or from capital,rate,start,end[,method] records."))
+    interest.add_argument("values", nargs="*", metavar="VALUE",
+                          help="CAPITAL RATE START END (dates DD.MM.YYYY); none: read records")
+    interest.add_argument("--method", choices=InterestCalculator.VALID_METHODS, default="act/365")
+    _add_stream_options(interest)
+    return parser
+
+
+def _processor(args, parser: argparse.ArgumentParser):
+    """(processor, column names of headerless input, operands) for the parsed command."""
+    if args.command == "calc":
+        operation = OPERATIONS.get(args.operation.strip().lower())
+        if operation is None:
+            parser.error(f"unknown operation '{args.operation}' (use add, sub, mul or div)")
+        if len(args.operands) not in (0, 2):
+            parser.error("calc takes two numbers, or none to read records")
+        log_file = None if args.no_log else CalculatorCore().csv_file
+        return calc_processor(operation, log_file), ["a", "b"], [args.operands] if args.operands else []
+    if args.command == "convert":
+        conversion = f"{args.from_currency}_to_{args.to_currency}".lower()
+        if conversion not in CurrencyConverter.CONVERSIONS:
+            pairs = ", ".join(name.replace("_to_", "->").upper() for name in CurrencyConverter.CONVERSIONS)
+            parser.error(f"unsupported conversion {args.from_currency}->{args.to_currency} (supported: {pairs})")
+        return currency_processor(conversion), ["amount"], [[amount] for amount in args.amounts]
+    if len(args.values) not in (0, 4):
+        parser.error("interest takes CAPITAL RATE START END, or nothing to read records")
+    fields = ["capital", "rate", "start", "end", "method"]
+    return interest_processor(args.method), fields, [args.values] if args.values else []
+
+
+def _print_results(process, records: List[List[str]]) -> None:
+    """Single calculations from arguments: one bare result per line."""
+    failed = False
+    for result in process(records):
+        if result[-1]:
+            print(f"❌ {result[-1]}", file=sys.stderr)
+            failed = True
+        else:
+            print(*result[:-1], sep=",")
+    if failed:
+        sys.exit(1)
+
+
+def pipeline_cli(argv: Optional[List[str]] = None) -> None:
+    """Run ``calc``, ``convert`` or ``interest`` on arguments or streamed records."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    processor, fields, records = _processor(args, parser)
+    if records and args.input:
+        parser.error("give the values as arguments or --input, not both")
+
+    try:
+        if records and args.input is None and args.format is None:
+            _print_results(processor([])[1], records)
+            return
+        if records:
+            lines = io.StringIO()
+            delimiter = args.delimiter or ","
+            for record in records:
+                lines.write(delimiter.join(record) + "\n")
+            sources = [io.BytesIO(lines.getvalue().encode("utf-8"))]
+            header = False
+        else:
+            sources = args.input or ["-"]
+            header = args.header
+
+        progress = BatchProgress()
+        for number, source in enumerate(sources):
+            if isinstance(source, str):
+                try:
+                    source = sys.stdin.buffer if source == "-" else open(source, "rb")
+                except OSError as e:
+                    sys.exit(f"❌ {e}")
+            with source:
+                stream_records(source, sys.stdout, processor, fields=fields, header=header,
+                               write_header=number == 0, delimiter=args.delimiter,
+                               output_format=args.format or "csv", progress=progress)
+    except BrokenPipeError:  # e.g. piped into head
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+    if progress.errors:
+        print(f"⚠️  {progress.errors} of {progress.rows} records invalid (see the error column)",
+              file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,64 @@
+"""
+API server commands for Corally (``corally server ...``).
+"""
+
+import argparse
+import sys
+from typing import List, Optional
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="corally server", description="Manage the Corally API servers.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (("start", "Start a server in the background"),
+                            ("run", "Run a server in the foreground")):
+        command = sub.add_parser(name, help=help_text)
+        command.add_argument("--app", choices=["free", "paid"], default="free")
+        command.add_argument("--host", default="127.0.0.1")
+        command.add_argument("--port", type=int, default=8000)
+
+    stop = sub.add_parser("stop", help="Stop a registered server")
+    target = stop.add_mutually_exclusive_group()
+    target.add_argument("--port", type=int, default=8000)
+    target.add_argument("--all", action="store_true", help="stop every registered server")
+
+    sub.add_parser("status", help="List the registered servers")
+    return parser
+
+
+def server_cli(argv: Optional[List[str]] = None) -> None:
+    """Start, stop or list API servers through the lifecycle manager."""
+    args = build_parser().parse_args(argv)
+    from ..api import lifecycle
+
+    if args.command == "run":
+        lifecycle.serve(args.app, args.host, args.port)
+    elif args.command == "start":
+        try:
+            record = lifecycle.start_server(args.app, args.host, args.port)
+        except (RuntimeError, OSError) as e:
+            sys.exit(f"❌ {e}")
+        print(f"✅ {record['app']} API server running on http://{record['host']}:{record['port']} "
+              f"(PID {record['pid']})")
+    elif args.command == "stop":
+        results = lifecycle.stop_all() if args.all else {args.port: lifecycle.stop_server(args.port)}
+        if not results:
+            print("ℹ️  No registered servers")
+        for port, stopped in results.items():
+            print(f"✅ Stopped server on port {port}" if stopped else f"❌ Could not stop server on port {port}")
+        if not all(results.values()):
+            sys.exit(1)
+    else:
+        servers = lifecycle.list_servers()
+        if not servers:
+            print("ℹ️  No registered servers")
+        for record in servers:
+            state = "ready" if record["ready"] else "not responding"
+            kind = "embedded" if record.get("embedded") else "process"
+            print(f"• {record['app']} on http://{record['host']}:{record['port']} "
+                  f"(PID {record['pid']}, {kind}, {state})")
+
+
+if __name__ == "__main__":
+    server_cli()
@@ -3,5 +3,6 @@ Core calculation modules for Corally calculator suite.
 """
 
 from .calculator import CalculatorCore, CurrencyConverter, InterestCalculator
+from .history import CalcLog, LogQuery, LogRow
 
-__all__ = ["CalculatorCore", "CurrencyConverter", "InterestCalculator"]
+__all__ = ["CalculatorCore", "CurrencyConverter", "InterestCalculator", "CalcLog", "LogQuery", "LogRow"]
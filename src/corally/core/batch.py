@@ -0,0 +1,304 @@
+"""
+Streaming batch conversion of CSV files.
+
+A file of amounts (currency) or loans (interest) is read in chunks of
+``CHUNK_ROWS`` lines and each chunk goes through one call of the chunk
+paths ``CurrencyConverter.convert_many`` / ``InterestCalculator.calculate_many``.
+Every result chunk is appended to the output straight away, so memory use
+depends on the chunk size and not on the file size. The output keeps the
+input columns and appends the results and an ``error`` column.
+
+Progress (rows, bytes, rows per second, ETA) is published on a
+``BatchProgress`` that another thread may read at any time. A set
+``cancel`` event stops the run after the current chunk. The partial output
+is then removed, because the result is written to ``<output>.part`` and
+only renamed once the whole file is done.
+
+``stream_records`` runs the same processors over a pipe (``corally calc``,
+``convert``, ``interest``). It writes each result chunk to the output
+as CSV or NDJSON with one write call.
+"""
+
+import csv
+import io
+import json
+import os
+import threading
+import time
+from itertools import islice
+from typing import BinaryIO, Callable, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+from .calculator import CalculatorCore, CurrencyConverter, InterestCalculator
+
+CHUNK_ROWS = 10_000
+
+# (result column names, chunk function returning the result columns of each row),
+# built from the input header
+Processor = Tuple[List[str], Callable[[List[List[str]]], List[List[object]]]]
+
+
+class BatchProgress:
+    """Progress of a batch run, updated by the worker and read by the GUI."""
+
+    def __init__(self, total_bytes: int = 0):
+        self.total_bytes = total_bytes
+        self.bytes_done = 0
+        self.rows = 0
+        self.errors = 0
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self.cancelled = False
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def fraction(self) -> float:
+        if not self.total_bytes:
+            return 1.0 if self.finished else 0.0
+        return min(1.0, self.bytes_done / self.total_bytes)
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Seconds left, estimated from the bytes processed so far."""
+        if self.finished:
+            return 0.0
+        if not self.bytes_done:
+            return None
+        rate = self.bytes_done / self.elapsed
+        return (self.total_bytes - self.bytes_done) / rate if rate > 0 else None
+
+
+def _column(header: Sequence[str], name: str, default: int) -> int:
+    names = [field.strip().lower() for field in header]
+    return names.index(name) if name in names else default
+
+
+def calc_processor(operation: str, log_file: Optional[str] = None) -> Callable[[List[str]], Processor]:
+    """
+    Processor applying one operation to the ``a`` and ``b`` (default: first two) columns.
+
+    Args:
+        operation: 'add', 'subtract', 'multiply' or 'divide'
+        log_file: Log the calculations to this CSV file, one write per chunk
+
+    Raises:
+        ValueError: If the operation is unknown
+    """
+    if operation not in CalculatorCore.OPERATIONS:
+        raise ValueError(f"Unknown operation. Allowed: {', '.join(CalculatorCore.OPERATIONS)}")
+
+    def build(header: List[str]) -> Processor:
+        columns = (_column(header, "a", 0), _column(header, "b", 1))
+
+        def process(rows: List[List[str]]) -> List[List[object]]:
+            if columns == (0, 1):
+                pairs = rows  # short rows are reported as invalid by calculate_many
+            else:
+                pairs = [[row[i] if i < len(row) else "" for i in columns] for row in rows]
+            results = CalculatorCore.calculate_many(pairs, operation, log_file)
+            return [["", result] if isinstance(result, str) else [result, ""] for result in results]
+
+        return ["result", "error"], process
+
+    return build
+
+
+def currency_processor(conversion: str, column: str = "amount") -> Callable[[List[str]], Processor]:
+    """
+    Processor converting the ``column`` (default: first) column with a static rate.
+
+    Raises:
+        ValueError: If the conversion is unknown
+    """
+    if conversion not in CurrencyConverter.CONVERSIONS:
+        raise ValueError(f"Unknown conversion. Allowed: {', '.join(CurrencyConverter.CONVERSIONS)}")
+    target = conversion.rsplit("_", 1)[1].upper()
+
+    def build(header: List[str]) -> Processor:
+        index = _column(header, column.lower(), 0)
+
+        def process(rows: List[List[str]]) -> List[List[object]]:
+            amounts = [row[index] if index < len(row) else "" for row in rows]
+            results = CurrencyConverter.convert_many(amounts, conversion)
+            return [[result, ""] if result is not None else ["", f"Invalid amount '{amount}'"]
+                    for amount, result in zip(amounts, results)]
+
+        return [target, "error"], process
+
+    return build
+
+
+def interest_processor(method: str = "act/365") -> Callable[[List[str]], Processor]:
+    """
+    Processor calculating interest from capital, rate, start, end and an optional method column.
+
+    Columns are found by name; without these names the first five columns are used.
+    """
+    if method not in InterestCalculator.VALID_METHODS:
+        raise ValueError(f"Invalid method. Allowed: {', '.join(InterestCalculator.VALID_METHODS)}")
+
+    def build(header: List[str]) -> Processor:
+        columns = [_column(header, name, default)
+                   for default, name in enumerate(("capital", "rate", "start", "end", "method"))]
+
+        def process(rows: List[List[str]]) -> List[List[object]]:
+            picked = [[row[i] if i < len(row) else "" for i in columns] for row in rows]
+            results = InterestCalculator.calculate_many(picked, method)
+            out = []
+            for values, interest in zip(picked, results):
+                if isinstance(interest, str):
+                    out.append(["", "", interest])
+                else:
+                    total = round(float(values[0].replace(",", ".")) + interest, 2)
+                    out.append([interest, total, ""])
+            return out
+
+        return ["interest", "total", "error"], process
+
+    return build
+
+
+def _read_header(source: BinaryIO, delimiter: Optional[str] = None) -> Tuple[List[str], str, int]:
+    """Read the header line; returns (fields, delimiter, bytes read)."""
+    line = source.readline()
+    text = line.decode("utf-8-sig")
+    if delimiter is None:
+        delimiter = ";" if text.count(";") > text.count(",") else ","
+    return next(csv.reader([text], delimiter=delimiter), []), delimiter, len(line)
+
+
+def _read_chunks(source: BinaryIO, delimiter: str, chunk_rows: int) -> Iterator[Tuple[List[List[str]], int]]:
+    """Yield (rows, bytes) per chunk of ``chunk_rows`` lines; blank lines are skipped."""
+    while True:
+        lines = list(islice(source, chunk_rows))
+        if not lines:
+            return
+        text = io.StringIO(b"".join(lines).decode("utf-8"))
+        yield [row for row in csv.reader(text, delimiter=delimiter) if row], sum(len(line) for line in lines)
+
+
+def process_csv(src: str, dst: str, processor: Callable[[List[str]], Processor],
+                chunk_rows: int = CHUNK_ROWS, progress: Optional[BatchProgress] = None,
+                cancel: Optional[threading.Event] = None) -> BatchProgress:
+    """
+    Stream ``src`` through a processor into ``dst``, chunk by chunk.
+
+    The first line is the header. ``;`` is used as delimiter if the header
+    has more of them than commas (spreadsheet exports with decimal commas).
+
+    Args:
+        src (str): Input CSV
+        dst (str): Output CSV, written via ``<dst>.part``
+        processor: ``currency_processor(...)`` or ``interest_processor(...)``
+        chunk_rows (int): Lines per chunk
+        progress (BatchProgress): Updated after every chunk
+        cancel (threading.Event): Stops the run after the current chunk
+
+    Returns:
+        BatchProgress: Final counts; ``cancelled`` is True if stopped early
+    """
+    if progress is None:
+        progress = BatchProgress()
+    progress.total_bytes = os.path.getsize(src)
+    part = dst + ".part"
+    try:
+        with open(src, "rb") as source, open(part, "w", newline="", encoding="utf-8") as out:
+            header, delimiter, progress.bytes_done = _read_header(source)
+            extra, process = processor(header)
+            writer = csv.writer(out, delimiter=delimiter)
+            writer.writerow(header + extra)
+
+            for rows, chunk_bytes in _read_chunks(source, delimiter, chunk_rows):
+                if cancel is not None and cancel.is_set():
+                    break
+                results = process(rows)
+                writer.writerows(row + result for row, result in zip(rows, results))
+                out.flush()
+                progress.errors += sum(1 for result in results if result[-1])
+                progress.rows += len(rows)
+                progress.bytes_done += chunk_bytes
+        if cancel is not None and cancel.is_set():
+            progress.cancelled = True
+            os.remove(part)
+        else:
+            os.replace(part, dst)
+    except BaseException:
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+    finally:
+        progress.finished = time.monotonic()
+    return progress
+
+
+def stream_records(source: BinaryIO, out: TextIO, processor: Callable[[List[str]], Processor],
+                   fields: Sequence[str] = (), header: bool = False, write_header: bool = True,
+                   delimiter: Optional[str] = None, output_format: str = "csv",
+                   chunk_rows: int = CHUNK_ROWS, progress: Optional[BatchProgress] = None) -> BatchProgress:
+    """
+    Stream records from a file or pipe through a processor, chunk by chunk.
+
+    Unlike ``process_csv`` nothing is seeked or renamed, so ``source`` may be
+    stdin. Every chunk of results goes to ``out`` in one write.
+
+    Args:
+        source: Binary input, e.g. ``sys.stdin.buffer``
+        out: Text output, e.g. ``sys.stdout``
+        processor: ``calc_processor(...)``, ``currency_processor(...)`` or ``interest_processor(...)``
+        fields: Names of the input columns if the input has no header (NDJSON keys)
+        header (bool): The first line holds column names
+        write_header (bool): Repeat the header in CSV output (False for follow-up files)
+        delimiter (str): Field delimiter; default: detected from the header, else ","
+        output_format (str): "csv" (input columns + result columns) or "ndjson"
+        chunk_rows (int): Lines per chunk
+        progress (BatchProgress): Counts to add to, e.g. over several inputs
+
+    Returns:
+        BatchProgress: Rows and invalid rows processed
+
+    Raises:
+        ValueError: If the output format is unknown
+    """
+    if output_format not in ("csv", "ndjson"):
+        raise ValueError("Unknown output format. Allowed: csv, ndjson")
+    if progress is None:
+        progress = BatchProgress()
+    names = list(fields)
+    if header:
+        names, delimiter, size = _read_header(source, delimiter)
+        progress.bytes_done += size
+    delimiter = delimiter or ","
+    extra, process = processor(names if header else [])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter, lineterminator="\n")
+    if header and write_header and output_format == "csv":
+        writer.writerow(names + extra)
+
+    for rows, chunk_bytes in _read_chunks(source, delimiter, chunk_rows):
+        results = process(rows)
+        if output_format == "csv":
+            writer.writerows(row + result for row, result in zip(rows, results))
+        else:
+            width = max((len(row) for row in rows), default=0)
+            keys = names + [f"column{i + 1}" for i in range(len(names), width)]
+            dumps = json.dumps
+            buffer.writelines(
+                dumps({**dict(zip(keys, row)), **{key: value if value != "" else None
+                                                  for key, value in zip(extra, result)}}) + "\n"
+                for row, result in zip(rows, results))
+        out.write(buffer.getvalue())
+        buffer.seek(0)
+        buffer.truncate()
+        progress.errors += sum(1 for result in results if result[-1])
+        progress.rows += len(rows)
+        progress.bytes_done += chunk_bytes
+    out.flush()
+    progress.finished = time.monotonic()
+    return progress
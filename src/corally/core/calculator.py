@@ -10,9 +10,11 @@ This module replaces the separate Maxim.py and zinsen.py files.
 """
 
 import csv
+import operator
 import os
+import sys
 from datetime import datetime
-from typing import Optional, Union
+from typing import Dict, Iterable, List, Optional, Sequence, Union
 from pathlib import Path
 
 
@@ -25,6 +27,14 @@ class CalculatorCore:
     - Automatic CSV logging of all operations
     - Robust error handling and input validation
     """
+
+    # Operation name -> (symbol written to the log, function)
+    OPERATIONS = {
+        'add': ('+', operator.add),
+        'subtract': ('-', operator.sub),
+        'multiply': ('*', operator.mul),
+        'divide': ('/', operator.truediv),
+    }
     
     def __init__(self, csv_file: Optional[str] = None):
         """
@@ -173,6 +183,62 @@ class CalculatorCore:
             print(f"Division error: {e}")
             return None
 
+    @classmethod
+    def calculate_many(
+        cls,
+        pairs: Iterable[Sequence[Union[str, int, float]]],
+        operation: str,
+        log_file: Optional[str] = None
+    ) -> List[Union[float, str]]:
+        """
+        Apply one operation to a chunk of number pairs.
+
+        Nothing is printed, and the chunk is logged with a single write, so
+        this is the path for streams of calculations.
+
+        Args:
+            pairs: (a, b) per calculation (numbers or strings, "," as decimal separator allowed)
+            operation: 'add', 'subtract', 'multiply' or 'divide'
+            log_file: Log the successful calculations to this CSV file
+
+        Returns:
+            list: Result per pair, or an error message for invalid pairs
+
+        Raises:
+            ValueError: If the operation is unknown
+        """
+        if operation not in cls.OPERATIONS:
+            raise ValueError(f"Unknown operation. Allowed: {', '.join(cls.OPERATIONS)}")
+        symbol, func = cls.OPERATIONS[operation]
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        results: List[Union[float, str]] = []
+        logged = []
+        for pair in pairs:
+            try:
+                try:
+                    a, b = float(pair[0]), float(pair[1])
+                except ValueError:  # decimal comma
+                    a, b = float(str(pair[0]).replace(",", ".")), float(str(pair[1]).replace(",", "."))
+                result = func(a, b)
+            except ZeroDivisionError:
+                results.append("Division by zero is not allowed")
+                continue
+            except IndexError:
+                results.append("Invalid number input: two numbers required")
+                continue
+            except (TypeError, ValueError) as e:
+                results.append(f"Invalid number input: {e}")
+                continue
+            results.append(result)
+            logged.append([a, symbol, b, result, timestamp])
+        if log_file and logged:
+            try:
+                with open(log_file, mode="a", newline="", encoding="utf-8") as file:
+                    csv.writer(file).writerows(logged)
+            except Exception as e:
+                print(f"Warning: Could not log operations: {e}", file=sys.stderr)
+        return results
+
 
 class CurrencyConverter:
     """
@@ -190,6 +256,16 @@ class CurrencyConverter:
         'EUR_TO_GBP': 0.87,
         'EUR_TO_JPY': 173.84
     }
+
+    # Conversion name -> (rate, multiply); divide for the reverse direction
+    CONVERSIONS = {
+        'eur_to_usd': ('EUR_TO_USD', True),
+        'usd_to_eur': ('EUR_TO_USD', False),
+        'eur_to_gbp': ('EUR_TO_GBP', True),
+        'gbp_to_eur': ('EUR_TO_GBP', False),
+        'eur_to_jpy': ('EUR_TO_JPY', True),
+        'jpy_to_eur': ('EUR_TO_JPY', False),
+    }
     
     @classmethod
     def _validate_amount(cls, amount: Union[str, int, float]) -> float:
@@ -276,6 +352,35 @@ class CurrencyConverter:
             print(f"JPY to EUR conversion error: {e}")
             return None
 
+    @classmethod
+    def convert_many(cls, amounts: Iterable[Union[str, int, float]], conversion: str) -> List[Optional[float]]:
+        """
+        Convert a chunk of amounts with one rate lookup.
+
+        Args:
+            amounts: Amounts to convert (numbers or strings, "," as decimal separator allowed)
+            conversion: Conversion name, e.g. 'eur_to_usd'
+
+        Returns:
+            list: Rounded results; None for amounts that are not numbers
+
+        Raises:
+            ValueError: If the conversion is unknown
+        """
+        if conversion not in cls.CONVERSIONS:
+            raise ValueError(f"Unknown conversion. Allowed: {', '.join(cls.CONVERSIONS)}")
+        rate_key, multiply = cls.CONVERSIONS[conversion]
+        factor = cls.RATES[rate_key] if multiply else 1 / cls.RATES[rate_key]
+        results = []
+        for amount in amounts:
+            try:
+                if isinstance(amount, str):
+                    amount = amount.strip().replace(",", ".")
+                results.append(round(float(amount) * factor, 2))
+            except (TypeError, ValueError):
+                results.append(None)
+        return results
+
 
 class InterestCalculator:
     """
@@ -324,19 +429,8 @@ class InterestCalculator:
             d1 = datetime.strptime(start_date, "%d.%m.%Y")
             d2 = datetime.strptime(end_date, "%d.%m.%Y")
             
-            # Calculate days and year basis
-            if method == "30/360":
-                days = (d2.year - d1.year) * 360 + (d2.month - d1.month) * 30 + (d2.day - d1.day)
-                year_basis = 360
-            else:
-                days = (d2 - d1).days
-                if method == "act/360":
-                    year_basis = 360
-                elif method in ("act/365", "act/act"):
-                    year_basis = 365
-            
             # Calculate interest
-            interest = cap * rate * (days / year_basis)
+            interest = cap * rate * cls._year_fraction(d1, d2, method)
             return round(interest, 2)
             
         except (ValueError, TypeError) as e:
@@ -346,6 +440,53 @@ class InterestCalculator:
             print(f"Unexpected error in interest calculation: {e}")
             return None
 
+    @staticmethod
+    def _year_fraction(d1: datetime, d2: datetime, method: str) -> float:
+        """Fraction of a year between two dates under a day count method."""
+        if method == "30/360":
+            days = (d2.year - d1.year) * 360 + (d2.month - d1.month) * 30 + (d2.day - d1.day)
+            return days / 360
+        days = (d2 - d1).days
+        return days / (360 if method == "act/360" else 365)
+
+    @classmethod
+    def calculate_many(
+        cls,
+        rows: Iterable[Sequence[str]],
+        method: str = "act/365"
+    ) -> List[Union[float, str]]:
+        """
+        Calculate interest for a chunk of rows.
+
+        Dates are parsed once per distinct value, so a chunk sharing a few
+        dates costs little more than the multiplications.
+
+        Args:
+            rows: (capital, interest_rate, start_date, end_date[, method]) per row;
+                  an empty or missing method uses ``method``
+            method: Default calculation method
+
+        Returns:
+            list: Interest per row, or an error message for invalid rows
+        """
+        dates: Dict[str, datetime] = {}
+        results: List[Union[float, str]] = []
+        for row in rows:
+            try:
+                capital, rate, start, end = (str(value).strip() for value in row[:4])
+                row_method = (str(row[4]).strip() if len(row) > 4 else "") or method
+                if row_method not in cls.VALID_METHODS:
+                    raise ValueError(f"Invalid method '{row_method}'")
+                for text in (start, end):
+                    if text not in dates:
+                        dates[text] = datetime.strptime(text, "%d.%m.%Y")
+                cap = float(capital.replace(",", "."))
+                fraction = cls._year_fraction(dates[start], dates[end], row_method)
+                results.append(round(cap * (float(rate.replace(",", ".")) / 100) * fraction, 2))
+            except (TypeError, ValueError) as e:
+                results.append(str(e) or "invalid row")
+        return results
+
 
 # Backward compatibility aliases
 Rechner = CalculatorCore
@@ -0,0 +1,401 @@
+"""
+Paged access to the calculation log (``data/rechner_log.csv``).
+
+The log gains one row per calculation and is never trimmed, so it is not
+read as a whole. Rotated segments next to it (``rechner_log.csv.1``,
+``.2``, ... with higher numbers being older) are read before the live file.
+
+- ``CalcLog`` records the byte offset of every ``page_size``-th row of each
+  segment in a single pass and extends that index when the file grows. A
+  page is read by seeking to its offset, so opening page 90,000 of a log
+  costs the same as opening the first one.
+- ``LogQuery`` filters by operator and time and sorts. A filtered query
+  scans forward only as far as the requested page and remembers where
+  every page of matches starts, reading backwards from the newest row for
+  newest-first pages. Rows are appended in time order, so ``since`` and
+  ``until`` are found by binary search.
+  Sorting by a number column keeps only the rows up to the requested page
+  in a heap.
+"""
+
+import csv
+import heapq
+import os
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+# Accepted operator spellings -> symbol written by CalculatorCore
+OPERATORS = {
+    "+": "+", "add": "+",
+    "-": "-", "sub": "-", "subtract": "-",
+    "*": "*", "x": "*", "×": "*", "mul": "*", "multiply": "*",
+    "/": "/", "÷": "/", "div": "/", "divide": "/",
+}
+SORT_KEYS = ("time", "a", "b", "result")
+
+
+class LogRow(NamedTuple):
+    """One logged calculation, as written by ``CalculatorCore``."""
+
+    a: str
+    operator: str
+    b: str
+    result: str
+    timestamp: str
+
+
+def _is_header(line: bytes) -> bool:
+    first = line.lstrip(b'"')[:1]
+    return not (first.isdigit() or first in (b"-", b"."))
+
+
+class _Segment:
+    """One log file and its sparse row index."""
+
+    def __init__(self, path: str, identity: Tuple[int, int]):
+        self.path = path
+        self.identity = identity
+        self.offsets: List[int] = []  # byte offset of every stride-th row
+        self.rows = 0
+        self.indexed_to = 0  # bytes of the file already indexed
+
+    def refresh(self, size: int, stride: int) -> None:
+        if size < self.indexed_to:  # truncated or rewritten
+            self.offsets, self.rows, self.indexed_to = [], 0, 0
+        if size == self.indexed_to:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self.indexed_to)
+            offset = self.indexed_to
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # partial row, picked up by the next refresh
+                if offset == 0 and _is_header(line):
+                    offset += len(line)
+                    continue
+                if self.rows % stride == 0:
+                    self.offsets.append(offset)
+                self.rows += 1
+                offset += len(line)
+        self.indexed_to = offset
+
+    def lines(self, start: int, stride: int) -> Iterator[str]:
+        """Yield the indexed rows from row ``start`` on, as text lines."""
+        with open(self.path, "rb") as f:
+            f.seek(self.offsets[start // stride])
+            for line in islice(f, start % stride, start % stride + self.rows - start):
+                yield line.decode("utf-8")
+
+
+class CalcLog:
+    """
+    Read-only, paged view of the calculation log and its rotated segments.
+
+    Features:
+    - Sparse byte-offset index per segment (one offset per page), built incrementally
+    - Rows are read by seeking, never by scanning from the start
+    - Rows still being written (no trailing newline) are left out
+    - A rotated segment keeps its index when it is renamed
+    """
+
+    def __init__(self, csv_file: Optional[str] = None, page_size: int = 100):
+        """
+        Args:
+            csv_file (str): Log file; defaults to ``data/rechner_log.csv``
+            page_size (int): Rows per page
+        """
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        self.csv_file = csv_file or str(Path("data") / "rechner_log.csv")
+        self.page_size = page_size
+        self._segments: List[_Segment] = []
+        self._rows = 0
+
+    @property
+    def rows(self) -> int:
+        return self._rows
+
+    @property
+    def pages(self) -> int:
+        return -(-self._rows // self.page_size)
+
+    @property
+    def segments(self) -> List[str]:
+        """Paths of the indexed segments, oldest first."""
+        return [segment.path for segment in self._segments]
+
+    def segment_paths(self) -> List[str]:
+        """Rotated segments (``<log>.N``, oldest first) followed by the live log."""
+        directory, name = os.path.split(self.csv_file)
+        rotated = []
+        try:
+            entries = os.listdir(directory or ".")
+        except OSError:
+            entries = []
+        for entry in entries:
+            suffix = entry[len(name) + 1:]
+            if entry.startswith(name + ".") and suffix.isdigit():
+                rotated.append((int(suffix), os.path.join(directory, entry)))
+        return [path for _, path in sorted(rotated, reverse=True)] + [self.csv_file]
+
+    def refresh(self) -> int:
+        """
+        Index rows appended since the last call and pick up rotated segments.
+
+        Returns:
+            int: Number of rows in the log
+        """
+        known = {segment.identity: segment for segment in self._segments}
+        segments = []
+        for path in self.segment_paths():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            identity = (stat.st_dev, stat.st_ino)
+            segment = known.get(identity) or _Segment(path, identity)
+            segment.path = path
+            segment.refresh(stat.st_size, self.page_size)
+            segments.append(segment)
+        self._segments = segments
+        self._rows = sum(segment.rows for segment in segments)
+        return self._rows
+
+    def iter_rows(self, start: int = 0) -> Iterator[LogRow]:
+        """Yield the rows from global row ``start`` on, oldest first."""
+        for segment in self._segments:
+            if start >= segment.rows:
+                start -= segment.rows
+                continue
+            for fields in csv.reader(segment.lines(start, self.page_size)):
+                yield LogRow(*(fields + [""] * 5)[:5])
+            start = 0
+
+    def read(self, start: int, count: int) -> List[LogRow]:
+        """Return up to ``count`` rows from global row ``start`` on."""
+        return list(islice(self.iter_rows(start), count))
+
+    def page(self, number: int) -> List[LogRow]:
+        """
+        Return the rows of one page, oldest first.
+
+        Args:
+            number (int): Page index; negative values count from the newest page
+
+        Raises:
+            IndexError: The page does not exist
+        """
+        if number < 0:
+            number += self.pages
+        if not 0 <= number < self.pages:
+            raise IndexError(f"page {number} out of range (0-{self.pages - 1})")
+        return self.read(number * self.page_size, self.page_size)
+
+    def query(self, **filters) -> "LogQuery":
+        return LogQuery(self, **filters)
+
+
+class _MatchIndex:
+    """Where every ``page_size``-th match starts, for one scan direction."""
+
+    def __init__(self, iterate, cursor: int):
+        self.iterate = iterate  # cursor -> (cursor, row) of each match from there on
+        self.starts: List[int] = []
+        self.matches = 0
+        self.cursor = cursor  # where the scan stopped
+        self.done = False
+
+
+class LogQuery:
+    """Filtered and sorted view of a ``CalcLog``, read page by page."""
+
+    def __init__(self, log: CalcLog, operator: Optional[str] = None, since: Optional[str] = None,
+                 until: Optional[str] = None, sort: str = "time", descending: bool = False):
+        """
+        Args:
+            log (CalcLog): Refreshed log to read from
+            operator (str): Only rows with this operator (``+``, ``add``, ``×``, ...)
+            since (str): Only rows at or after this time (``YYYY-MM-DD[ HH:MM[:SS]]``)
+            until (str): Only rows up to this time; a date includes the whole day
+            sort (str): ``time`` (log order) or a number column: ``a``, ``b``, ``result``
+            descending (bool): Newest / largest first
+
+        Raises:
+            ValueError: Unknown operator or sort key
+        """
+        if operator is not None and operator.strip().lower() not in OPERATORS:
+            raise ValueError(f"Unknown operator '{operator}'. Use one of + - * /")
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key '{sort}'. Use one of {', '.join(SORT_KEYS)}")
+        self.log = log
+        self.operator = OPERATORS[operator.strip().lower()] if operator is not None else None
+        self.since = since.strip() if since else None
+        self.until = until.strip() if until else None
+        self.sort = sort
+        self.descending = descending
+        self.page_size = log.page_size
+        self._filtered = bool(self.operator or self.since or self.until)
+        self._bounds: Optional[Tuple[int, int]] = None
+        self._forward: Optional[_MatchIndex] = None
+        self._backward: Optional[_MatchIndex] = None
+        self._sorted: Optional[List[LogRow]] = None
+        self._sorted_complete = False
+
+    @property
+    def count_known(self) -> Optional[int]:
+        """Number of matching rows if already known without another scan."""
+        if not self._filtered:
+            return self.log.rows
+        for index in (self._forward, self._backward):
+            if index is not None and index.done:
+                return index.matches
+        return None
+
+    def count(self) -> int:
+        """Number of matching rows (scans the rest of the log once if filtered)."""
+        known = self.count_known
+        if known is not None:
+            return known
+        index = self._index()
+        self._scan(index, None)
+        return index.matches
+
+    def page(self, number: int) -> List[LogRow]:
+        """
+        Return one page of matching rows in the query's order.
+
+        Raises:
+            IndexError: The page is past the last match
+        """
+        if number < 0:
+            raise IndexError("page numbers start at 0")
+        size = self.page_size
+        if self.sort != "time":
+            rows = self._sorted_rows((number + 1) * size)[number * size:(number + 1) * size]
+        elif not self._filtered:
+            end = self.log.rows - number * size if self.descending else (number + 1) * size
+            start = max(0, end - size)
+            rows = self.log.read(start, end - start) if end > 0 else []
+            if self.descending:
+                rows.reverse()
+        else:
+            rows = self._read_matches(self._index(), number * size, size)
+        if not rows and number > 0:
+            raise IndexError(f"page {number} is past the last match")
+        return rows
+
+    def __iter__(self) -> Iterator[LogRow]:
+        """Yield all matching rows in the query's order, one page in memory at a time."""
+        if self.sort == "time" and not self.descending:
+            for _, row in self._iter_forward(self._row_bounds()[0]):
+                yield row
+            return
+        number = 0
+        while True:
+            try:
+                rows = self.page(number)
+            except IndexError:
+                return
+            if not rows:
+                return
+            yield from rows
+            number += 1
+
+    def matches(self, row: LogRow) -> bool:
+        if self.operator is not None and row.operator != self.operator:
+            return False
+        if self.since is not None and row.timestamp < self.since:
+            return False
+        if self.until is not None and row.timestamp[:len(self.until)] > self.until:
+            return False
+        return True
+
+    def _row_bounds(self) -> Tuple[int, int]:
+        """
+        Rows that can match ``since`` / ``until`` as (first, end).
+
+        The log is in time order, so both bounds are found by binary search.
+        """
+        if self._bounds is None:
+            first = self._bisect(0, lambda ts: ts >= self.since) if self.since else 0
+            end = self._bisect(first, lambda ts: ts[:len(self.until)] > self.until) if self.until else self.log.rows
+            self._bounds = (first, end)
+        return self._bounds
+
+    def _bisect(self, low: int, reached) -> int:
+        """First row from ``low`` on whose timestamp satisfies ``reached``."""
+        high = self.log.rows
+        while low < high:
+            middle = (low + high) // 2
+            if reached(self.log.read(middle, 1)[0].timestamp):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def _index(self) -> _MatchIndex:
+        """Match index in the query's time direction (newest first if descending)."""
+        if self.descending:
+            if self._backward is None:
+                self._backward = _MatchIndex(self._iter_backward, self._row_bounds()[1])
+            return self._backward
+        if self._forward is None:
+            self._forward = _MatchIndex(self._iter_forward, self._row_bounds()[0])
+        return self._forward
+
+    def _iter_forward(self, position: int) -> Iterator[Tuple[int, LogRow]]:
+        end = self._row_bounds()[1]
+        for position, row in enumerate(self.log.iter_rows(position), position):
+            if position >= end:
+                return
+            if self.matches(row):
+                yield position, row
+
+    def _iter_backward(self, end: int) -> Iterator[Tuple[int, LogRow]]:
+        """Matches before row ``end``, newest first; read one page-sized block at a time."""
+        first = self._row_bounds()[0]
+        while end > first:
+            start = max(first, end - self.page_size)
+            for position, row in reversed(list(enumerate(self.log.read(start, end - start), start))):
+                if self.matches(row):
+                    yield position + 1, row  # resuming before ``end`` yields this match first
+            end = start
+
+    def _scan(self, index: _MatchIndex, matches: Optional[int]) -> None:
+        """Scan on until ``matches`` rows matched (None: to the end)."""
+        if index.done:
+            return
+        for cursor, _ in index.iterate(index.cursor):
+            if matches is not None and index.matches >= matches:
+                index.cursor = cursor
+                return
+            if index.matches % self.page_size == 0:
+                index.starts.append(cursor)
+            index.matches += 1
+        index.done = True
+
+    def _read_matches(self, index: _MatchIndex, first: int, count: int) -> List[LogRow]:
+        """Matches number ``first`` to ``first + count - 1`` in the index's direction."""
+        self._scan(index, first + count)
+        if first >= index.matches:
+            return []
+        skip = first % self.page_size
+        rows = islice(index.iterate(index.starts[first // self.page_size]), skip, skip + count)
+        return [row for _, row in rows]
+
+    def _sort_key(self, row: LogRow) -> float:
+        try:
+            return float(getattr(row, self.sort))
+        except ValueError:
+            return float("-inf") if self.descending else float("inf")  # unparsable values last
+
+    def _sorted_rows(self, needed: int) -> List[LogRow]:
+        """The first ``needed`` rows in sort order; the heap grows geometrically with paging."""
+        if self._sorted is None or (len(self._sorted) < needed and not self._sorted_complete):
+            size = max(needed, 2 * len(self._sorted or []))
+            pick = heapq.nlargest if self.descending else heapq.nsmallest
+            rows = (row for _, row in self._iter_forward(self._row_bounds()[0]))
+            self._sorted = pick(size, rows, key=self._sort_key)
+            self._sorted_complete = len(self._sorted) < size
+        return self._sorted
@@ -1,8 +1,22 @@
 """
 GUI modules for Corally calculator suite.
+
+The window and launcher modules are imported on first access, so importing
+a helper such as ``corally.gui.tasks`` does not build up the whole GUI.
 """
 
-from .main import ModernCalculatorGUI as CalculatorGUI
-from .launcher import launch_gui
+import importlib
+
+_EXPORTS = {
+    "CalculatorGUI": (".main", "ModernCalculatorGUI"),
+    "launch_gui": (".launcher", "launch_gui"),
+}
 
 __all__ = ["CalculatorGUI", "launch_gui"]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        module, attr = _EXPORTS[name]
+        return getattr(importlib.import_module(module, __name__), attr)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,150 @@
+"""
+Batch CSV conversion panel for the GUI.
+
+``BatchPanel`` asks for an input and an output file and streams the
+conversion on a ``BackgroundTasks`` worker (see ``corally.core.batch``).
+The worker only updates a ``BatchProgress``. The Tk thread reads it every
+``REFRESH_MS`` to move the progress bar and to show rows per second and the
+ETA, so a fast batch does not flood the event loop.
+"""
+
+import os
+import threading
+from typing import Callable, Optional
+
+from tkinter import filedialog, messagebox, ttk
+
+from ..core.batch import CHUNK_ROWS, BatchProgress, process_csv
+
+REFRESH_MS = 100
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "--:--"
+    minutes, seconds = divmod(int(seconds + 0.5), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+def describe(progress: BatchProgress) -> str:
+    """One-line progress text, e.g. ``12,000 rows · 85,000 rows/s · ETA 0:12``."""
+    text = f"{progress.rows:,} rows · {progress.rows_per_second:,.0f} rows/s"
+    if progress.finished:
+        return f"{text} · {format_duration(progress.elapsed)} total"
+    return f"{text} · ETA {format_duration(progress.eta)}"
+
+
+class BatchPanel:
+    """Button, progress bar and cancel button for one kind of batch conversion."""
+
+    def __init__(self, parent, root, tasks, make_processor: Callable[[], Callable], suffix: str):
+        """
+        Args:
+            parent: Frame to place the panel in
+            root: Tk root (for ``after``)
+            tasks: The GUI's ``BackgroundTasks``
+            make_processor: Returns the processor for the current GUI settings;
+                            may raise ValueError for invalid settings
+            suffix (str): Default output name suffix, e.g. ``"converted"``
+        """
+        self.root = root
+        self.tasks = tasks
+        self.make_processor = make_processor
+        self.suffix = suffix
+        self.progress: Optional[BatchProgress] = None
+        self.cancel_event: Optional[threading.Event] = None
+        self.output = ""
+
+        self.frame = ttk.Frame(parent)
+        self.frame.pack(pady=10, fill='x', padx=20)
+        buttons = ttk.Frame(self.frame)
+        buttons.pack()
+        self.start_btn = ttk.Button(buttons, text="Batch CSV...", command=self.start, style='Modern.TButton')
+        self.start_btn.pack(side='left', padx=5)
+        self.cancel_btn = ttk.Button(buttons, text="Cancel Batch", command=self.cancel,
+                                     style='Warning.TButton', state='disabled')
+        self.cancel_btn.pack(side='left', padx=5)
+        self.bar = ttk.Progressbar(self.frame, orient='horizontal', mode='determinate', maximum=1000)
+        self.bar.pack(fill='x', pady=(8, 2))
+        self.status = ttk.Label(self.frame, text="", font=('Arial', 10), foreground='gray')
+        self.status.pack()
+
+    @property
+    def running(self) -> bool:
+        return self.progress is not None and self.progress.finished is None
+
+    def start(self) -> None:
+        """Ask for the files and start the batch on a worker thread."""
+        if self.running:
+            return
+        src = filedialog.askopenfilename(title="CSV to convert",
+                                         filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if not src:
+            return
+        base, _ = os.path.splitext(src)
+        dst = filedialog.asksaveasfilename(title="Save result as", defaultextension=".csv",
+                                           initialfile=os.path.basename(f"{base}_{self.suffix}.csv"),
+                                           initialdir=os.path.dirname(src))
+        if not dst:
+            return
+        if os.path.abspath(dst) == os.path.abspath(src):
+            messagebox.showerror("Error", "The output file must differ from the input file.")
+            return
+        try:
+            processor = self.make_processor()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        self.output = dst
+        self.progress = BatchProgress()
+        self.cancel_event = threading.Event()
+        self.tasks.submit(process_csv, src, dst, processor, CHUNK_ROWS, self.progress, self.cancel_event,
+                          on_done=self.on_done, on_error=self.on_error, name="batch")
+        self.start_btn.config(state='disabled')
+        self.cancel_btn.config(state='normal')
+        self.bar['value'] = 0
+        self.status.config(text="Starting...")
+        self.root.after(REFRESH_MS, self.refresh)
+
+    def refresh(self) -> None:
+        """Show the worker's progress; reschedules itself while the batch runs."""
+        if self.progress is None or not self.frame.winfo_exists():
+            return
+        self.bar['value'] = self.progress.fraction * 1000
+        self.status.config(text=describe(self.progress))
+        if self.running:
+            self.root.after(REFRESH_MS, self.refresh)
+
+    def cancel(self) -> None:
+        """Stop after the current chunk; the partial output is removed."""
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_btn.config(state='disabled')
+            self.status.config(text="Cancelling...")
+
+    def on_done(self, progress: BatchProgress) -> None:
+        if not self.frame.winfo_exists():
+            return  # window closed while the batch ran
+        self._reset()
+        if progress.cancelled:
+            self.status.config(text=f"Cancelled after {progress.rows:,} rows")
+            return
+        self.bar['value'] = 1000
+        self.status.config(text=describe(progress))
+        errors = f"\n{progress.errors:,} row(s) could not be converted (see the error column)." \
+            if progress.errors else ""
+        messagebox.showinfo("Batch finished", f"{progress.rows:,} rows written to\n{self.output}{errors}")
+
+    def on_error(self, error: BaseException) -> None:
+        if not self.frame.winfo_exists():
+            return
+        self._reset()
+        self.status.config(text="Failed")
+        messagebox.showerror("Error", f"Batch conversion failed: {error}")
+
+    def _reset(self) -> None:
+        self.start_btn.config(state='normal')
+        self.cancel_btn.config(state='disabled')
+        self.cancel_event = None
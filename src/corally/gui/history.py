@@ -0,0 +1,237 @@
+"""
+Bounded result panes for the GUI.
+
+The result ``Text`` widgets used to get one ``insert`` and ``see`` per
+operation and were never trimmed, so they slowed down and kept growing over
+a long session. ``HistoryPane`` keeps the entries in a ring buffer of
+``max_rows`` and the widget holds only those. Appends are collected and drawn
+in a single ``after_idle`` redraw, so a burst of results costs one insert,
+one trim and one scroll.
+
+The full calculation log stays on disk; the History tab (``HistoryView``)
+filters and pages through it with ``corally.core.history.LogQuery``.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Deque, List, NamedTuple
+
+import tkinter as tk
+from tkinter import ttk
+
+from ..core.history import CalcLog
+
+MAX_ROWS = 500  # entries kept in a result pane
+
+
+class HistoryEntry(NamedTuple):
+    """One entry of a result pane."""
+
+    time: float
+    kind: str  # "result", "error" or "info"
+    text: str
+
+    @property
+    def lines(self) -> int:
+        return self.text.count("\n")
+
+
+class HistoryPane:
+    """
+    Ring buffer of entries shown in a Tk ``Text`` widget.
+
+    Features:
+    - Only the last ``max_rows`` entries are kept, in memory and in the widget
+    - Appends are coalesced into one ``after_idle`` redraw
+    - Entries are structured (time, kind, text), not just widget text
+    """
+
+    def __init__(self, widget, max_rows: int = MAX_ROWS):
+        """
+        Args:
+            widget: Tk ``Text`` widget (anything with ``insert``, ``delete``,
+                    ``see`` and ``after_idle``)
+            max_rows (int): Entries to keep
+        """
+        self.widget = widget
+        self.max_rows = max_rows
+        self.entries: Deque[HistoryEntry] = deque(maxlen=max_rows)
+        self._shown: Deque[int] = deque()  # line count of each entry in the widget
+        self._pending: List[HistoryEntry] = []
+        self._redraw_id = None
+
+    def append(self, text: str, kind: str = "result") -> HistoryEntry:
+        """Add an entry; it is drawn when Tk is next idle."""
+        if not text.endswith("\n"):
+            text += "\n"
+        entry = HistoryEntry(time.time(), kind, text)
+        self.entries.append(entry)
+        self._pending.append(entry)
+        if self._redraw_id is None:
+            self._redraw_id = self.widget.after_idle(self.flush)
+        return entry
+
+    def flush(self) -> None:
+        """Draw the pending entries and trim the widget to ``max_rows`` entries."""
+        self._redraw_id = None
+        pending, self._pending = self._pending[-self.max_rows:], []
+        if not pending:
+            return
+        if len(pending) == self.max_rows:
+            self.widget.delete("1.0", "end")  # everything shown is pushed out
+            self._shown.clear()
+        self.widget.insert("end", "".join(entry.text for entry in pending))
+        self._shown.extend(entry.lines for entry in pending)
+        drop = 0
+        while len(self._shown) > self.max_rows:
+            drop += self._shown.popleft()
+        if drop:
+            self.widget.delete("1.0", f"{drop + 1}.0")
+        self.widget.see("end")
+
+    def clear(self) -> None:
+        """Remove all entries from the buffer and the widget."""
+        if self._redraw_id is not None:
+            self.widget.after_cancel(self._redraw_id)
+            self._redraw_id = None
+        self._pending = []
+        self.entries.clear()
+        self._shown.clear()
+        self.widget.delete("1.0", "end")
+
+
+class HistoryView:
+    """
+    History tab: the calculation log on disk, filtered, sorted and paged.
+
+    Pages are read by a ``BackgroundTasks`` worker through a ``LogQuery``,
+    so a large log never blocks the Tk thread. Changing a filter or the sort
+    order starts a new query. The query keeps its page index, so paging
+    within a filter does not rescan the log.
+    """
+
+    COLUMNS = (("a", "Number 1", 120), ("operator", "Op", 50), ("b", "Number 2", 120),
+               ("result", "Result", 140), ("timestamp", "Time", 160))
+    OPERATORS = ("All", "+", "-", "*", "/")
+    SORTS = {"Time": "time", "Result": "result", "Number 1": "a", "Number 2": "b"}
+
+    def __init__(self, parent, tasks, csv_file: str, page_size: int = 100):
+        """
+        Args:
+            parent: Tk frame to fill
+            tasks: ``BackgroundTasks`` running the log reads
+            csv_file (str): Calculation log
+            page_size (int): Rows per page
+        """
+        self.tasks = tasks
+        self.log = CalcLog(csv_file, page_size=page_size)
+        self.query = None
+        self.page_number = 0
+        self._task = None
+        self._lock = threading.Lock()  # one reader of the log and its query at a time
+
+        filters = ttk.Frame(parent)
+        filters.pack(fill='x', padx=10, pady=(10, 5))
+        ttk.Label(filters, text="Operator:").pack(side='left')
+        self.operator = ttk.Combobox(filters, values=self.OPERATORS, width=5, state='readonly')
+        self.operator.set("All")
+        self.operator.pack(side='left', padx=(5, 15))
+        ttk.Label(filters, text="From:").pack(side='left')
+        self.since = ttk.Entry(filters, width=17)
+        self.since.pack(side='left', padx=(5, 10))
+        ttk.Label(filters, text="To:").pack(side='left')
+        self.until = ttk.Entry(filters, width=17)
+        self.until.pack(side='left', padx=(5, 15))
+        ttk.Label(filters, text="Sort:").pack(side='left')
+        self.sort = ttk.Combobox(filters, values=list(self.SORTS), width=9, state='readonly')
+        self.sort.set("Time")
+        self.sort.pack(side='left', padx=5)
+        self.descending = tk.BooleanVar(value=True)
+        ttk.Checkbutton(filters, text="Descending", variable=self.descending).pack(side='left', padx=5)
+        ttk.Button(filters, text="Apply", command=self.apply).pack(side='left', padx=5)
+
+        for widget in (self.operator, self.sort):
+            widget.bind('<<ComboboxSelected>>', lambda e: self.apply())
+        for widget in (self.since, self.until):
+            widget.bind('<Return>', lambda e: self.apply())
+
+        table_frame = ttk.Frame(parent)
+        table_frame.pack(fill='both', expand=True, padx=10, pady=5)
+        self.table = ttk.Treeview(table_frame, columns=[name for name, _, _ in self.COLUMNS],
+                                  show='headings')
+        for name, heading, width in self.COLUMNS:
+            self.table.heading(name, text=heading)
+            self.table.column(name, width=width, anchor='e' if name != "timestamp" else 'w')
+        scrollbar = ttk.Scrollbar(table_frame, orient='vertical', command=self.table.yview)
+        self.table.configure(yscrollcommand=scrollbar.set)
+        self.table.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+
+        nav = ttk.Frame(parent)
+        nav.pack(pady=(0, 10))
+        ttk.Button(nav, text="⏮ First", command=lambda: self.show(0)).pack(side='left', padx=5)
+        ttk.Button(nav, text="◀ Previous", command=lambda: self.show(self.page_number - 1)).pack(side='left', padx=5)
+        self.page_label = ttk.Label(nav, text="")
+        self.page_label.pack(side='left', padx=10)
+        ttk.Button(nav, text="Next ▶", command=lambda: self.show(self.page_number + 1)).pack(side='left', padx=5)
+        ttk.Button(nav, text="🔄 Refresh", command=self.apply).pack(side='left', padx=5)
+
+        self.apply()
+
+    def apply(self) -> None:
+        """Start a new query from the filter controls and show its first page."""
+        operator = self.operator.get()
+        filters = {
+            "operator": None if operator == "All" else operator,
+            "since": self.since.get().strip() or None,
+            "until": self.until.get().strip() or None,
+            "sort": self.SORTS[self.sort.get()],
+            "descending": self.descending.get(),
+        }
+        self._load(0, filters)
+
+    def show(self, number: int) -> None:
+        """Show another page of the current query."""
+        if number >= 0 and self.query is not None:
+            self._load(number, None)
+
+    def _load(self, number: int, filters) -> None:
+        if self._task is not None:
+            self.tasks.cancel(self._task)
+        self.page_label.config(text="Loading...")
+        self._task = self.tasks.submit(self._read, number, filters, on_done=self._loaded,
+                                       on_error=self._failed, name="history")
+
+    def _read(self, number: int, filters):
+        """Worker: refresh the index and read one page."""
+        with self._lock:
+            query = self.query
+            if filters is not None:
+                self.log.refresh()  # pick up calculations made since the last query
+                query = self.log.query(**filters)
+            try:
+                rows = query.page(number)
+            except IndexError:  # past the last match: stay on the current page
+                return query, self.page_number, None, query.count_known
+            return query, number, rows, query.count_known
+
+    def _loaded(self, result) -> None:
+        self._task = None
+        self.query, self.page_number, rows, total = result
+        if rows is not None:
+            self.table.delete(*self.table.get_children())
+            for row in rows:
+                self.table.insert('', 'end', values=row)
+            self.table.yview_moveto(0.0)
+        if self.log.rows == 0:
+            self.page_label.config(text="Log is empty")
+            return
+        pages = f" of {max(1, -(-total // self.log.page_size))}" if total is not None else ""
+        matches = f"{total} matches, " if total is not None and total != self.log.rows else ""
+        self.page_label.config(text=f"Page {self.page_number + 1}{pages} "
+                                    f"({matches}{self.log.rows} calculations)")
+
+    def _failed(self, error: BaseException) -> None:
+        self._task = None
+        self.page_label.config(text=f"❌ {error}")
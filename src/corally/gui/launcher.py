@@ -4,38 +4,32 @@ GUI Launcher for Calculator Suite
 Modern replacement for Hauptprogramm.py
 """
 
+import importlib.util
 import tkinter as tk
 from tkinter import messagebox
 import sys
 
+from .startup import StartupTimer, print_report, report_mode
+
+# Import name -> pip package of the optional API dependencies
+DEPENDENCIES = {
+    "requests": "requests",
+    "uvicorn": "uvicorn",
+    "fastapi": "fastapi",
+    "httpx": "httpx",
+    "dotenv": "python-dotenv",
+}
+
+
+def find_missing_dependencies():
+    """Return the pip names of missing dependencies, without importing them"""
+    return [package for module, package in DEPENDENCIES.items()
+            if importlib.util.find_spec(module) is None]
+
+
 def check_dependencies():
     """Check if all required dependencies are available"""
-    missing_deps = []
-    
-    try:
-        import requests  # noqa: F401
-    except ImportError:
-        missing_deps.append("requests")
-    
-    try:
-        import uvicorn  # noqa: F401
-    except ImportError:
-        missing_deps.append("uvicorn")
-    
-    try:
-        import fastapi  # noqa: F401
-    except ImportError:
-        missing_deps.append("fastapi")
-    
-    try:
-        import httpx  # noqa: F401
-    except ImportError:
-        missing_deps.append("httpx")
-    
-    try:
-        import dotenv  # noqa: F401
-    except ImportError:
-        missing_deps.append("python-dotenv")
+    missing_deps = find_missing_dependencies()
     
     if missing_deps:
         root = tk.Tk()
@@ -58,8 +52,12 @@ Would you like to continue anyway?
 
 def main():
     """Main function to launch the calculator GUI"""
-    # Check dependencies first
+    timer = StartupTimer()
+    mode = report_mode()
+
+    # Check dependencies first (find_spec only, nothing is imported)
     check_dependencies()
+    timer.mark("dependencies")
     
     # Check if core modules can be imported
     try:
@@ -76,17 +74,26 @@ def main():
     # Import and launch the GUI
     try:
         from .main import ModernCalculatorGUI
+        timer.mark("imports")
         
         root = tk.Tk()
         app = ModernCalculatorGUI(root)
+        timer.mark("window")
         
         # Handle window closing
         def on_closing():
-            if hasattr(app, 'api_server_running') and app.api_server_running:
-                app.stop_api_server()
+            app.shutdown()
             root.destroy()
         
         root.protocol("WM_DELETE_WINDOW", on_closing)
+
+        if mode is not None:
+            def first_paint(timer):
+                print_report(timer)
+                if mode == "exit":
+                    on_closing()
+
+            timer.on_first_paint(root, first_paint)
         
         # Center the window
         root.update_idletasks()
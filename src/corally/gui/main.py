@@ -1,14 +1,20 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import subprocess
-import threading
-import requests
 from ..core import CalculatorCore, CurrencyConverter, InterestCalculator
+from ..core.batch import currency_processor, interest_processor
+from .batch import BatchPanel
+from .history import HistoryPane, HistoryView
+from .tasks import BackgroundTasks
+from .ticker import DEFAULT_PAIRS, RateFeed, RateTable
 # Backward compatibility aliases
 Rechner = CalculatorCore
 Waerungsrechner = CurrencyConverter
 tageszins = InterestCalculator.calculate_interest
 
+DEBOUNCE_MS = 250  # pause in typing before the live conversion runs
+TICKER_MS = 500  # how often the ticker checks the rate table for changes
+CONVERSIONS = "conversion"  # task group of the requests the Cancel button aborts
+
 class ModernCalculatorGUI:
     def __init__(self, root):
         self.root = root
@@ -18,6 +24,9 @@ class ModernCalculatorGUI:
         
         # Initialize calculator
         self.rechner = Rechner()
+
+        # Network calls run on worker threads; results come back via root.after
+        self.tasks = BackgroundTasks(root, on_change=self.update_activity)
         
         # Configure style
         self.setup_styles()
@@ -28,9 +37,39 @@ class ModernCalculatorGUI:
         # API server status
         self.api_server_running = False
         self.api_process = None
+        self._stop_task = None  # background stop in progress
+        self._force_task = None  # background force stop in progress
         self.use_free_api = True  # Default to free API
         self.api_port = 8000  # Default port
+        # Keep-alive client, created on first use (see api_client)
+        self._api_client = None
+
+        # Live conversion while typing uses a local rate table, kept current by a feed
+        self.rate_table = RateTable()
+        self.rate_feed = None
+        self._live_after = None
+        self._ticker_version = -1
         
+    @property
+    def api_client(self):
+        """Keep-alive client for the local API; server health is tracked from its responses"""
+        if self._api_client is None:
+            # requests is only loaded once the API is used, not at GUI startup
+            from ..api.client import ApiClient
+            self._api_client = ApiClient(f"http://127.0.0.1:{self.api_port}")
+        return self._api_client
+
+    def shutdown(self):
+        """Stop background work and the API server before the window closes"""
+        self.cancel_batches()
+        self.stop_rate_feed()
+        self.tasks.shutdown()
+        if self._api_client is not None:
+            self._api_client.close()
+        if self.api_server_running:
+            # The window is closing and the task pool is gone: stop right here
+            self._stop_servers(self.api_port, self.api_process)
+
     def setup_styles(self):
         """Configure modern styling"""
         style = ttk.Style()
@@ -93,7 +132,8 @@ class ModernCalculatorGUI:
         self.tabs_created = {
             'basic': False,
             'interest': False,
-            'api': False
+            'api': False,
+            'history': False
         }
 
         # Create placeholder frames for main tabs (excluding currency converter)
@@ -118,6 +158,7 @@ class ModernCalculatorGUI:
         self.calc_display = tk.Text(calc_frame, height=3, width=50, font=('Arial', 14), 
                                    bg='#34495e', fg='#ecf0f1', insertbackground='#ecf0f1')
         self.calc_display.pack(pady=20)
+        self.calc_history = HistoryPane(self.calc_display)
         
         # Input frame
         input_frame = ttk.Frame(calc_frame)
@@ -146,9 +187,14 @@ class ModernCalculatorGUI:
             btn = ttk.Button(button_frame, text=text, command=command, style='Modern.TButton')
             btn.grid(row=i//2, column=i%2, padx=10, pady=5, sticky='ew')
         
-        # Clear button
-        clear_btn = ttk.Button(calc_frame, text="Clear", command=self.clear_calculator, style='Warning.TButton')
-        clear_btn.pack(pady=10)
+        # Clear and log buttons
+        bottom_frame = ttk.Frame(calc_frame)
+        bottom_frame.pack(pady=10)
+        clear_btn = ttk.Button(bottom_frame, text="Clear", command=self.clear_calculator, style='Warning.TButton')
+        clear_btn.pack(side='left', padx=5)
+        log_btn = ttk.Button(bottom_frame, text="Show Log", command=self.show_calculation_log,
+                             style='Modern.TButton')
+        log_btn.pack(side='left', padx=5)
 
     def create_currency_converter_window_content(self, parent_window):
         """Create currency converter content in a separate window"""
@@ -188,6 +234,18 @@ class ModernCalculatorGUI:
         self.currency_result = tk.Text(main_frame, height=5, width=60, font=('Arial', 12),
                                       bg='#34495e', fg='#ecf0f1', insertbackground='#ecf0f1')
         self.currency_result.pack(pady=20)
+        self.currency_history = HistoryPane(self.currency_result)
+
+        # Batch conversion of a CSV with an "amount" column
+        batch_frame = ttk.Frame(main_frame)
+        batch_frame.pack(fill='x')
+        ttk.Label(batch_frame, text="Batch conversion:").pack(side='left', padx=5)
+        self.batch_conversion = ttk.Combobox(batch_frame, state='readonly', width=12,
+                                             values=list(CurrencyConverter.CONVERSIONS))
+        self.batch_conversion.set('eur_to_usd')
+        self.batch_conversion.pack(side='left', padx=5)
+        self.currency_batch = BatchPanel(main_frame, self.root, self.tasks,
+                                         lambda: currency_processor(self.batch_conversion.get()), "converted")
 
     def create_interest_calculator_content(self):
         """Create interest calculator tab content"""
@@ -237,13 +295,24 @@ class ModernCalculatorGUI:
         self.interest_result = tk.Text(interest_frame, height=8, width=60, font=('Arial', 12),
                                       bg='#34495e', fg='#ecf0f1', insertbackground='#ecf0f1')
         self.interest_result.pack(pady=20)
+        self.interest_history = HistoryPane(self.interest_result)
+
+        # Batch calculation of a CSV with capital, rate, start, end (and method) columns;
+        # rows without a method use the one selected above
+        self.interest_batch = BatchPanel(interest_frame, self.root, self.tasks,
+                                         lambda: interest_processor(self.method_var.get()), "interest")
 
     def create_api_currency_content(self):
         """Create API currency converter tab content"""
         api_frame = self.tab_frames['api']
         
         ttk.Label(api_frame, text="Live Currency Converter", 
-                 font=('Arial', 16, 'bold')).pack(pady=20)
+                 font=('Arial', 16, 'bold')).pack(pady=(20, 5))
+
+        # Ticker of the watched pairs, updated by the rate feed
+        self.ticker_label = ttk.Label(api_frame, text="Rates: start the API server",
+                                      font=('Consolas', 10), foreground='gray')
+        self.ticker_label.pack(pady=(0, 10))
         
         # API Selection
         api_selection_frame = ttk.Frame(api_frame)
@@ -298,6 +367,12 @@ class ModernCalculatorGUI:
         ttk.Label(conversion_frame, text="Amount:").grid(row=2, column=0, padx=5, pady=5)
         self.api_amount = ttk.Entry(conversion_frame, font=('Arial', 12))
         self.api_amount.grid(row=2, column=1, padx=5, pady=5)
+
+        # Converts while typing from the local rate table, no request per keystroke
+        self.live_label = ttk.Label(conversion_frame, text="", font=('Arial', 12, 'bold'))
+        self.live_label.grid(row=3, column=0, columnspan=2, pady=5)
+        for entry in (self.from_currency, self.to_currency, self.api_amount):
+            entry.bind('<KeyRelease>', self.schedule_live_conversion)
         
         # Conversion and test buttons
         button_frame2 = ttk.Frame(api_frame)
@@ -314,6 +389,15 @@ class ModernCalculatorGUI:
         clear_btn = ttk.Button(button_frame2, text="Clear Results",
                               command=self.clear_api_results, style='Warning.TButton')
         clear_btn.pack(side='left', padx=5)
+
+        self.cancel_btn = ttk.Button(button_frame2, text="Cancel",
+                                    command=self.cancel_api_requests, style='Warning.TButton',
+                                    state='disabled')
+        self.cancel_btn.pack(side='left', padx=5)
+
+        # In-flight indicator
+        self.activity_label = ttk.Label(api_frame, text="", font=('Arial', 10), foreground='gray')
+        self.activity_label.pack()
         
         # Result display section
         result_label = ttk.Label(api_frame, text="Conversion Results:", font=('Arial', 12, 'bold'))
@@ -335,12 +419,13 @@ class ModernCalculatorGUI:
         self.api_result.config(yscrollcommand=result_scrollbar.set)
 
         # Add initial text to verify widget is working
-        self.api_result.insert(tk.END, "💡 Live Currency Converter Ready\n")
-        self.api_result.insert(tk.END, "1. Select API mode above\n")
-        self.api_result.insert(tk.END, "2. Start the API server\n")
-        self.api_result.insert(tk.END, "3. Enter currencies and amount\n")
-        self.api_result.insert(tk.END, "4. Click 'Convert Currency'\n")
-        self.api_result.insert(tk.END, f"{'-'*40}\n")
+        self.api_history = HistoryPane(self.api_result)
+        self.api_history.append("💡 Live Currency Converter Ready\n"
+                                "1. Select API mode above\n"
+                                "2. Start the API server\n"
+                                "3. Enter currencies and amount\n"
+                                "4. Click 'Convert Currency'\n"
+                                f"{'-'*40}\n", kind="info")
 
     def create_menu_bar(self):
         """Create menu bar with Tools dropdown for Currency Converter"""
@@ -380,6 +465,8 @@ class ModernCalculatorGUI:
     def close_currency_converter(self):
         """Close the currency converter window"""
         if self.currency_window:
+            if self.currency_batch.running:
+                self.currency_batch.cancel()
             self.currency_window.destroy()
             self.currency_window = None
 
@@ -412,10 +499,15 @@ Developed with Python & tkinter"""
         self.tab_frames['api'] = ttk.Frame(self.notebook)
         self.notebook.add(self.tab_frames['api'], text="Live Currency API")
 
+        # Calculation history tab
+        self.tab_frames['history'] = ttk.Frame(self.notebook)
+        self.notebook.add(self.tab_frames['history'], text="History")
+
         # Add loading labels to empty tabs
         for tab_name, frame in self.tab_frames.items():
             if tab_name != 'basic':  # Don't add to basic tab since it loads immediately
-                loading_label = ttk.Label(frame, text=f"Loading {tab_name.title()} Calculator...",
+                title = "History" if tab_name == 'history' else f"{tab_name.title()} Calculator"
+                loading_label = ttk.Label(frame, text=f"Loading {title}...",
                                         font=('Arial', 14), foreground='gray')
                 loading_label.pack(expand=True)
 
@@ -424,7 +516,7 @@ Developed with Python & tkinter"""
         selected_tab = self.notebook.index(self.notebook.select())
 
         # Map tab indices to tab names (currency converter removed)
-        tab_mapping = {0: 'basic', 1: 'interest', 2: 'api'}
+        tab_mapping = {0: 'basic', 1: 'interest', 2: 'api', 3: 'history'}
         tab_name = tab_mapping.get(selected_tab)
 
         if tab_name and not self.tabs_created[tab_name]:
@@ -437,6 +529,9 @@ Developed with Python & tkinter"""
                 self.create_interest_calculator_content()
             elif tab_name == 'api':
                 self.create_api_currency_content()
+            elif tab_name == 'history':
+                self.history_view = HistoryView(self.tab_frames['history'], self.tasks,
+                                                self.rechner.csv_file)
 
             # Mark as created
             self.tabs_created[tab_name] = True
@@ -462,8 +557,7 @@ Developed with Python & tkinter"""
 
             if result is not None:
                 calculation_text = f"{num1} {op_symbol} {num2} = {result}\n"
-                self.calc_display.insert(tk.END, calculation_text)
-                self.calc_display.see(tk.END)
+                self.calc_history.append(calculation_text)
             else:
                 messagebox.showerror("Error", "Calculation failed. Check your inputs.")
 
@@ -472,10 +566,23 @@ Developed with Python & tkinter"""
 
     def clear_calculator(self):
         """Clear calculator display and inputs"""
-        self.calc_display.delete(1.0, tk.END)
+        self.calc_history.clear()
         self.num1_entry.delete(0, tk.END)
         self.num2_entry.delete(0, tk.END)
 
+    def show_calculation_log(self):
+        """Switch to the History tab (paged view of the calculation log on disk)"""
+        if self.tabs_created['history']:
+            self.history_view.apply()  # show calculations made since the last visit
+        self.notebook.select(self.tab_frames['history'])
+
+    def cancel_batches(self):
+        """Stop running batch conversions (their worker threads would delay exit)"""
+        for name in ('currency_batch', 'interest_batch'):
+            panel = getattr(self, name, None)
+            if panel is not None and panel.running:
+                panel.cancel()
+
     def convert_currency(self, conversion_type):
         """Convert currency using static rates"""
         try:
@@ -501,8 +608,7 @@ Developed with Python & tkinter"""
                 text = f"{amount} JPY = {result} EUR\n"
 
             if result is not None:
-                self.currency_result.insert(tk.END, text)
-                self.currency_result.see(tk.END)
+                self.currency_history.append(text)
             else:
                 messagebox.showerror("Error", "Conversion failed.")
 
@@ -531,8 +637,7 @@ Total: {capital + interest:,.2f} €
 {'-'*40}
 """
 
-            self.interest_result.insert(tk.END, result_text)
-            self.interest_result.see(tk.END)
+            self.interest_history.append(result_text)
 
         except ValueError as e:
             messagebox.showerror("Error", f"Invalid input: {str(e)}")
@@ -564,173 +669,254 @@ Total: {capital + interest:,.2f} €
         return None
 
     def start_api_server(self):
-        """Start the FastAPI server in a separate thread"""
-        if not self.api_server_running:
-            def run_server():
-                try:
-                    # Find available port
-                    port = self.find_available_port(8000)
-                    if not port:
-                        self.root.after(0, lambda: messagebox.showerror("Error", "No available ports found (8000-8009)"))
-                        return
-
-                    self.api_port = port
-
-                    # Choose which API to start based on mode
-                    if self.use_free_api:
-                        api_module = "corally.api.free_server:app"
-                    else:
-                        api_module = "corally.api.server:app"
-
-                    self.api_process = subprocess.Popen(
-                        ["uvicorn", api_module, "--host", "127.0.0.1", "--port", str(port)],
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE
-                    )
-
-                    # Wait a moment and check if server started
-                    import time
-                    time.sleep(2)
-
-                    # Test if server is responding
-                    try:
-                        import requests
-                        response = requests.get(f"http://127.0.0.1:{port}/", timeout=5)
-                        if response.status_code == 200:
-                            self.api_server_running = True
-                            mode_text = "Free API" if self.use_free_api else "Paid API"
-                            self.root.after(0, lambda: self.update_server_status(f"Running ({mode_text}) on port {port}"))
-                        else:
-                            raise Exception(f"Server not responding (status: {response.status_code})")
-                    except Exception as e:
-                        self.api_process.terminate()
-                        self.root.after(0, lambda err=str(e): messagebox.showerror("Error", f"Server failed to start properly: {err}"))
-
-                except Exception as error:
-                    self.root.after(0, lambda err=error: messagebox.showerror("Error", f"Failed to start server: {str(err)}"))
-
-            threading.Thread(target=run_server, daemon=True).start()
+        """Start the FastAPI server on a background thread of this process"""
+        from ..api import lifecycle
+        if self.api_server_running or self.api_process is not None:
+            return
 
-    def stop_api_server(self):
-        """Stop the FastAPI server"""
+        # Find available port
+        port = self.find_available_port(8000)
+        if not port:
+            messagebox.showerror("Error", "No available ports found (8000-8009)")
+            return
+
+        self.api_port = port
+        self.api_client.set_port(port)
+        app_name = "free" if self.use_free_api else "paid"
+        self.update_server_status(f"Starting on port {port}...")
+        self.start_server_btn.config(state='disabled')
+
+        # Binding the port and running the app startup happen off the Tk thread;
+        # the server reports readiness itself, no fixed sleep needed
+        # registered with the lifecycle manager, so `corally server stop` sees it too
+        self.tasks.submit(lifecycle.start_embedded, app_name, "127.0.0.1", port,
+                          on_done=self.on_server_started, on_error=self.on_server_failed,
+                          name="server start")
+
+    def on_server_started(self, server):
+        """Server is accepting connections (Tk thread)"""
+        self.api_process = server
+        self.api_server_running = True
+        self.api_client.mark(True)
+        mode_text = "Free API" if self.use_free_api else "Paid API"
+        self.update_server_status(f"Running ({mode_text}) on port {server.port}")
+        self.start_rate_feed()
+
+    def start_rate_feed(self):
+        """Start keeping the rate table current from the running server"""
+        self.stop_rate_feed()
+        self.rate_table.clear()
+        pairs = list(DEFAULT_PAIRS)
+        self.rate_feed = RateFeed(self.api_client, self.rate_table, pairs).start()
+        self.live_convert()  # watch the pair already entered, if any
+        self.poll_rates()
+
+    def stop_rate_feed(self):
+        """Stop the rate feed; the ticker keeps the last rates"""
+        if self.rate_feed is not None:
+            self.rate_feed.stop()
+            self.rate_feed = None
+
+    def poll_rates(self):
+        """Redraw the ticker and the live result when the rate table has changed"""
+        if self.rate_table.version != self._ticker_version:
+            self._ticker_version = self.rate_table.version
+            self.update_ticker()
+            self.live_convert()
+        if self.rate_feed is not None:
+            self.root.after(TICKER_MS, self.poll_rates)
+
+    def update_ticker(self):
+        """Show the watched pairs with an up/down marker since the previous rate"""
+        if not hasattr(self, 'ticker_label') or self.rate_feed is None:
+            return
+        parts = []
+        for from_curr, to_curr in self.rate_feed.pairs:
+            entry = self.rate_table.get(from_curr, to_curr)
+            if entry is None:
+                parts.append(f"{from_curr}/{to_curr} …")
+                continue
+            rate, previous, _ = entry
+            trend = "" if previous is None or previous == rate else ("▲" if rate > previous else "▼")
+            parts.append(f"{from_curr}/{to_curr} {rate:.4f}{trend}")
+        if self.rate_feed.error:
+            parts.append("⚠️ reconnecting")
+        self.ticker_label.config(text="  │  ".join(parts))
+
+    def schedule_live_conversion(self, event=None):  # noqa: ARG002
+        """Debounce typing: convert once the user pauses"""
+        if self._live_after is not None:
+            self.root.after_cancel(self._live_after)
+        self._live_after = self.root.after(DEBOUNCE_MS, self.live_convert)
+
+    def live_convert(self):
+        """Convert the entered amount from the local rate table (Tk thread, no HTTP)"""
+        self._live_after = None
+        if not hasattr(self, 'live_label'):
+            return
+        from_curr = self.from_currency.get().strip().upper()
+        to_curr = self.to_currency.get().strip().upper()
         try:
-            # Show progress
-            self.api_result.insert(tk.END, "🛑 Stopping API server...\n")
-            self.api_result.see(tk.END)
-            self.root.update()
-
-            stopped = False
-
-            # Method 1: Try to stop the process we started
-            if self.api_process is not None:
-                try:
-                    self.api_process.terminate()
-                    self.api_process.wait(timeout=5)  # Wait up to 5 seconds
-                    self.api_process = None
-                    stopped = True
-                    self.api_result.insert(tk.END, "✅ Stopped tracked process\n")
-                except Exception as e:
-                    self.api_result.insert(tk.END, f"⚠️  Could not stop tracked process: {e}\n")
-
-            # Method 2: Kill any process on the current port (more robust)
-            if not stopped:
-                try:
-                    import subprocess
-                    # Find process on current port
-                    result = subprocess.run(
-                        ["netstat", "-ano"],
-                        capture_output=True,
-                        text=True,
-                        timeout=10
-                    )
-
-                    for line in result.stdout.split('\n'):
-                        if f':{self.api_port}' in line and ('LISTENING' in line or 'ABHÖREN' in line):
-                            # Extract PID (last column)
-                            parts = line.split()
-                            if parts:
-                                pid = parts[-1]
-                                if pid.isdigit():
-                                    try:
-                                        subprocess.run(["taskkill", "/PID", pid, "/F"],
-                                                     capture_output=True, timeout=5)
-                                        stopped = True
-                                        self.api_result.insert(tk.END, f"✅ Killed process {pid} on port {self.api_port}\n")
-                                        break
-                                    except Exception:
-                                        pass
-                except Exception as e:
-                    self.api_result.insert(tk.END, f"⚠️  Port check failed: {e}\n")
-
-            # Update GUI state
-            self.api_server_running = False
-            self.api_process = None
+            amount = float(self.api_amount.get().strip().replace(",", "."))
+        except ValueError:
+            amount = None
+        if len(from_curr) != 3 or len(to_curr) != 3 or amount is None:
+            self.live_label.config(text="")
+            return
 
-            if stopped:
-                self.update_server_status("Stopped")
-                self.api_result.insert(tk.END, "✅ API Server stopped successfully!\n")
-                self.api_result.insert(tk.END, f"{'-'*40}\n")
-                messagebox.showinfo("Success", "API Server stopped successfully!")
+        rate = self.rate_table.rate(from_curr, to_curr)
+        if rate is None:
+            if self.rate_feed is None:
+                self.live_label.config(text="Start the API server for live rates")
             else:
-                self.update_server_status("Unknown")
-                self.api_result.insert(tk.END, "⚠️  Could not confirm server was stopped\n")
-                self.api_result.insert(tk.END, "💡 Try 'Force Stop' if server is still running\n")
-                self.api_result.insert(tk.END, f"{'-'*40}\n")
-                messagebox.showwarning("Warning", "Could not confirm server was stopped. Try 'Force Stop' if needed.")
+                # Only the feed goes to the server, and only once per new pair
+                if self.rate_feed.watch(from_curr, to_curr):
+                    self.update_ticker()
+                self.live_label.config(text=f"⏳ Fetching {from_curr}/{to_curr} rate...")
+            return
+        self.live_label.config(text=f"≈ {amount * rate:,.2f} {to_curr}  (rate {rate:.4f})")
+
+    def on_server_failed(self, error):
+        """Server could not be started (Tk thread)"""
+        self.api_process = None
+        self.update_server_status("Stopped")
+        messagebox.showerror("Error", f"Failed to start server: {str(error)}")
+
+    def stop_api_server(self):
+        """Stop the FastAPI server (the shutdown runs in the background)"""
+        if self._stop_task is not None:
+            return
+        self.api_history.append("🛑 Stopping API server...\n", kind="info")
+
+        # An open rate stream would hold up the server's graceful shutdown
+        self.stop_rate_feed()
+        self.update_server_status("Stopping...")
+        self.stop_server_btn.config(state='disabled')
 
-            self.api_result.see(tk.END)
+        # The shutdown request and joining the server thread can take seconds
+        self._stop_task = self.tasks.submit(self._stop_servers, self.api_port, self.api_process,
+                                            on_done=self.on_server_stopped, on_error=self.on_stop_failed,
+                                            name="server stop")
 
+    @staticmethod
+    def _stop_servers(port, process):
+        """
+        Stop the registered server on our port and the server thread we started.
+
+        Runs on a worker thread and must not touch Tk widgets.
+
+        Returns:
+            tuple: (stopped, notes), notes being (text, kind) lines for the history
+        """
+        from ..api import lifecycle
+        stopped = False
+        notes = []
+
+        # Method 1: Shutdown endpoint of the registered server on our port
+        try:
+            if port and lifecycle.stop_server(port):
+                stopped = True
+                notes.append((f"✅ Stopped server on port {port}\n", "result"))
         except Exception as e:
-            self.api_result.insert(tk.END, f"❌ Stop failed: {str(e)}\n")
-            self.api_result.see(tk.END)
-            messagebox.showerror("Error", f"Failed to stop server: {str(e)}")
+            notes.append((f"⚠️  Shutdown request failed: {e}\n", "info"))
+
+        # Method 2: Shut down the server thread we started
+        if process is not None:
+            try:
+                if process.stop(timeout=5):
+                    stopped = True
+                    if port:
+                        lifecycle.remove_record(port)
+                else:
+                    notes.append(("⚠️  Tracked server did not stop in time\n", "info"))
+            except Exception as e:
+                notes.append((f"⚠️  Could not stop tracked server: {e}\n", "info"))
+        return stopped, notes
+
+    def on_server_stopped(self, result):
+        """The stop attempt has finished (Tk thread)"""
+        stopped, notes = result
+        self._stop_task = None
+        for text, kind in notes:
+            self.api_history.append(text, kind=kind)
+
+        # Update GUI state
+        self.api_server_running = False
+        self.api_process = None
+        self.api_client.mark(False, "server stopped")
+
+        if stopped:
+            self.update_server_status("Stopped")
+            self.api_history.append("✅ API Server stopped successfully!\n")
+            self.api_history.append(f"{'-'*40}\n")
+            messagebox.showinfo("Success", "API Server stopped successfully!")
+        else:
+            self.update_server_status("Unknown")
+            self.api_history.append("⚠️  Could not confirm server was stopped\n", kind="info")
+            self.api_history.append("💡 Try 'Force Stop' if server is still running\n", kind="info")
+            self.api_history.append(f"{'-'*40}\n")
+            messagebox.showwarning("Warning", "Could not confirm server was stopped. Try 'Force Stop' if needed.")
+
+    def on_stop_failed(self, error):
+        """The stop attempt raised (Tk thread)"""
+        self._stop_task = None
+        self.update_server_status("Unknown")
+        self.api_history.append(f"❌ Stop failed: {str(error)}\n", kind="error")
+        messagebox.showerror("Error", f"Failed to stop server: {str(error)}")
 
     def force_stop_server(self):
-        """Force stop any API server on common ports"""
-        try:
-            import subprocess
-            ports_to_check = [8000, 8001, 8002, 8003]
-            stopped_any = False
-
-            for port in ports_to_check:
-                try:
-                    # Find processes on this port
-                    result = subprocess.run(
-                        ["netstat", "-ano"],
-                        capture_output=True,
-                        text=True,
-                        timeout=10
-                    )
-
-                    for line in result.stdout.split('\n'):
-                        if f':{port}' in line and ('LISTENING' in line or 'ABHÖREN' in line):
-                            parts = line.split()
-                            if parts:
-                                pid = parts[-1]
-                                if pid.isdigit():
-                                    try:
-                                        subprocess.run(["taskkill", "/PID", pid, "/F"],
-                                                     capture_output=True, timeout=5)
-                                        stopped_any = True
-                                        print(f"Killed process {pid} on port {port}")
-                                    except Exception:
-                                        pass
-                except Exception:
-                    pass
-
-            # Reset GUI state
-            self.api_server_running = False
-            self.api_process = None
+        """Force stop every registered API server (the shutdown runs in the background)"""
+        if self._force_task is not None:
+            return
+        self.stop_rate_feed()
+        self.update_server_status("Force stopping...")
+        self.force_stop_btn.config(state='disabled')
+        self._force_task = self.tasks.submit(self._force_stop_servers, self.api_process,
+                                             on_done=self.on_force_stopped, on_error=self.on_force_stop_failed,
+                                             name="server stop")
+
+    @staticmethod
+    def _force_stop_servers(process):
+        """
+        Stop every registered server and the server thread we started.
+
+        Runs on a worker thread and must not touch Tk widgets.
+
+        Returns:
+            tuple: (results, stopped_any), results mapping port -> stopped
+        """
+        from ..api import lifecycle
+        results = lifecycle.stop_all(timeout=2)
+        stopped_any = any(results.values())
+        if process is not None:
+            stopped_any = process.stop(timeout=2) or stopped_any
+        return results, stopped_any
+
+    def on_force_stopped(self, outcome):
+        """The force stop has finished (Tk thread)"""
+        results, stopped_any = outcome
+        self._force_task = None
+        self.force_stop_btn.config(state='normal')
+
+        # Reset GUI state
+        self.api_server_running = False
+        self.api_process = None
+        self.api_client.mark(False, "server stopped")
 
-            if stopped_any:
-                self.update_server_status("Force Stopped")
-                messagebox.showinfo("Success", "Force stopped API servers on ports 8000-8003")
-            else:
-                self.update_server_status("No servers found")
-                messagebox.showinfo("Info", "No API servers found running on ports 8000-8003")
+        if stopped_any:
+            ports = ", ".join(str(port) for port, stopped in results.items() if stopped)
+            self.update_server_status("Force Stopped")
+            messagebox.showinfo("Success", f"Force stopped API servers{' on ports ' + ports if ports else ''}")
+        else:
+            self.update_server_status("No servers found")
+            messagebox.showinfo("Info", "No registered API servers found running")
 
-        except Exception as e:
-            messagebox.showerror("Error", f"Force stop failed: {str(e)}")
+    def on_force_stop_failed(self, error):
+        """The force stop raised (Tk thread)"""
+        self._force_task = None
+        self.force_stop_btn.config(state='normal')
+        self.update_server_status("Unknown")
+        messagebox.showerror("Error", f"Force stop failed: {str(error)}")
 
     def update_server_status(self, status):
         """Update server status label"""
@@ -744,104 +930,89 @@ Total: {capital + interest:,.2f} €
             self.stop_server_btn.config(state='normal')
 
     def api_convert_currency(self):
-        """Convert currency using the live API"""
-        # First check if server is actually reachable
-        if not self.check_api_server_health():
+        """Convert currency using the live API (the request runs in the background)"""
+        from_curr = self.from_currency.get().strip().upper()
+        to_curr = self.to_currency.get().strip().upper()
+        amount = self.api_amount.get().strip()
+
+        if not all([from_curr, to_curr, amount]):
+            messagebox.showerror("Error", "Please fill in all fields.")
             return
 
+        # Validate inputs
         try:
-            from_curr = self.from_currency.get().strip().upper()
-            to_curr = self.to_currency.get().strip().upper()
-            amount = self.api_amount.get().strip()
+            float(amount.replace(",", "."))
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a valid amount.")
+            return
 
-            if not all([from_curr, to_curr, amount]):
-                messagebox.showerror("Error", "Please fill in all fields.")
-                return
+        if len(from_curr) != 3 or len(to_curr) != 3:
+            messagebox.showerror("Error", "Please use 3-letter currency codes (e.g., EUR, USD).")
+            return
 
-            # Validate inputs
-            try:
-                float(amount.replace(",", "."))
-            except ValueError:
-                messagebox.showerror("Error", "Please enter a valid amount.")
-                return
-
-            if len(from_curr) != 3 or len(to_curr) != 3:
-                messagebox.showerror("Error", "Please use 3-letter currency codes (e.g., EUR, USD).")
-                return
-
-            # Show progress
-            self.api_result.insert(tk.END, f"🔄 Converting {amount} {from_curr} to {to_curr}...\n")
-            self.api_result.see(tk.END)
-            self.root.update()
-
-            # Make API request
-            url = f"http://127.0.0.1:{self.api_port}/convert"
-            params = {
-                "from_currency": from_curr,
-                "to_currency": to_curr,
-                "amount": amount
-            }
-
-            response = requests.get(url, params=params, timeout=15)
-
-            if response.status_code == 200:
-                data = response.json()
-                cached_status = "Cached" if data.get("cached", False) else "Live"
-
-                result_text = f"""✅ {cached_status} Currency Conversion:
+        # Show progress
+        self.api_history.append(f"🔄 Converting {amount} {from_curr} to {to_curr}...\n", kind="info")
+
+        # No health probe first: the client knows the server state from earlier responses
+        self.tasks.submit(self.api_client.convert, from_curr, to_curr, amount,
+                          on_done=self.show_conversion, on_error=self.show_conversion_error,
+                          name=f"{from_curr}→{to_curr}", group=CONVERSIONS)
+
+    def show_conversion(self, response):
+        """Show a conversion response (Tk thread)"""
+        if response.status_code == 200:
+            data = response.json()
+            cached_status = "Cached" if data.get("cached", False) else "Live"
+
+            result_text = f"""✅ {cached_status} Currency Conversion:
 {data['amount']} {data['from']} = {data['result']:.2f} {data['to']}
 Exchange Rate: {data['info']['rate']:.4f}
 {'-'*40}
 """
-                self.api_result.insert(tk.END, result_text)
-                self.api_result.see(tk.END)
-            else:
-                error_msg = f"❌ API Error {response.status_code}: {response.text}\n{'-'*40}\n"
-                self.api_result.insert(tk.END, error_msg)
-                self.api_result.see(tk.END)
-
-        except requests.exceptions.ConnectionError:
-            self.api_result.insert(tk.END, "❌ Connection Error: API server not reachable\n")
-            self.api_result.insert(tk.END, "💡 Try restarting the API server\n{'-'*40}\n")
-            self.api_result.see(tk.END)
-            self.api_server_running = False
-            self.update_server_status("Stopped")
-        except requests.exceptions.Timeout:
-            self.api_result.insert(tk.END, "❌ Timeout Error: API server too slow\n{'-'*40}\n")
-            self.api_result.see(tk.END)
-        except requests.exceptions.RequestException as e:
-            self.api_result.insert(tk.END, f"❌ Network Error: {str(e)}\n{'-'*40}\n")
-            self.api_result.see(tk.END)
-        except Exception as e:
-            self.api_result.insert(tk.END, f"❌ Unexpected Error: {str(e)}\n{'-'*40}\n")
-            self.api_result.see(tk.END)
-
-    def check_api_server_health(self):
-        """Check if API server is actually running and reachable"""
-        try:
-            response = requests.get(f"http://127.0.0.1:{self.api_port}/", timeout=5)
-            if response.status_code == 200:
-                return True
-            else:
-                self.api_result.insert(tk.END, f"❌ Server health check failed: {response.status_code}\n")
-                self.api_result.see(tk.END)
-                return False
-        except requests.exceptions.ConnectionError:
-            self.api_result.insert(tk.END, "❌ API server not running. Please start it first.\n")
-            self.api_result.see(tk.END)
+            self.api_history.append(result_text)
+        else:
+            error_msg = f"❌ API Error {response.status_code}: {response.text}\n{'-'*40}\n"
+            self.api_history.append(error_msg, kind="error")
+
+    def show_conversion_error(self, error):
+        """Show a failed conversion (Tk thread)"""
+        import requests  # already loaded by the request that failed
+        if isinstance(error, requests.exceptions.ConnectionError):
+            self.api_history.append("❌ Connection Error: API server not reachable\n", kind="error")
+            self.api_history.append(f"💡 Try restarting the API server\n{'-'*40}\n", kind="info")
             self.api_server_running = False
             self.update_server_status("Stopped")
-            return False
-        except Exception as e:
-            self.api_result.insert(tk.END, f"❌ Server check failed: {str(e)}\n")
-            self.api_result.see(tk.END)
-            return False
+        elif isinstance(error, requests.exceptions.Timeout):
+            self.api_history.append(f"❌ Timeout Error: API server too slow\n{'-'*40}\n", kind="error")
+        elif isinstance(error, requests.exceptions.RequestException):
+            self.api_history.append(f"❌ Network Error: {str(error)}\n{'-'*40}\n", kind="error")
+        else:
+            self.api_history.append(f"❌ {str(error)}\n{'-'*40}\n", kind="error")
+
+    def cancel_api_requests(self):
+        """Cancel all conversions in flight (server start/stop, batches and history keep running)"""
+        cancelled = self.tasks.cancel_all(CONVERSIONS)
+        if cancelled:
+            self.api_history.append(f"⏹️ Cancelled {cancelled} request(s)\n{'-'*40}\n", kind="info")
+
+    def update_activity(self, in_flight):  # noqa: ARG002
+        """Update the in-flight indicator and the cancel button for the conversions"""
+        if not hasattr(self, 'activity_label'):
+            return  # API tab not created yet
+        conversions = self.tasks.running(CONVERSIONS)
+        if conversions:
+            names = ", ".join(task.name for task in conversions)
+            self.activity_label.config(text=f"⏳ {len(conversions)} request(s) in flight: {names}")
+            self.cancel_btn.config(state='normal')
+        else:
+            self.activity_label.config(text="")
+            self.cancel_btn.config(state='disabled')
 
     def test_api_output(self):
         """Test the API output text widget"""
         try:
-            self.api_result.insert(tk.END, "\n🧪 Testing output widget...\n")
-            self.api_result.insert(tk.END, "✅ Text widget is working!\n")
+            self.api_history.append("\n🧪 Testing output widget...\n", kind="info")
+            self.api_history.append("✅ Text widget is working!\n")
 
             # Test formatted output like real API response
             test_result = f"""✅ Test Currency Conversion:
@@ -849,8 +1020,7 @@ Exchange Rate: {data['info']['rate']:.4f}
 Exchange Rate: 1.1600
 {'-'*40}
 """
-            self.api_result.insert(tk.END, test_result)
-            self.api_result.see(tk.END)
+            self.api_history.append(test_result)
 
             messagebox.showinfo("Success", "Output widget is working correctly!")
 
@@ -860,9 +1030,8 @@ Exchange Rate: 1.1600
     def clear_api_results(self):
         """Clear the API results text widget"""
         try:
-            self.api_result.delete(1.0, tk.END)
-            self.api_result.insert(tk.END, "💡 Results cleared. Ready for new conversions.\n")
-            self.api_result.insert(tk.END, f"{'-'*40}\n")
+            self.api_history.clear()
+            self.api_history.append(f"💡 Results cleared. Ready for new conversions.\n{'-'*40}\n", kind="info")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to clear results: {str(e)}")
 
@@ -874,8 +1043,7 @@ def main():
 
     # Handle window closing
     def on_closing():
-        if hasattr(app, 'api_server_running') and app.api_server_running:
-            app.stop_api_server()
+        app.shutdown()
         root.destroy()
 
     root.protocol("WM_DELETE_WINDOW", on_closing)
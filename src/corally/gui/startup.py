@@ -0,0 +1,116 @@
+"""
+Time to first paint of the GUI.
+
+``StartupTimer`` records the milestones of a GUI start: dependency check,
+imports, window built and first paint. First paint is the first
+``<Expose>`` of the main window followed by an idle round, i.e. after Tk
+has drawn it. With ``CORALLY_STARTUP_REPORT`` set, the launcher prints the
+timings as one ``STARTUP_REPORT {...}`` line. With the value ``exit`` it
+also closes the window after the first paint.
+
+``measure_startup`` starts the GUI that way in fresh interpreters. It
+measures the cold start from process spawn to the report line, including
+interpreter startup, against ``BUDGET_MS``. Run it with
+``corally bench gui`` (this needs a display).
+"""
+
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, Optional
+
+BUDGET_MS = 1000.0
+REPORT_ENV = "CORALLY_STARTUP_REPORT"
+REPORT_PREFIX = "STARTUP_REPORT "
+
+
+class StartupTimer:
+    """Milestones of one GUI start, in milliseconds since the timer was created."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.marks: Dict[str, float] = {}
+
+    def mark(self, name: str) -> float:
+        self.marks[name] = round((time.perf_counter() - self.started) * 1000, 2)
+        return self.marks[name]
+
+    def on_first_paint(self, root, callback: Optional[Callable[["StartupTimer"], None]] = None) -> None:
+        """Mark ``first_paint`` once the window has been exposed and drawn."""
+        def exposed(event=None):  # noqa: ARG001
+            if "exposed" in self.marks:
+                return
+            self.mark("exposed")
+            root.after_idle(painted)
+
+        def painted():
+            self.mark("first_paint")
+            if callback is not None:
+                callback(self)
+
+        root.bind("<Expose>", exposed, add="+")
+
+    def report(self) -> dict:
+        return {"marks_ms": dict(self.marks), "first_paint_ms": self.marks.get("first_paint")}
+
+
+def report_mode() -> Optional[str]:
+    """``None``, ``"print"`` or ``"exit"`` from ``CORALLY_STARTUP_REPORT``."""
+    value = os.getenv(REPORT_ENV, "").strip().lower()
+    if not value or value in ("0", "false", "no"):
+        return None
+    return "exit" if value == "exit" else "print"
+
+
+def print_report(timer: StartupTimer) -> None:
+    print(REPORT_PREFIX + json.dumps(timer.report()), flush=True)
+
+
+def _start_once(timeout: float) -> dict:
+    import subprocess
+
+    env = dict(os.environ, **{REPORT_ENV: "exit"})
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-m", "corally.gui.launcher"], env=env,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    try:
+        for line in process.stdout:
+            if line.startswith(REPORT_PREFIX):
+                wall_ms = (time.perf_counter() - started) * 1000
+                report = json.loads(line[len(REPORT_PREFIX):])
+                report["cold_start_ms"] = round(wall_ms, 2)
+                return report
+        stderr = process.stderr.read().strip().splitlines()
+        raise RuntimeError(f"GUI exited without a startup report: {stderr[-1] if stderr else 'no output'}")
+    finally:
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def measure_startup(budget_ms: float = BUDGET_MS, repeat: int = 3, timeout: float = 30.0) -> dict:
+    """
+    Start the GUI ``repeat`` times and compare the cold start to first paint with a budget.
+
+    Returns:
+        dict: Median and minimum cold start, the in-process milestones of
+              each run and whether the median is within the budget
+
+    Raises:
+        RuntimeError: The GUI could not be started (e.g. no display)
+    """
+    import statistics
+
+    runs = [_start_once(timeout) for _ in range(repeat)]
+    cold = [run["cold_start_ms"] for run in runs]
+    median = statistics.median(cold)
+    return {
+        "budget_ms": budget_ms,
+        "median_ms": round(median, 2),
+        "min_ms": round(min(cold), 2),
+        "runs": runs,
+        "ok": median <= budget_ms,
+    }
@@ -0,0 +1,174 @@
+"""
+Background work for the GUI.
+
+Tk widgets may only be touched from the thread running ``mainloop``. Any
+network call made there freezes the whole window until it returns.
+``BackgroundTasks`` runs blocking functions on a small thread pool and puts
+their results on a queue. The Tk thread drains that queue with
+``root.after`` and calls the result callbacks. The poll interval is one
+frame at 60 fps, and polling stops while nothing is in flight.
+
+Tasks may belong to a named group, so that one kind of work (e.g. the
+conversions behind a Cancel button) can be listed and cancelled without
+touching the others.
+
+Cancelled tasks never call their callbacks. A function that is already
+running cannot be interrupted, so it should check ``task.cancelled`` (or
+accept a short timeout) if it wants to stop early.
+"""
+
+import itertools
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+FRAME_MS = 16  # one frame at 60 fps
+
+
+class Task:
+    """A unit of work submitted to ``BackgroundTasks``."""
+
+    def __init__(self, task_id: int, name: str, on_done: Optional[Callable[[Any], None]],
+                 on_error: Optional[Callable[[BaseException], None]], group: str = ""):
+        self.id = task_id
+        self.name = name
+        self.group = group
+        self.on_done = on_done
+        self.on_error = on_error
+        self.cancelled = threading.Event()
+        self.future = None
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+        if self.future is not None:
+            self.future.cancel()  # only succeeds if it has not started yet
+
+
+class BackgroundTasks:
+    """
+    Thread pool whose results are delivered on the Tk thread.
+
+    Features:
+    - Results and errors are passed to callbacks via a queue polled with ``root.after``
+    - In-flight count and a change callback for activity indicators
+    - Cancellation of single tasks, of one group, or all of them
+    """
+
+    def __init__(self, root, max_workers: int = 4, poll_ms: int = FRAME_MS,
+                 on_change: Optional[Callable[[int], None]] = None):
+        """
+        Args:
+            root: Tk root (anything with ``after`` and ``after_cancel``)
+            max_workers (int): Threads running blocking work
+            poll_ms (int): Milliseconds between result queue polls
+            on_change: Called on the Tk thread with the new in-flight count
+        """
+        self.root = root
+        self.poll_ms = poll_ms
+        self.on_change = on_change
+        self.max_workers = max_workers
+        self._executor = None
+        self.results: "queue.Queue" = queue.Queue()
+        self.tasks: Dict[int, Task] = {}
+        self._ids = itertools.count(1)
+        self._poll_id = None
+
+    @property
+    def executor(self):
+        """Thread pool, created with the first task (keeps it out of GUI startup)."""
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="gui-worker")
+        return self._executor
+
+    @property
+    def in_flight(self) -> int:
+        return len(self.tasks)
+
+    def running(self, group: Optional[str] = None) -> List[Task]:
+        """Return the tasks in flight, only those of ``group`` if given."""
+        return [task for task in self.tasks.values() if group is None or task.group == group]
+
+    def submit(self, func: Callable[..., Any], *args, on_done: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[BaseException], None]] = None, name: str = "",
+               group: str = "") -> Task:
+        """
+        Run ``func(*args)`` on the pool (call from the Tk thread).
+
+        Args:
+            func: Blocking function; it must not touch Tk widgets
+            on_done: Called on the Tk thread with the return value
+            on_error: Called on the Tk thread with the raised exception
+            name (str): Label for activity indicators
+            group (str): Group for ``running`` and ``cancel_all``
+
+        Returns:
+            Task: Handle for cancellation
+        """
+        task = Task(next(self._ids), name or getattr(func, "__name__", "task"), on_done, on_error, group)
+        self.tasks[task.id] = task
+        task.future = self.executor.submit(self._run, task, func, args)
+        self._changed()
+        self._schedule()
+        return task
+
+    def _run(self, task: Task, func: Callable[..., Any], args: tuple) -> None:
+        if task.cancelled.is_set():
+            return
+        try:
+            self.results.put((task, True, func(*args)))
+        except BaseException as e:  # delivered to on_error on the Tk thread
+            self.results.put((task, False, e))
+
+    def cancel(self, task: Task) -> None:
+        """Cancel a task; its callbacks will not be called."""
+        task.cancel()
+        if self.tasks.pop(task.id, None) is not None:
+            self._changed()
+
+    def cancel_all(self, group: Optional[str] = None) -> int:
+        """Cancel the tasks in flight (only those of ``group`` if given) and return how many there were."""
+        tasks = self.running(group)
+        for task in tasks:
+            task.cancel()
+            del self.tasks[task.id]
+        if tasks:
+            self._changed()
+        return len(tasks)
+
+    def poll(self) -> None:
+        """Deliver finished results; reschedules itself while tasks are in flight."""
+        self._poll_id = None
+        delivered = False
+        while True:
+            try:
+                task, ok, value = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if self.tasks.pop(task.id, None) is None:
+                continue  # cancelled
+            delivered = True
+            callback = task.on_done if ok else task.on_error
+            if callback is not None:
+                callback(value)
+        if delivered:
+            self._changed()
+        self._schedule()
+
+    def _schedule(self) -> None:
+        if self.tasks and self._poll_id is None:
+            self._poll_id = self.root.after(self.poll_ms, self.poll)
+
+    def _changed(self) -> None:
+        if self.on_change is not None:
+            self.on_change(self.in_flight)
+
+    def shutdown(self) -> None:
+        """Cancel everything and release the worker threads without waiting."""
+        self.cancel_all()
+        if self._poll_id is not None:
+            self.root.after_cancel(self._poll_id)
+            self._poll_id = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,186 @@
+"""
+Local rate table and rate feed for live conversion while typing.
+
+Converting on every keystroke through ``/convert`` would send one HTTP
+request per key. Instead the GUI keeps a ``RateTable`` of the watched
+currency pairs and converts locally; typing never touches the network.
+A ``RateFeed`` thread keeps the table current:
+
+- through the server's ``/stream`` (Server-Sent Events), which pushes a
+  pair's rate whenever the server refreshes it
+- or, if the server has no stream, by fetching all watched pairs with one
+  ``/convert/batch`` request every ``POLL_INTERVAL`` seconds
+
+The feed never touches Tk widgets. The Tk thread checks ``RateTable.version``
+on a timer and redraws when it has changed.
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+Pair = Tuple[str, str]
+
+DEFAULT_PAIRS: List[Pair] = [("EUR", "USD"), ("EUR", "GBP"), ("EUR", "JPY")]
+MAX_PAIRS = 8  # watched pairs; the oldest pair typed by the user is dropped first
+POLL_INTERVAL = 30.0  # seconds between snapshots when the server cannot push
+RETRY_INTERVAL = 2.0  # seconds before reconnecting after an error or a closed stream
+
+
+class RateTable:
+    """
+    Thread-safe table of the latest known rates.
+
+    Features:
+    - ``version`` counter so readers can skip redraws when nothing changed
+    - The previous rate per pair, for up/down indicators
+    - Conversions through the direct or the inverse pair
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rates: Dict[Pair, Tuple[float, Optional[float], float]] = {}
+        self.version = 0
+
+    def update(self, from_currency: str, to_currency: str, rate: float,
+               timestamp: Optional[float] = None) -> None:
+        pair = (from_currency.upper(), to_currency.upper())
+        with self._lock:
+            previous = self._rates.get(pair)
+            if previous is not None and previous[0] == rate:
+                return
+            self._rates[pair] = (rate, previous[0] if previous else None, timestamp or time.time())
+            self.version += 1
+
+    def get(self, from_currency: str, to_currency: str) -> Optional[Tuple[float, Optional[float], float]]:
+        """Return (rate, previous rate, timestamp) of a pair, or None."""
+        with self._lock:
+            return self._rates.get((from_currency.upper(), to_currency.upper()))
+
+    def rate(self, from_currency: str, to_currency: str) -> Optional[float]:
+        """Rate of a pair, derived from the inverse pair if needed."""
+        from_currency, to_currency = from_currency.upper(), to_currency.upper()
+        if from_currency == to_currency:
+            return 1.0
+        direct = self.get(from_currency, to_currency)
+        if direct:
+            return direct[0]
+        inverse = self.get(to_currency, from_currency)
+        if inverse and inverse[0]:
+            return 1 / inverse[0]
+        return None
+
+    def convert(self, amount: float, from_currency: str, to_currency: str) -> Optional[float]:
+        rate = self.rate(from_currency, to_currency)
+        return None if rate is None else amount * rate
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rates.clear()
+            self.version += 1
+
+
+class RateFeed:
+    """Background thread that keeps a ``RateTable`` current for the watched pairs."""
+
+    def __init__(self, client, table: RateTable, pairs: Iterable[Pair] = DEFAULT_PAIRS,
+                 interval: float = POLL_INTERVAL):
+        """
+        Args:
+            client: ``ApiClient`` of the running server
+            table (RateTable): Table to update
+            pairs: Pairs to watch initially
+            interval (float): Seconds between snapshots in polling mode
+        """
+        self.client = client
+        self.table = table
+        self.interval = interval
+        self.pairs: List[Pair] = list(pairs)
+        self.mode = "stream"  # switches to "poll" if the server has no /stream
+        self.error: Optional[str] = None
+        self._stop = threading.Event()
+        self._changed = threading.Event()
+        self._response = None  # open stream response, closed to interrupt the feed
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "RateFeed":
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="rate-feed", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 1.0) -> None:
+        self._stop.set()
+        self._interrupt()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def watch(self, from_currency: str, to_currency: str) -> bool:
+        """
+        Add a pair to the watched set (call from any thread).
+
+        Returns:
+            bool: True if the pair is new; the feed then fetches it at once
+        """
+        pair = (from_currency.upper(), to_currency.upper())
+        if pair in self.pairs or pair[::-1] in self.pairs:
+            return False
+        pairs = self.pairs + [pair]
+        if len(pairs) > MAX_PAIRS:
+            del pairs[len(DEFAULT_PAIRS)]  # keep the defaults, drop the oldest typed pair
+        self.pairs = pairs
+        self._interrupt()
+        return True
+
+    def _interrupt(self) -> None:
+        """Wake the feed: ends a blocking stream read or a poll wait."""
+        self._changed.set()
+        response = self._response
+        if response is not None:
+            response.close()
+
+    def _run(self) -> None:
+        import requests  # loaded on the feed thread, not at GUI startup
+
+        while not self._stop.is_set():
+            self._changed.clear()
+            pairs = list(self.pairs)
+            try:
+                if self.mode == "stream":
+                    self._stream(pairs)
+                    if not self._changed.is_set():
+                        # The server ended the stream, e.g. while shutting down: back off as after an error
+                        self._stop.wait(RETRY_INTERVAL)
+                else:
+                    for (from_currency, to_currency), rate in self.client.rates(pairs).items():
+                        self.table.update(from_currency, to_currency, rate)
+                    self.error = None
+                    self._changed.wait(self.interval)
+            except requests.exceptions.HTTPError as e:
+                if self.mode == "stream" and e.response is not None and e.response.status_code == 404:
+                    self.mode = "poll"  # server without push
+                    continue
+                self._failed(e)
+            except Exception as e:  # connection lost, or the stream was closed by _interrupt
+                if not self._changed.is_set():
+                    self._failed(e)
+
+    def _stream(self, pairs: List[Pair]) -> None:
+        self._response = self.client.open_stream(pairs)
+        try:
+            if self._changed.is_set():
+                return  # pairs changed while connecting
+            self.error = None
+            for from_currency, to_currency, rate, timestamp in self.client.iter_rate_events(self._response):
+                self.table.update(from_currency, to_currency, rate, timestamp)
+        finally:
+            response, self._response = self._response, None
+            response.close()
+
+    def _failed(self, error: Exception) -> None:
+        self.error = str(error)
+        self._stop.wait(RETRY_INTERVAL)
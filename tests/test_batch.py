@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests for batch currency conversion
+"""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from corally.api.batch import convert_batch, parse_batch
+
+
+def test_parse_item_and_columnar_payloads():
+    """Both payload shapes parse to the same items"""
+    rows = parse_batch([
+        {"from": "eur", "to": "usd", "amount": "1,5"},
+        {"from": "EUR", "to": "GBP", "amount": 2},
+    ])
+    columns = parse_batch({"from": ["EUR", "EUR"], "to": ["USD", "GBP"], "amount": [1.5, 2]})
+    assert rows == columns == [("EUR", "USD", 1.5), ("EUR", "GBP", 2.0)]
+
+    broadcast = parse_batch({"from": "EUR", "to": "USD", "amount": [1, 2, 3]})
+    assert [item[2] for item in broadcast] == [1.0, 2.0, 3.0]
+
+
+def test_parse_rejects_malformed_payload():
+    """A payload that is not a batch at all fails as a whole"""
+    with pytest.raises(HTTPException):
+        parse_batch({"something": "else"})
+    with pytest.raises(HTTPException):
+        parse_batch({"from": ["EUR"], "to": ["USD", "GBP"], "amount": [1, 2]})
+
+
+def test_convert_batch_resolves_each_pair_once():
+    """Rates are resolved once per pair and item errors stay per item"""
+    calls = []
+
+    async def resolve_rate(from_currency, to_currency):
+        calls.append((from_currency, to_currency))
+        if to_currency == "XXX":
+            raise HTTPException(status_code=400, detail="Currency XXX not supported")
+        return 2.0, False
+
+    payload = [
+        {"from": "EUR", "to": "USD", "amount": 1},
+        {"from": "EUR", "to": "USD", "amount": 2.5},
+        {"from": "EUR", "to": "XXX", "amount": 1},
+        {"from": "EUR", "to": "USD", "amount": "abc"},
+    ]
+    batch = asyncio.run(convert_batch(payload, resolve_rate, digits=2))
+
+    assert sorted(calls) == [("EUR", "USD"), ("EUR", "XXX")]
+    assert batch["count"] == 4
+    assert batch["errors"] == 2
+    assert [r.get("result") for r in batch["results"]] == [2.0, 5.0, None, None]
+    assert batch["results"][2]["error"] == "Currency XXX not supported"
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming CSV batch conversion (core.batch)
+"""
+
+import csv
+import threading
+
+import pytest
+
+from corally.core import CurrencyConverter, InterestCalculator
+from corally.core.batch import BatchProgress, currency_processor, interest_processor, process_csv
+
+
+def test_chunk_paths_match_single_calls():
+    amounts = ["100", "2,5", 7, "x", ""]
+    assert CurrencyConverter.convert_many(amounts, "eur_to_usd") == [
+        CurrencyConverter.eur_to_usd(100), CurrencyConverter.eur_to_usd(2.5), CurrencyConverter.eur_to_usd(7),
+        None, None]
+    assert CurrencyConverter.convert_many(["117"], "usd_to_eur") == [CurrencyConverter.usd_to_eur(117)]
+    with pytest.raises(ValueError):
+        CurrencyConverter.convert_many([1], "eur_to_chf")
+
+    rows = [("10000", "3.5", "01.01.2024", "31.12.2024", method) for method in InterestCalculator.VALID_METHODS]
+    expected = [InterestCalculator.calculate_interest(10000, 3.5, "01.01.2024", "31.12.2024", method)
+                for method in InterestCalculator.VALID_METHODS]
+    assert InterestCalculator.calculate_many(rows) == expected
+    results = InterestCalculator.calculate_many([("1000", "2", "01.01.2024", "bad"), ("1000", "2", "01.01.2024",
+                                                                                        "01.02.2024", "")])
+    assert isinstance(results[0], str)
+    assert results[1] == InterestCalculator.calculate_interest(1000, 2, "01.01.2024", "01.02.2024")
+
+
+def test_currency_csv_streams_in_chunks(tmp_path):
+    src = tmp_path / "amounts.csv"
+    with open(src, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "Amount"])
+        for i in range(2500):
+            writer.writerow([i, "oops" if i == 7 else i])
+    dst = tmp_path / "out.csv"
+    progress = process_csv(str(src), str(dst), currency_processor("eur_to_usd"), chunk_rows=1000)
+
+    assert progress.rows == 2500 and progress.errors == 1
+    assert progress.fraction == 1.0 and not progress.cancelled
+    with open(dst, newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["id", "Amount", "USD", "error"]
+    assert rows[2] == ["1", "1", "1.17", ""]
+    assert rows[8][2:] == ["", "Invalid amount 'oops'"]
+    assert len(rows) == 2501
+    assert not (tmp_path / "out.csv.part").exists()
+
+
+def test_interest_csv_with_semicolons(tmp_path):
+    src = tmp_path / "loans.csv"
+    src.write_text("﻿Capital;Rate;Start;End\n1000,50;2;01.01.2024;01.07.2024\n", encoding="utf-8")
+    dst = tmp_path / "out.csv"
+    process_csv(str(src), str(dst), interest_processor("30/360"))
+    header, row = list(csv.reader(open(dst, newline=""), delimiter=";"))
+    assert header == ["Capital", "Rate", "Start", "End", "interest", "total", "error"]
+    assert row[4:] == ["10.01", "1010.51", ""]
+
+
+def test_cancel_removes_partial_output(tmp_path):
+    src = tmp_path / "amounts.csv"
+    src.write_text("amount\n" + "1\n" * 5000)
+    dst = tmp_path / "out.csv"
+    cancel = threading.Event()
+    progress = BatchProgress()
+
+    def processor(header):
+        extra, process = currency_processor("eur_to_gbp")(header)
+
+        def stop_after_first(rows):
+            cancel.set()
+            return process(rows)
+
+        return extra, stop_after_first
+
+    process_csv(str(src), str(dst), processor, chunk_rows=1000, progress=progress, cancel=cancel)
+    assert progress.cancelled and progress.rows == 1000
+    assert progress.finished is not None
+    assert not dst.exists() and not (tmp_path / "out.csv.part").exists()
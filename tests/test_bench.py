@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for the API load-test harness
+"""
+
+import logging
+import random
+import time
+
+import pytest
+
+from corally.api.bench import Workload, ZipfSampler, parse_mix, run_benchmark
+
+
+def test_parse_mix():
+    assert parse_mix("convert=0.8,batch=0.2") == {"convert": 0.8, "batch": 0.2}
+    with pytest.raises(ValueError):
+        parse_mix("upload=1")
+
+
+def test_zipf_prefers_low_ranks():
+    sampler = ZipfSampler(100, 1.2, random.Random(0))
+    draws = [sampler.sample() for _ in range(5000)]
+    assert draws.count(0) > draws.count(50) * 10
+    assert max(draws) < 100
+
+
+def test_workload_is_reproducible():
+    first = Workload(requests=50, seed=7).requests
+    assert first == Workload(requests=50, seed=7).requests
+    assert first != Workload(requests=50, seed=8).requests
+
+
+def test_run_benchmark_in_process():
+    """A small in-process run against the mock upstream reports the key figures"""
+    report = run_benchmark(server="free", requests=200, concurrency=8, mix={"convert": 1.0}, pairs=3, amounts=5)
+    assert report["requests"] == 200
+    assert report["errors"] == 0
+    assert report["status"] == {"200": 200}
+    assert report["cache_hit_ratio"] > 0.5
+    assert 0 < report["upstream_calls"] < 200
+    assert report["latency_ms"]["p50"] <= report["latency_ms"]["p99"]
+
+
+def test_run_benchmark_leaves_server_state_alone(tmp_path, monkeypatch):
+    """The run uses its own cache and upstream and writes nothing to the working directory"""
+    from corally.api import free_server
+
+    monkeypatch.chdir(tmp_path)
+    state = (free_server.ENGINE, free_server.CACHE, free_server.RATES, free_server.upstream)
+    free_server.CACHE["free:bench-marker"] = {"timestamp": time.time(), "data": {}}
+    try:
+        report = run_benchmark(server="free", requests=50, concurrency=4, mix={"convert": 1.0}, pairs=2, amounts=3)
+        assert report["errors"] == 0
+        assert (free_server.ENGINE, free_server.CACHE, free_server.RATES, free_server.upstream) == state
+        assert "free:bench-marker" in free_server.CACHE
+        assert list(tmp_path.iterdir()) == []
+    finally:
+        if "free:bench-marker" in free_server.CACHE:
+            del free_server.CACHE["free:bench-marker"]
+
+
+def test_paid_server_logs_requests(caplog):
+    """The paid server logs its requests like the free one"""
+    caplog.set_level(logging.INFO)
+    run_benchmark(server="paid", requests=20, concurrency=2, mix={"convert": 0.5, "batch": 0.5}, pairs=1, amounts=1)
+    messages = [record.getMessage() for record in caplog.records]
+    assert any(m.startswith("Umrechnung angefragt") for m in messages)
+    assert any(m.startswith("Batch-Umrechnung") for m in messages)
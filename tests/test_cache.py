@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests for the bounded in-memory rate cache
+"""
+
+from corally.api.cache import RateCache
+
+
+def make_entry(amount, timestamp):
+    return {
+        "timestamp": timestamp,
+        "data": {"from": "EUR", "to": "USD", "amount": amount, "result": amount * 1.1,
+                 "info": {"rate": 1.1}},
+    }
+
+
+def test_lru_eviction_by_entry_count():
+    """The least recently used entry is evicted first"""
+    cache = RateCache(max_entries=2)
+    cache["a"] = make_entry(1.0, 0)
+    cache["b"] = make_entry(2.0, 0)
+    cache.get("a")  # "b" is now least recently used
+    cache["c"] = make_entry(3.0, 0)
+
+    assert list(cache) == ["a", "c"]
+    assert cache.evictions == 1
+
+
+def test_byte_budget():
+    """The byte budget bounds the cache independently of the entry count"""
+    cache = RateCache(max_entries=None, max_bytes=3000)
+    for i in range(100):
+        cache[f"EUR-USD-{i}"] = make_entry(float(i), 0)
+
+    assert 0 < cache.bytes <= 3000
+    assert len(cache) < 100
+    assert cache.evictions == 100 - len(cache)
+
+
+def test_expire_only_removes_due_entries():
+    """Expiry follows timestamps, including ones updated in place"""
+    cache = RateCache(max_age=10)
+    cache["old"] = make_entry(1.0, 100)
+    cache["new"] = make_entry(2.0, 105)
+    cache["refreshed"] = make_entry(3.0, 100)
+    cache["refreshed"]["timestamp"] = 108  # e.g. a background refresh
+
+    assert cache.expire(now=111) == ["old"]
+    assert set(cache) == {"new", "refreshed"}
+    assert cache.expire(now=116) == ["new"]
+    assert cache.expire(now=119) == ["refreshed"]
+    assert cache.expirations == 3
+    assert cache.bytes == 0
+
+
+def test_stats():
+    """Counters are reported with the hit ratio"""
+    cache = RateCache()
+    cache.hits, cache.stale_hits, cache.misses = 6, 2, 2
+    stats = cache.stats()
+    assert stats["hit_ratio"] == 0.8
+    assert stats["entries"] == 0
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for the pooled API client
+"""
+
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from corally.api.client import ApiClient, ServerUnavailable
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        self.server.clients.add(self.client_address)
+        body = json.dumps({"from": "EUR", "to": "USD", "amount": 1.0, "result": 1.1,
+                           "info": {"rate": 1.1}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.paths, httpd.clients = [], set()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_conversions_reuse_one_connection_without_probes(server):
+    client = ApiClient(f"http://127.0.0.1:{server.server_address[1]}")
+    for _ in range(3):
+        assert client.convert("EUR", "USD", 1).json()["result"] == 1.1
+    assert client.check_health()  # answered from the cached state
+
+    assert [path.split("?")[0] for path in server.paths] == ["/convert"] * 3
+    assert len(server.clients) == 1
+    client.close()
+
+
+def test_refused_connection_fails_fast_until_ttl():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]  # nothing listens here afterwards
+    client = ApiClient(f"http://127.0.0.1:{port}", health_ttl=60)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.convert("EUR", "USD", 1)
+    assert client.is_healthy() is False
+    with pytest.raises(ServerUnavailable):
+        client.convert("EUR", "USD", 1)
+    assert client.requests == 1
+
+    client.set_port(port)  # e.g. a server was started: state is unknown again
+    assert client.is_healthy() is None
+    client.close()
+
+
+def test_health_probe_uses_health_endpoint(server):
+    """The explicit probe asks /health, which both apps serve"""
+    client = ApiClient(f"http://127.0.0.1:{server.server_address[1]}")
+    assert client.check_health(force=True)
+    assert server.paths == ["/health"]
+    assert client.is_healthy() is True
+    client.close()
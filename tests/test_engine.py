@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared rate engine serving several providers
+"""
+
+import asyncio
+import csv
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from corally.api.engine import RateEngine
+from corally.api.shared_cache import SQLiteRateStore
+
+
+def entry(from_currency, to_currency, amount, rate, timestamp=None):
+    return {"from": from_currency, "to": to_currency, "amount": amount,
+            "result": amount * rate, "info": {"rate": rate}}
+
+
+def test_providers_share_one_cache_file(tmp_path):
+    """Both providers end up in one CSV, written by one flush"""
+    path = str(tmp_path / "cache.csv")
+    engine = RateEngine(path)
+    free, paid = engine.provider("free", digits=2), engine.provider("paid")
+
+    free.set(free.key("EUR", "USD", 1.0), entry("EUR", "USD", 1.0, 1.1))
+    paid.set(paid.key("EUR", "USD", 1.0), entry("EUR", "USD", 1.0, 1.2))
+    assert engine.writer.flush(timeout=5)
+    engine.writer.stop()
+    assert engine.writer.flushes == 1
+
+    with open(path, newline="") as f:
+        rows = {row["provider"]: float(row["rate"]) for row in csv.DictReader(f)}
+    assert rows == {"free": 1.1, "paid": 1.2}
+
+    reloaded = RateEngine(path)
+    reloaded.load()
+    assert asyncio.run(reloaded.provider("paid").get("paid:EUR-USD-1.0"))[0]["info"]["rate"] == 1.2
+    assert asyncio.run(reloaded.provider("free").get("free:EUR-USD-1.0"))[0]["info"]["rate"] == 1.1
+
+
+def test_apply_rate_stays_in_namespace(tmp_path):
+    engine = RateEngine(str(tmp_path / "cache.csv"))
+    free, paid = engine.provider("free", digits=2), engine.provider("paid")
+    free.set(free.key("EUR", "USD", 3.0), entry("EUR", "USD", 3.0, 1.1))
+    paid.set(paid.key("EUR", "USD", 3.0), entry("EUR", "USD", 3.0, 1.1))
+
+    free.apply_rate("EUR", "USD", 1.23456, time.time())
+    assert asyncio.run(free.get("free:EUR-USD-3.0"))[0]["result"] == 3.7
+    assert asyncio.run(paid.get("paid:EUR-USD-3.0"))[0]["info"]["rate"] == 1.1
+    assert asyncio.run(free.get("free:EUR-USD-1.0"))[0]["info"]["rate"] == 1.23456
+    engine.writer.stop()
+
+
+def test_legacy_rows_are_adopted_by_each_provider(tmp_path):
+    path = tmp_path / "cache.csv"
+    path.write_text(f"from,to,amount,result,rate,timestamp\nEUR,GBP,1.0,0.85,0.85,{time.time()}\n")
+    engine = RateEngine(str(path))
+    free = engine.provider("free")
+    engine.load()
+    paid = engine.provider("paid")
+    assert asyncio.run(free.get("free:EUR-GBP-1.0"))[0]["info"]["rate"] == 0.85
+    assert asyncio.run(paid.get("paid:EUR-GBP-1.0"))[0]["info"]["rate"] == 0.85
+
+
+def test_shared_update_pair_respects_prefix(tmp_path):
+    store = SQLiteRateStore(str(tmp_path / "cache.db"))
+    now = time.time()
+    for key in ("free:EUR-USD-2.0", "paid:EUR-USD-2.0"):
+        store.put(key, {"timestamp": now, "data": entry("EUR", "USD", 2.0, 1.0)})
+    assert store.update_pair("EUR", "USD", 2.0, now + 1, key_prefix="free:") == 1
+    assert store.get("paid:EUR-USD-2.0")["data"]["info"]["rate"] == 1.0
+    store.close()
+
+
+def test_shared_reads_run_off_the_event_loop(tmp_path):
+    """A local miss reads the shared store on an executor thread"""
+    store = SQLiteRateStore(str(tmp_path / "cache.db"))
+    store.put("free:EUR-USD-1.0", {"timestamp": time.time(), "data": entry("EUR", "USD", 1.0, 1.1)})
+    threads = []
+    read = store.get
+    store.get = lambda key: threads.append(threading.get_ident()) or read(key)
+    engine = RateEngine(str(tmp_path / "cache.csv"), shared=store)
+    free = engine.provider("free")
+
+    data, stale = asyncio.run(free.get("free:EUR-USD-1.0"))
+    assert data["info"]["rate"] == 1.1 and not stale
+    assert threads and threading.get_ident() not in threads
+    asyncio.run(free.get("free:EUR-USD-1.0"))  # fresh local entry: no store read
+    assert len(threads) == 1
+
+    rate, _ = asyncio.run(free.recent_shared_rate("EUR", "USD", max_age=60))
+    assert rate == 1.1 and len(threads) == 2 and threading.get_ident() not in threads
+
+
+def test_background_load_keeps_newer_entries(tmp_path):
+    """Rows are merged in chunks while requests already write newer entries"""
+    path = tmp_path / "cache.csv"
+    now = time.time()
+    rows = "".join(f"free,EUR,USD,{i}.0,{i * 1.1},1.1,{now - 60}\n" for i in range(1, 51))
+    path.write_text("provider,from,to,amount,result,rate,timestamp\n" + rows)
+    engine = RateEngine(str(path))
+    free = engine.provider("free", digits=2)
+
+    async def run():
+        task = engine.start_loading(chunk_size=7)
+        free.set(free.key("EUR", "USD", 1.0), entry("EUR", "USD", 1.0, 1.2))
+        await task
+
+    asyncio.run(run())
+    assert engine.loaded and engine.stats()["loading"]["entries"] == 50
+    assert len(free) == 50
+    assert asyncio.run(free.get("free:EUR-USD-1.0"))[0]["info"]["rate"] == 1.2
+
+    # The write requested during loading was deferred and includes every row
+    assert engine.writer.flush(timeout=5)
+    engine.writer.stop()
+    with open(path, newline="") as f:
+        assert len(list(csv.DictReader(f))) == 50
+
+
+def test_importing_servers_has_no_side_effects(tmp_path):
+    code = "import corally.api, corally.api.server, corally.api.free_server, logging; " \
+           "assert not logging.getLogger().handlers"
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, check=True)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_env_settings_are_read_on_startup(tmp_path):
+    """Settings from .env, loaded by the startup hook, reach the upstream and the cache"""
+    code = (
+        "import asyncio, pathlib; from corally.api import server, free_server\n"
+        "pathlib.Path('.env').write_text('API_BASE_URL=http://paid.test/convert\\n'"
+        " 'FREE_API_ENDPOINTS=http://free.test/v4/latest/\\nCACHE_MAX_ENTRIES=5\\n')\n"
+        "async def run():\n"
+        "    await free_server.start_background_tasks(); await server.start_background_tasks()\n"
+        "    await server.stop_background_tasks(); await free_server.stop_background_tasks()\n"
+        "asyncio.run(run())\n"
+        "assert server.upstream.url == 'http://paid.test/convert'\n"
+        "assert [p.url for p in free_server.upstream.providers] == ['http://free.test/v4/latest/']\n"
+        "assert server.CACHE.max_entries == free_server.CACHE.max_entries == 5\n"
+    )
+    env = {k: v for k, v in os.environ.items()
+           if k not in ("API_BASE_URL", "FREE_API_ENDPOINTS", "CACHE_MAX_ENTRIES", "CACHE_BACKEND")}
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, check=True)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for the GUI background task runner (no display needed)
+"""
+
+import threading
+import time
+
+from corally.gui.tasks import BackgroundTasks
+
+
+class FakeRoot:
+    """Collects after() callbacks; pump() runs the due ones like Tk's event loop"""
+
+    def __init__(self):
+        self.pending = {}
+        self.ids = 0
+
+    def after(self, ms, func):
+        self.ids += 1
+        self.pending[self.ids] = func
+        return self.ids
+
+    def after_cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+    def pump(self, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while self.pending and time.monotonic() < deadline:
+            for after_id in list(self.pending):
+                self.pending.pop(after_id)()
+            time.sleep(0.005)
+
+
+def test_results_are_delivered_on_the_polling_thread():
+    root = FakeRoot()
+    counts = []
+    tasks = BackgroundTasks(root, on_change=counts.append)
+    results, errors, threads = [], [], []
+
+    def work(x):
+        threads.append(threading.current_thread().name)
+        return x * 2
+
+    def fail():
+        raise ValueError("boom")
+
+    tasks.submit(work, 21, on_done=lambda value: results.append((value, threading.current_thread().name)))
+    tasks.submit(fail, on_error=errors.append)
+    assert tasks.in_flight == 2
+    root.pump()
+
+    assert results == [(42, threading.current_thread().name)]
+    assert threads[0].startswith("gui-worker")
+    assert isinstance(errors[0], ValueError)
+    assert tasks.in_flight == 0 and counts[-1] == 0
+    assert not root.pending  # polling stops when idle
+    tasks.shutdown()
+
+
+def test_cancelled_tasks_do_not_call_back():
+    root = FakeRoot()
+    tasks = BackgroundTasks(root)
+    release = threading.Event()
+    results = []
+
+    tasks.submit(release.wait, 5, on_done=results.append)
+    assert tasks.cancel_all() == 1
+    release.set()
+    tasks.submit(lambda: "done", on_done=results.append)
+    root.pump()
+    assert results == ["done"]
+    tasks.shutdown()
+
+
+def test_cancelling_a_group_leaves_other_tasks_running():
+    """Cancelling the conversions must not drop a server start or a batch"""
+    root = FakeRoot()
+    tasks = BackgroundTasks(root)
+    release = threading.Event()
+    results = []
+
+    tasks.submit(release.wait, 5, on_done=results.append, name="EUR→USD", group="conversion")
+    tasks.submit(lambda: release.wait(5) and "started", on_done=results.append, name="server start")
+    assert [task.name for task in tasks.running("conversion")] == ["EUR→USD"]
+
+    assert tasks.cancel_all("conversion") == 1
+    assert tasks.running("conversion") == [] and tasks.in_flight == 1
+    release.set()
+    root.pump()
+    assert results == ["started"]
+    tasks.shutdown()
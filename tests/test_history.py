@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Tests for the bounded result panes and the paged calculation log
+"""
+
+from corally.core import CalcLog, CalculatorCore
+from corally.gui.history import HistoryPane
+
+
+class FakeText:
+    """Minimal Tk Text: line-based insert/delete at "end" and "<line>.0" indices"""
+
+    def __init__(self):
+        self.text = ""
+        self.idle = []
+        self.inserts = 0
+
+    def after_idle(self, func):
+        self.idle.append(func)
+        return len(self.idle)
+
+    def after_cancel(self, after_id):
+        self.idle[after_id - 1] = None
+
+    def run_idle(self):
+        idle, self.idle = self.idle, []
+        for func in idle:
+            if func:
+                func()
+
+    def insert(self, index, text):
+        assert index == "end"
+        self.inserts += 1
+        self.text += text
+
+    def delete(self, start, end):
+        assert start == "1.0"
+        if end == "end":
+            self.text = ""
+        else:
+            lines = int(end.split(".")[0]) - 1
+            self.text = "".join(self.text.splitlines(keepends=True)[lines:])
+
+    def see(self, index):
+        pass
+
+
+def test_pane_coalesces_and_trims():
+    widget = FakeText()
+    pane = HistoryPane(widget, max_rows=3)
+    for i in range(5):
+        pane.append(f"row {i}")
+    assert widget.text == ""  # nothing drawn before Tk is idle
+    assert len(widget.idle) == 1
+    widget.run_idle()
+    assert widget.inserts == 1
+    assert widget.text == "row 2\nrow 3\nrow 4\n"
+
+    pane.append("multi\nline\n", kind="info")
+    widget.run_idle()
+    assert widget.text == "row 3\nrow 4\nmulti\nline\n"
+    assert [entry.kind for entry in pane.entries] == ["result", "result", "info"]
+
+    pane.append("pending")
+    pane.clear()
+    widget.run_idle()
+    assert widget.text == "" and not pane.entries
+
+
+def test_calc_log_pages(tmp_path):
+    path = tmp_path / "rechner_log.csv"
+    calc = CalculatorCore(str(path))
+    for i in range(25):
+        calc.add(i, 1)
+
+    log = CalcLog(str(path), page_size=10)
+    assert log.refresh() == 25
+    assert log.pages == 3
+    assert [row.a for row in log.page(0)][:2] == ["0.0", "1.0"]
+    newest = log.page(-1)
+    assert len(newest) == 5
+    assert newest[-1].result == "25.0" and newest[-1].operator == "+"
+
+    # appended rows are indexed incrementally, partial rows are skipped
+    calc.multiply(2, 3)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("1.0,+,2")
+    assert log.refresh() == 26
+    assert log.page(-1)[-1].result == "6.0"
+
+    # a replaced log is re-indexed
+    path.unlink()
+    CalculatorCore(str(path)).subtract(5, 3)
+    assert log.refresh() == 1
+    assert log.page(0)[0].result == "2.0"
+
+
+def test_calc_log_missing_file(tmp_path):
+    log = CalcLog(str(tmp_path / "missing.csv"))
+    assert log.refresh() == 0
+    assert log.pages == 0
+
+
+def write_log(path, rows, header=True):
+    with open(path, "w", encoding="utf-8") as f:
+        if header:
+            f.write("Zahl 1,Operator,Zahl 2,Ergebnis,Zeitstempel\n")
+        for a, op, b, result, ts in rows:
+            f.write(f"{a},{op},{b},{result},{ts}\n")
+
+
+def sample_rows(start, count, day="2024-05-01"):
+    ops = "+-*/"
+    return [(float(i), ops[i % 4], 1.0, float(i * 7 % 13), f"{day} 10:{i // 60:02d}:{i % 60:02d}")
+            for i in range(start, start + count)]
+
+
+def test_calc_log_reads_rotated_segments(tmp_path):
+    path = tmp_path / "rechner_log.csv"
+    write_log(f"{path}.2", sample_rows(0, 30))
+    write_log(f"{path}.1", sample_rows(30, 30), header=False)
+    write_log(path, sample_rows(60, 15))
+
+    log = CalcLog(str(path), page_size=10)
+    assert log.refresh() == 75
+    assert log.segments == [f"{path}.2", f"{path}.1", str(path)]
+    assert [row.a for row in log.read(28, 4)] == ["28.0", "29.0", "30.0", "31.0"]
+    assert log.page(-1)[-1].a == "74.0"
+
+    # rotation: the live log becomes .1, its index moves with it
+    live = log._segments[-1]
+    (tmp_path / "rechner_log.csv.2").rename(tmp_path / "rechner_log.csv.3")
+    (tmp_path / "rechner_log.csv.1").rename(tmp_path / "rechner_log.csv.2")
+    path.rename(tmp_path / "rechner_log.csv.1")
+    write_log(path, sample_rows(75, 5))
+    assert log.refresh() == 80
+    assert log._segments[2] is live
+    assert [row.a for row in log.read(73, 4)] == ["73.0", "74.0", "75.0", "76.0"]
+
+
+def test_log_query_filters_and_sorts(tmp_path):
+    path = tmp_path / "rechner_log.csv"
+    rows = sample_rows(0, 200)
+    write_log(path, rows)
+    log = CalcLog(str(path), page_size=10)
+    log.refresh()
+
+    query = log.query(operator="mul")
+    expected = [f"{float(i)}" for i in range(200) if i % 4 == 2]
+    assert [row.a for row in query.page(0)] == expected[:10]
+    assert [row.a for row in query.page(3)] == expected[30:40]
+    assert query.count_known is None  # only scanned as far as page 3
+    assert [row.a for row in query.page(4)] == expected[40:50]
+    assert query.count() == 50
+    try:
+        query.page(5)
+        assert False, "page past the last match"
+    except IndexError:
+        pass
+
+    newest = log.query(operator="/", descending=True)
+    divisions = [f"{float(i)}" for i in range(199, -1, -1) if i % 4 == 3]
+    assert [row.a for row in newest.page(1)] == divisions[10:20]
+    assert [row.a for row in newest.page(0)] == divisions[:10]
+    assert newest.count_known is None  # read backwards only as far as needed
+    assert newest.count() == 50
+    assert [row.a for row in log.query(descending=True).page(19)][-1] == "0.0"
+
+    window = log.query(since="2024-05-01 10:01:00", until="2024-05-01 10:01:59")
+    assert window._row_bounds() == (60, 120)
+    assert window.count() == 60
+    assert [row.a for row in window.page(5)][-1] == "119.0"
+    assert log.query(until="2024-05-01").count() == 200  # a date includes the whole day
+
+    by_result = log.query(sort="result", descending=True)
+    top = by_result.page(0) + by_result.page(1) + by_result.page(2)
+    results = [float(row.result) for row in top]
+    assert results == sorted(results, reverse=True) and results[0] == 12.0
+    assert sorted(float(row.result) for row in log.query(sort="result")) == sorted(r[3] for r in rows)
+
+    for bad in ({"operator": "%"}, {"sort": "colour"}):
+        try:
+            log.query(**bad)
+            assert False, f"accepted {bad}"
+        except ValueError:
+            pass
+
+
+def test_history_cli(tmp_path, capsys):
+    from corally.cli.history import history_cli
+
+    path = tmp_path / "rechner_log.csv"
+    write_log(path, sample_rows(0, 50))
+    history_cli(["--file", str(path), "--op", "+", "--page", "2", "--page-size", "5", "--format", "csv"])
+    out = capsys.readouterr().out.splitlines()
+    assert out[0] == "a,operator,b,result,timestamp"
+    assert [line.split(",")[0] for line in out[1:]] == ["20.0", "24.0", "28.0", "32.0", "36.0"]
+
+    history_cli(["--file", str(path), "--since", "2024-05-01 10:00:45", "--count"])
+    assert capsys.readouterr().out.strip() == "5"
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tests for hosting the API servers in-process and in a child process
+"""
+
+import pytest
+import requests
+
+from corally.api.hosting import ThreadServer, host_server
+
+
+def test_thread_server_binds_before_ready_and_stops(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    server = ThreadServer("free")
+    assert server.port  # known before the server runs
+
+    server.start()
+    server.wait_ready(timeout=20)
+    assert requests.get(server.url + "/", timeout=5).json()["status"] == "running"
+    assert server.stop(timeout=5)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        requests.get(server.url + "/", timeout=1)
+
+
+def test_startup_failure_is_reported(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(RuntimeError):
+        host_server("corally.api.free_server:no_such_app", timeout=20)
+
+
+def test_process_server_reports_ready(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    server = host_server("free", mode="process", timeout=60)
+    try:
+        assert server.pid and server.port
+        assert requests.get(server.url + "/", timeout=5).status_code == 200
+    finally:
+        assert server.stop(timeout=10)
+    assert not server.is_running()
+
+
+def test_make_server_on_uvicorn_without_graceful_timeout(monkeypatch):
+    """uvicorn < 0.24 has no timeout_graceful_shutdown; the server is still created"""
+    import uvicorn
+    from corally.api.hosting import make_server
+
+    class OldConfig(uvicorn.Config):
+        def __init__(self, app, log_level=None, lifespan="auto"):
+            super().__init__(app, log_level=log_level, lifespan=lifespan)
+
+    monkeypatch.setattr(uvicorn, "Config", OldConfig)
+    server = make_server("free", lambda: None)
+    assert isinstance(server.config, OldConfig)
+    assert server.config.timeout_graceful_shutdown is None
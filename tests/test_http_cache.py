@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Tests for ETag, Cache-Control and 304 handling on /convert
+"""
+
+from corally.api.http_cache import cache_control, etag_matches, make_etag
+
+
+def test_cache_control_uses_remaining_ttl():
+    assert cache_control(1000.0, 3600, now=1600.0) == "public, max-age=3000"
+    assert cache_control(1000.0, 3600, 600, now=1600.0) == "public, max-age=3000, stale-while-revalidate=600"
+    assert cache_control(1000.0, 3600, now=5000.0) == "public, max-age=0, must-revalidate"
+
+
+def test_etag_weak_comparison():
+    etag = make_etag("EUR-USD-1.0", 1000.0)
+    assert etag.startswith('W/"')
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", {etag[2:]}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches(make_etag("EUR-USD-1.0", 2000.0), etag)
+
+
+def test_conditional_convert_returns_304(monkeypatch):
+    """A repeated request with the ETag gets 304 until the rate is refreshed"""
+    from fastapi.testclient import TestClient
+    from corally.api import free_server
+
+    async def fake_rate(from_currency, to_currency):
+        return 1.1
+
+    monkeypatch.setattr(free_server, "get_exchange_rate", fake_rate)
+    free_server.CACHE.clear()
+    client = TestClient(free_server.app)
+    params = {"from_currency": "EUR", "to_currency": "USD", "amount": 5}
+
+    first = client.get("/convert", params=params)
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"].startswith("public, max-age=")
+
+    second = client.get("/convert", params=params, headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == etag
+
+    free_server.CACHE[free_server.get_cache_key("EUR", "USD", 5.0)]["timestamp"] += 1
+    third = client.get("/convert", params=params, headers={"If-None-Match": etag})
+    assert third.status_code == 200
+    assert third.headers["etag"] != etag
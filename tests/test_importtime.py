@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Tests for the import-time budget of the CLI entry points
+"""
+
+from corally.cli.importtime import ENTRY_POINTS, HEAVY_MODULES, measure, parse_importtime
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _csv
+import time:       300 |        420 | csv
+import time:        50 |         50 |     _datetime
+import time:       200 |        250 |   datetime
+import time:       100 |        770 | corally
+"""
+
+
+def test_parse_importtime():
+    assert parse_importtime(SAMPLE) == [
+        ("_csv", 1, 120),
+        ("csv", 0, 420),
+        ("_datetime", 2, 50),
+        ("datetime", 1, 250),
+        ("corally", 0, 770),
+    ]
+
+
+def test_entry_points_do_not_import_heavy_subsystems():
+    """The text CLIs must not load tkinter or the server stack"""
+    for module in ENTRY_POINTS.values():
+        ms, packages = measure(module)
+        assert ms > 0
+        assert not set(packages) & set(HEAVY_MODULES), module
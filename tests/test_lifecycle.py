@@ -0,0 +1,113 @@
+import os
+import socket
+import time
+
+import pytest
+import requests
+
+from corally.api import lifecycle
+from corally.api.hosting import ThreadServer
+
+
+def _runtime(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(lifecycle, "RUNTIME_DIR", tmp_path / "run")
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.mark.parametrize("app", ["free", "paid"])
+def test_embedded_server_is_registered_and_stopped(monkeypatch, tmp_path, app):
+    _runtime(monkeypatch, tmp_path)
+    server = lifecycle.start_embedded(app, "127.0.0.1", 0)
+    try:
+        record = lifecycle.find_server(server.port)
+        assert record["pid"] == os.getpid()
+        assert record["embedded"] is True
+        assert [(s["port"], s["ready"]) for s in lifecycle.list_servers()] == [(server.port, True)]
+
+        # the endpoint needs the recorded token
+        response = requests.post(server.url + "/shutdown", headers={"X-Shutdown-Token": "wrong"}, timeout=2)
+        assert response.status_code == 403
+
+        started = time.monotonic()
+        assert lifecycle.stop_server(server.port)
+        assert time.monotonic() - started < 1.0
+        server.thread.join(2)
+        assert not server.thread.is_alive()
+        assert lifecycle.read_record(server.port) is None
+    finally:
+        server.stop(timeout=1)
+
+
+def test_shutdown_endpoint_disabled_without_token():
+    with ThreadServer("free") as server:
+        response = requests.post(server.url + "/shutdown", headers={"X-Shutdown-Token": ""}, timeout=2)
+        assert response.status_code == 404
+        assert server.is_running()
+
+
+def test_stale_record_is_removed(monkeypatch, tmp_path):
+    _runtime(monkeypatch, tmp_path)
+    port = _free_port()
+    lifecycle.write_record({"pid": 2 ** 22 + 1, "host": "127.0.0.1", "port": port, "app": "free",
+                            "token": "t", "embedded": False})
+    assert lifecycle.list_servers() == []
+    assert lifecycle.read_record(port) is None
+    assert lifecycle.stop_server(port) is False
+
+
+@pytest.mark.parametrize("app", ["free", "paid"])
+def test_detached_server_start_and_stop(monkeypatch, tmp_path, app):
+    _runtime(monkeypatch, tmp_path)
+    monkeypatch.setenv("CORALLY_RUNTIME_DIR", str(tmp_path / "run"))
+    port = _free_port()
+    record = lifecycle.start_server(app, port=port, timeout=30)
+    try:
+        assert record["pid"] != os.getpid()
+        assert record["app"] == app
+        assert lifecycle.start_server(app, port=port)["pid"] == record["pid"]  # reused
+
+        started = time.monotonic()
+        assert lifecycle.stop_server(port)
+        assert time.monotonic() - started < 1.0
+        assert not lifecycle.pid_alive(record["pid"])
+        assert lifecycle.list_servers() == []
+    finally:
+        if lifecycle.pid_alive(record["pid"]):
+            lifecycle._terminate(record["pid"], timeout=1)
+
+
+def test_gui_stop_worker_stops_embedded_server(monkeypatch, tmp_path):
+    """The GUI's stop runs on a worker thread: no Tk, just the server and its record"""
+    from corally.gui.main import ModernCalculatorGUI
+
+    _runtime(monkeypatch, tmp_path)
+    server = lifecycle.start_embedded("free", "127.0.0.1", 0)
+    try:
+        stopped, notes = ModernCalculatorGUI._stop_servers(server.port, server)
+        assert stopped
+        assert notes == [(f"✅ Stopped server on port {server.port}\n", "result")]
+        assert lifecycle.read_record(server.port) is None
+        assert not server.is_running()
+    finally:
+        server.stop(timeout=1)
+
+
+def test_gui_force_stop_worker_stops_every_server(monkeypatch, tmp_path):
+    """The GUI's force stop also runs without Tk and reports the stopped ports"""
+    from corally.gui.main import ModernCalculatorGUI
+
+    _runtime(monkeypatch, tmp_path)
+    server = lifecycle.start_embedded("free", "127.0.0.1", 0)
+    try:
+        results, stopped_any = ModernCalculatorGUI._force_stop_servers(server)
+        assert stopped_any
+        assert results == {server.port: True}
+        assert lifecycle.list_servers() == []
+    finally:
+        server.stop(timeout=1)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests for the Prometheus metrics endpoint
+"""
+
+from corally.api.metrics import ApiMetrics, Registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Buckets are cumulative and end with +Inf, _sum and _count"""
+    registry = Registry()
+    hist = registry.histogram("latency_seconds", "Latency.", ("endpoint",), buckets=(0.1, 1.0))
+    hist.observe(0.05, endpoint="/convert")
+    hist.observe(0.5, endpoint="/convert")
+    hist.observe(5, endpoint="/convert")
+
+    text = registry.render()
+    assert 'latency_seconds_bucket{endpoint="/convert",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{endpoint="/convert",le="1"} 2' in text
+    assert 'latency_seconds_bucket{endpoint="/convert",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{endpoint="/convert"} 3' in text
+    assert "# TYPE latency_seconds histogram" in text
+
+
+def test_upstream_tracks_inflight_and_errors():
+    """The upstream context manager counts exceptions and resets the in-flight gauge"""
+    metrics = ApiMetrics()
+    try:
+        with metrics.upstream("mock"):
+            assert metrics.upstream_inflight.value(provider="mock") == 1
+            raise TimeoutError()
+    except TimeoutError:
+        pass
+    assert metrics.upstream_inflight.value(provider="mock") == 0
+    assert metrics.upstream_errors.value(provider="mock", reason="TimeoutError") == 1
+    assert metrics.upstream_latency.count(provider="mock") == 1
+
+
+def test_metrics_endpoint_reports_requests_and_cache(monkeypatch):
+    """/metrics exposes request latency by route template and cache counters"""
+    from fastapi.testclient import TestClient
+    from corally.api import free_server
+
+    async def fake_rate(from_currency, to_currency):
+        return 1.1
+
+    monkeypatch.setattr(free_server, "get_exchange_rate", fake_rate)
+    free_server.CACHE.clear()
+    labels = {"method": "GET", "endpoint": "/convert", "status": "200"}
+    before = free_server.metrics.requests.count(**labels)
+    client = TestClient(free_server.app)
+    client.get("/convert", params={"from_currency": "EUR", "to_currency": "USD", "amount": 3})
+    client.get("/convert", params={"from_currency": "EUR", "to_currency": "USD", "amount": 3})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'corally_http_request_duration_seconds_count{method="GET",endpoint="/convert",status="200"}' in text
+    assert free_server.metrics.requests.count(**labels) == before + 2
+    assert "corally_cache_hits_total" in text
+    assert "corally_event_loop_lag_seconds" in text
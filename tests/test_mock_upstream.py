@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Tests for the local mock upstream
+"""
+
+import asyncio
+import random
+
+import httpx
+from fastapi.testclient import TestClient
+
+from corally.api.mock_upstream import LatencyModel, MockUpstream, create_mock_app
+from corally.api.upstream import Provider, ProviderChain
+
+
+def test_speaks_both_provider_formats():
+    client = TestClient(create_mock_app(MockUpstream(seed=1)))
+
+    latest = client.get("/v4/latest/EUR").json()
+    assert latest["base"] == "EUR" and latest["rates"]["USD"] == 1.08
+
+    converted = client.get("/convert", params={"from": "EUR", "to": "USD", "amount": 10, "access_key": "x"}).json()
+    assert converted["success"] is True
+    assert converted["info"]["quote"] == 1.08
+    assert abs(converted["result"] - 10.8) < 1e-9
+
+    assert client.get("/v4/latest/XXX").status_code == 404
+    assert client.get("/convert", params={"from": "XXX", "to": "USD"}).json()["success"] is False
+
+
+def test_error_rate_and_drift():
+    mock = MockUpstream(error_rate=1.0, drift=0.5, seed=2)
+    client = TestClient(create_mock_app(mock))
+    assert client.get("/v4/latest/EUR").status_code == 503
+
+    mock.error_rate = 0.0
+    first = client.get("/latest", params={"base": "EUR", "symbols": "USD"}).json()["rates"]["USD"]
+    mock._last_drift -= 10
+    second = client.get("/latest", params={"base": "EUR", "symbols": "USD"}).json()["rates"]["USD"]
+    assert first != second
+    assert mock.stats()["errors"] == 1
+
+
+def test_latency_models():
+    rng = random.Random(3)
+    assert LatencyModel.parse("const:0.05").sample(rng) == 0.05
+    assert 0.01 <= LatencyModel.parse("uniform:0.01:0.02").sample(rng) <= 0.02
+    assert LatencyModel.parse("lognormal:0.05:0.5").sample(rng) > 0
+
+
+def test_provider_chain_against_mock():
+    """The free server's provider chain can be pointed at the mock"""
+    transport = httpx.ASGITransport(app=create_mock_app(MockUpstream(seed=4)))
+    chain = ProviderChain([Provider("http://mock/v4/latest/"), Provider("http://mock/latest")], transport=transport)
+    assert asyncio.run(chain.fetch_rate("EUR", "GBP")) == 0.85
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for background cache persistence and event-loop lag measurement
+"""
+
+import asyncio
+import threading
+import time
+
+from corally.api.monitor import LoopLagMonitor
+from corally.api.persistence import CacheWriter
+
+
+def test_requests_are_coalesced_and_run_off_thread():
+    """A burst of requests for the same job runs it once on the writer thread"""
+    runs = []
+    writer = CacheWriter(delay=0.05)
+
+    for i in range(100):
+        writer.request("csv", lambda i=i: runs.append((i, threading.current_thread().name)))
+    writer.request("put:EUR-USD-1.0", lambda: runs.append(("put", threading.current_thread().name)))
+
+    assert writer.flush(timeout=5)
+    writer.stop()
+
+    assert runs == [(99, "cache-writer"), ("put", "cache-writer")]
+    assert writer.stats()["jobs"] == 2
+
+
+def test_stop_flushes_pending_jobs():
+    """Jobs queued right before shutdown are still written"""
+    written = []
+    writer = CacheWriter(delay=10)
+    writer.request("csv", lambda: written.append(True))
+    writer.stop()
+    assert written == [True]
+
+
+def test_failing_job_is_counted():
+    """A failing job does not kill the writer thread"""
+    writer = CacheWriter(delay=0)
+    writer.request("bad", lambda: 1 / 0)
+    writer.flush(timeout=5)
+    ok = []
+    writer.request("good", lambda: ok.append(True))
+    writer.flush(timeout=5)
+    writer.stop()
+    assert writer.errors == 1
+    assert ok == [True]
+
+
+def test_loop_lag_monitor_sees_blocking_work():
+    """Blocking the loop shows up as lag"""
+    async def scenario():
+        monitor = LoopLagMonitor(interval=0.01)
+        await monitor.start()
+        await asyncio.sleep(0.05)
+        time.sleep(0.1)  # block the event loop
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+        return monitor.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["samples"] > 0
+    assert stats["max_ms"] >= 50
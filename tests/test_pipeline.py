@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for the non-interactive calc / convert / interest commands and record streaming
+"""
+
+import io
+import json
+import sys
+
+import pytest
+
+from corally.cli.pipeline import pipeline_cli
+from corally.core import CalculatorCore
+from corally.core.batch import calc_processor, currency_processor, stream_records
+
+
+class Stdin:
+    def __init__(self, text):
+        self.buffer = io.BytesIO(text.encode("utf-8"))
+
+
+def test_calculate_many_logs_once(tmp_path):
+    log = tmp_path / "rechner_log.csv"
+    CalculatorCore(str(log))
+    results = CalculatorCore.calculate_many([["6", "3"], ["1,5", " 2 "], ["1", "0"], ["x", "1"], ["7"]],
+                                            "divide", str(log))
+    assert results[:2] == [2.0, 0.75]
+    assert results[2] == "Division by zero is not allowed"
+    assert results[3].startswith("Invalid number input") and results[4].endswith("two numbers required")
+    rows = log.read_text(encoding="utf-8").splitlines()
+    assert len(rows) == 3 and rows[1].startswith("6.0,/,3.0,2.0,")
+
+    with pytest.raises(ValueError):
+        CalculatorCore.calculate_many([], "power")
+
+
+def test_stream_records_csv_and_ndjson():
+    out = io.StringIO()
+    progress = stream_records(io.BytesIO(b"a;b\n1;2\n\n3;x\n"), out, calc_processor("add"), header=True,
+                              chunk_rows=1)
+    assert out.getvalue().splitlines() == [
+        "a;b;result;error", "1;2;3.0;", "3;x;;Invalid number input: could not convert string to float: 'x'"]
+    assert (progress.rows, progress.errors) == (2, 1)
+
+    out = io.StringIO()
+    stream_records(io.BytesIO(b"100,note\n"), out, currency_processor("eur_to_usd"), fields=["amount"],
+                   output_format="ndjson")
+    assert json.loads(out.getvalue()) == {"amount": "100", "column2": "note", "USD": 117.0, "error": None}
+
+
+def test_cli_single_calculations(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    pipeline_cli(["calc", "add", "-1", "2.5"])
+    pipeline_cli(["convert", "--from", "EUR", "--to", "USD", "100", "200"])
+    pipeline_cli(["interest", "1000", "5", "01.01.2024", "31.12.2024", "--method", "30/360"])
+    assert capsys.readouterr().out.splitlines() == ["1.5", "117.0", "234.0", "50.0,1050.0"]
+    assert (tmp_path / "data" / "rechner_log.csv").read_text(encoding="utf-8").count("\n") == 2
+
+    with pytest.raises(SystemExit) as exit_info:
+        pipeline_cli(["calc", "div", "1", "0", "--no-log"])
+    assert exit_info.value.code == 1
+    assert "Division by zero" in capsys.readouterr().err
+
+    with pytest.raises(SystemExit):
+        pipeline_cli(["convert", "--from", "EUR", "--to", "CHF", "1"])
+
+
+def test_cli_streams_stdin_and_files(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "stdin", Stdin("1 2\n3 4\n"))
+    pipeline_cli(["calc", "mul", "--no-log", "-d", " ", "-f", "ndjson"])
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [record["result"] for record in records] == [2.0, 12.0]
+    assert not (tmp_path / "data").exists()
+
+    first = tmp_path / "a.csv"
+    first.write_text("capital,rate,start,end\n1000,5,01.01.2024,31.12.2024\n", encoding="utf-8")
+    second = tmp_path / "b.csv"
+    second.write_text("capital,rate,start,end\n2000,x,01.01.2024,31.12.2024\n", encoding="utf-8")
+    with pytest.raises(SystemExit):  # one invalid record
+        pipeline_cli(["interest", "--header", "-i", str(first), "-i", str(second)])
+    out, err = capsys.readouterr()
+    lines = out.splitlines()
+    assert lines[0] == "capital,rate,start,end,interest,total,error"
+    assert lines[1] == "1000,5,01.01.2024,31.12.2024,50.0,1050.0,"
+    assert lines[2].startswith("2000,x,") and len(lines) == 3
+    assert "1 of 2 records invalid" in err
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests for the background refresher of hot currency pairs
+"""
+
+import asyncio
+import time
+
+from corally.api.refresh import RateRefresher
+
+
+def test_hot_pair_is_refreshed_before_expiry():
+    """A pair with enough hits is refreshed ahead of its expiry"""
+    refreshed = []
+
+    async def refresh(from_currency, to_currency):
+        refreshed.append((from_currency, to_currency))
+
+    async def scenario():
+        refresher = RateRefresher(refresh, lead=1.0, jitter=0.0, hot_threshold=2)
+        await refresher.start()
+        expires_at = time.time() + 1.05
+        refresher.touch("eur", "usd", expires_at)
+        refresher.touch("EUR", "USD", expires_at)
+        refresher.touch("GBP", "JPY", expires_at)  # only one hit: not hot
+        await asyncio.sleep(0.2)
+        await refresher.stop()
+
+    asyncio.run(scenario())
+    assert refreshed == [("EUR", "USD")]
+
+
+def test_stale_request_forces_single_refresh():
+    """Serving a stale entry triggers one refresh, even when requested twice"""
+    calls = []
+
+    async def refresh(from_currency, to_currency):
+        calls.append((from_currency, to_currency))
+        await asyncio.sleep(0.05)
+
+    async def scenario():
+        refresher = RateRefresher(refresh, hot_threshold=100, max_concurrency=1)
+        await refresher.start()
+        refresher.request_refresh("EUR", "USD")
+        await asyncio.sleep(0.01)
+        assert refresher.is_refreshing("EUR", "USD")
+        refresher.request_refresh("EUR", "USD")
+        await asyncio.sleep(0.1)
+        await refresher.stop()
+
+    asyncio.run(scenario())
+    assert calls == [("EUR", "USD")]
+
+
+def test_stop_returns_when_woken_in_the_same_turn():
+    """A wakeup racing with stop() must not keep the scheduler alive"""
+    async def refresh(from_currency, to_currency):
+        await asyncio.sleep(0)
+
+    async def scenario():
+        for _ in range(20):
+            refresher = RateRefresher(refresh, hot_threshold=100)
+            await refresher.start()
+            await asyncio.sleep(0)
+            refresher.request_refresh("EUR", "USD")  # sets the wakeup event
+            await asyncio.wait_for(refresher.stop(), 2.0)
+
+    asyncio.run(scenario())
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tests for the fast JSON response path
+"""
+
+import json
+
+from corally.api import serialization
+from corally.api.serialization import RenderedResponses, dumps
+
+
+def test_dumps_matches_standard_json():
+    payload = {"from": "EUR", "to": "USD", "amount": 100.0, "result": 108.37, "info": {"rate": 1.0837}}
+    assert json.loads(dumps(payload)) == payload
+
+
+def test_dumps_fallback_without_orjson(monkeypatch):
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert dumps({"a": 1.5, "b": "ü"}) == '{"a":1.5,"b":"ü"}'.encode("utf-8")
+
+
+def test_rendered_body_is_reused_per_version():
+    rendered = RenderedResponses(max_entries=2)
+    body = rendered.render("EUR-USD-1.0", (1.0, False), {"result": 1})
+    assert rendered.get("EUR-USD-1.0", (1.0, False)) is body
+    assert rendered.get("EUR-USD-1.0", (2.0, False)) is None
+    assert rendered.get("EUR-USD-1.0", (1.0, True)) is None
+
+    rendered.render("B", 1, {})
+    rendered.render("C", 1, {})
+    assert len(rendered) == 2
+    assert rendered.get("EUR-USD-1.0", (1.0, False)) is None
+
+
+def test_cached_convert_returns_prerendered_body(monkeypatch):
+    from fastapi.testclient import TestClient
+    from corally.api import free_server
+
+    async def fake_rate(from_currency, to_currency):
+        return 1.25
+
+    monkeypatch.setattr(free_server, "get_exchange_rate", fake_rate)
+    free_server.CACHE.clear()
+    free_server.RENDERED.clear()
+    client = TestClient(free_server.app)
+    params = {"from_currency": "EUR", "to_currency": "GBP", "amount": 4}
+
+    first = client.get("/convert", params=params).json()
+    second = client.get("/convert", params=params)
+    third = client.get("/convert", params=params)
+    assert first["cached"] is False and first["result"] == 5.0
+    assert second.json() == {**first, "cached": True}
+    assert third.content == second.content
+    assert free_server.RENDERED.hits >= 1
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite cache shared between API server workers
+"""
+
+import multiprocessing
+import time
+
+from corally.api.shared_cache import SQLiteRateStore
+
+
+def make_entry(from_currency, to_currency, amount, rate, timestamp):
+    return {
+        "timestamp": timestamp,
+        "data": {
+            "from": from_currency,
+            "to": to_currency,
+            "amount": amount,
+            "result": round(amount * rate, 2),
+            "info": {"rate": rate},
+        },
+    }
+
+
+def test_entries_are_visible_to_other_connections(tmp_path):
+    """An entry written by one worker can be read by another"""
+    path = str(tmp_path / "cache.db")
+    writer = SQLiteRateStore(path)
+    reader = SQLiteRateStore(path)
+
+    writer.put("EUR-USD-100.0", make_entry("EUR", "USD", 100.0, 1.17, 1000.0))
+    assert reader.get("EUR-USD-100.0")["data"]["result"] == 117.0
+    assert reader.count() == 1
+
+    # An older write must not replace newer data
+    writer.put("EUR-USD-100.0", make_entry("EUR", "USD", 100.0, 1.0, 999.0))
+    assert reader.get("EUR-USD-100.0")["data"]["info"]["rate"] == 1.17
+
+
+def test_update_pair_and_purge(tmp_path):
+    """A refresh updates every amount of the pair; purge drops old rows"""
+    store = SQLiteRateStore(str(tmp_path / "cache.db"))
+    now = time.time()
+    store.put_many([
+        ("EUR-USD-1.0", make_entry("EUR", "USD", 1.0, 1.1, now - 10)),
+        ("EUR-USD-50.0", make_entry("EUR", "USD", 50.0, 1.1, now - 10)),
+        ("EUR-GBP-1.0", make_entry("EUR", "GBP", 1.0, 0.8, now - 7200)),
+    ])
+
+    assert store.update_pair("EUR", "USD", 1.2, now, digits=2) == 2
+    entries = store.load_all()
+    assert entries["EUR-USD-50.0"]["data"]["result"] == 60.0
+    assert entries["EUR-USD-1.0"]["timestamp"] == now
+
+    assert store.purge(3600) == 1
+    assert store.get("EUR-GBP-1.0") is None
+
+
+def _write_entries(path, worker, count):
+    store = SQLiteRateStore(path)
+    for i in range(count):
+        store.put(f"EUR-USD-{worker}.{i}", make_entry("EUR", "USD", float(i), 1.1, time.time()))
+
+
+def test_concurrent_writers(tmp_path):
+    """Several processes writing at once do not lose entries"""
+    path = str(tmp_path / "cache.db")
+    SQLiteRateStore(path).count()  # create the schema up front
+    workers = [multiprocessing.Process(target=_write_entries, args=(path, w, 50)) for w in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(30)
+        assert process.exitcode == 0
+    assert SQLiteRateStore(path).count() == 200
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for the GUI startup path: lazy imports and the first-paint timer (no display needed)
+"""
+
+import subprocess
+import sys
+
+from corally.cli.importtime import HEAVY_MODULES, measure
+from corally.gui.startup import StartupTimer, report_mode
+
+
+class FakeRoot:
+    def __init__(self):
+        self.bindings = {}
+        self.idle = []
+
+    def bind(self, sequence, func, add=None):
+        self.bindings.setdefault(sequence, []).append(func)
+
+    def after_idle(self, func):
+        self.idle.append(func)
+
+    def fire(self, sequence):
+        for func in self.bindings.get(sequence, []):
+            func(None)
+
+    def run_idle(self):
+        idle, self.idle = self.idle, []
+        for func in idle:
+            func()
+
+
+def test_first_paint_is_marked_once_after_expose():
+    root = FakeRoot()
+    timer = StartupTimer()
+    timer.mark("window")
+    reports = []
+    timer.on_first_paint(root, lambda t: reports.append(t.report()))
+
+    root.fire("<Expose>")
+    root.fire("<Expose>")  # children are exposed too
+    assert len(root.idle) == 1 and not reports
+    root.run_idle()
+
+    assert len(reports) == 1
+    marks = reports[0]["marks_ms"]
+    assert list(marks) == ["window", "exposed", "first_paint"]
+    assert reports[0]["first_paint_ms"] == marks["first_paint"] >= marks["window"]
+
+
+def test_report_mode(monkeypatch):
+    monkeypatch.delenv("CORALLY_STARTUP_REPORT", raising=False)
+    assert report_mode() is None
+    monkeypatch.setenv("CORALLY_STARTUP_REPORT", "1")
+    assert report_mode() == "print"
+    monkeypatch.setenv("CORALLY_STARTUP_REPORT", "exit")
+    assert report_mode() == "exit"
+
+
+def test_gui_modules_defer_network_and_server_stacks():
+    """Only tkinter may be loaded before the window is shown"""
+    for module in ("corally.gui.launcher", "corally.gui.main"):
+        _, packages = measure(module)
+        assert set(packages) & set(HEAVY_MODULES) <= {"tkinter"}, module
+
+
+def test_dependency_check_does_not_import():
+    code = ("import sys; from corally.gui.launcher import find_missing_dependencies; "
+            "find_missing_dependencies(); print(any(m in sys.modules for m in ('requests', 'fastapi', 'uvicorn')))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
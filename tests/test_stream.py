@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming rate updates to subscribers
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from corally.api.stream import RateBroadcaster, parse_pairs
+
+
+def test_parse_pairs():
+    """Pairs are normalised, de-duplicated and validated"""
+    assert parse_pairs("eur-usd, EUR/GBP,EUR-USD") == [("EUR", "USD"), ("EUR", "GBP")]
+    with pytest.raises(ValueError):
+        parse_pairs("EURUSD")
+
+
+def test_publish_fans_out_to_subscribers_of_the_pair():
+    """One update reaches every subscriber of its pair and nobody else"""
+    async def scenario():
+        broadcaster = RateBroadcaster()
+        first = broadcaster.subscribe([("EUR", "USD")])
+        second = broadcaster.subscribe([("EUR", "USD"), ("EUR", "GBP")])
+        other = broadcaster.subscribe([("GBP", "JPY")])
+
+        assert broadcaster.publish("eur", "usd", 1.17, 1000.0) == 2
+        assert first.queue.qsize() == second.queue.qsize() == 1
+        assert other.queue.empty()
+
+        event = first.queue.get_nowait().decode()
+        assert event.startswith("event: rate\n")
+        payload = json.loads(event.split("data: ", 1)[1])
+        assert payload == {"from": "EUR", "to": "USD", "rate": 1.17, "timestamp": 1000.0}
+
+        broadcaster.unsubscribe(first)
+        broadcaster.unsubscribe(second)
+        assert not broadcaster.has_subscribers("EUR", "USD")
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscriber_drops_oldest_events():
+    """A full queue keeps the newest events"""
+    async def scenario():
+        broadcaster = RateBroadcaster(queue_size=2)
+        subscription = broadcaster.subscribe([("EUR", "USD")])
+        for rate in (1.0, 2.0, 3.0):
+            broadcaster.publish("EUR", "USD", rate)
+
+        assert subscription.dropped == 1
+        rates = [json.loads(subscription.queue.get_nowait().decode().split("data: ", 1)[1])["rate"]
+                 for _ in range(2)]
+        assert rates == [2.0, 3.0]
+
+    asyncio.run(scenario())
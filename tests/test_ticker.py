@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for the local rate table and the rate feed behind live conversion
+"""
+
+import queue
+import time
+
+import requests
+
+from corally.api.client import ApiClient
+from corally.gui import ticker
+from corally.gui.ticker import RateFeed, RateTable
+
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+class FakeStream:
+    def __init__(self):
+        self.events = queue.Queue()
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+        self.events.put(None)
+
+
+class FakeClient:
+    """Stands in for ApiClient: records subscriptions and snapshot requests"""
+
+    def __init__(self, stream=True):
+        self.stream = stream
+        self.subscriptions = []
+        self.snapshots = []
+        self.current = None
+
+    def open_stream(self, pairs):
+        if not self.stream:
+            response = requests.Response()
+            response.status_code = 404
+            raise requests.exceptions.HTTPError("404", response=response)
+        self.subscriptions.append(list(pairs))
+        self.current = FakeStream()
+        return self.current
+
+    @staticmethod
+    def iter_rate_events(response):
+        while True:
+            event = response.events.get()
+            if event is None:
+                raise requests.exceptions.ConnectionError("closed")
+            if event == "end":
+                return  # the server closed the stream cleanly
+            yield event
+
+    def rates(self, pairs):
+        self.snapshots.append(list(pairs))
+        return {pair: 2.0 for pair in pairs}
+
+
+def test_rate_table_converts_and_tracks_changes():
+    table = RateTable()
+    assert table.rate("EUR", "USD") is None
+    assert table.convert(5, "usd", "USD") == 5
+    table.update("EUR", "USD", 1.25)
+    version = table.version
+    table.update("eur", "usd", 1.25)  # unchanged rate: no redraw needed
+    assert table.version == version
+    assert table.convert(10, "EUR", "USD") == 12.5
+    assert table.rate("USD", "EUR") == 0.8  # from the inverse pair
+    table.update("EUR", "USD", 1.3)
+    rate, previous, _ = table.get("EUR", "USD")
+    assert (rate, previous) == (1.3, 1.25)
+
+
+def test_feed_applies_pushed_rates_and_resubscribes_on_watch():
+    client = FakeClient()
+    table = RateTable()
+    feed = RateFeed(client, table, [("EUR", "USD")]).start()
+    try:
+        wait_for(lambda: client.current is not None)
+        client.current.events.put(("EUR", "USD", 1.17, time.time()))
+        wait_for(lambda: table.rate("EUR", "USD") == 1.17)
+
+        first = client.current
+        assert feed.watch("EUR", "CHF")
+        assert not feed.watch("CHF", "EUR")  # the inverse is already covered
+        wait_for(lambda: len(client.subscriptions) == 2)
+        assert first.closed
+        assert client.subscriptions[-1] == [("EUR", "USD"), ("EUR", "CHF")]
+        assert feed.error is None
+    finally:
+        feed.stop()
+    assert not feed.running
+
+
+def test_feed_backs_off_after_the_stream_ends(monkeypatch):
+    """A stream closed by the server is reopened after RETRY_INTERVAL, not at once"""
+    monkeypatch.setattr(ticker, "RETRY_INTERVAL", 0.3)
+    client = FakeClient()
+    feed = RateFeed(client, RateTable(), [("EUR", "USD")]).start()
+    try:
+        wait_for(lambda: client.current is not None)
+        ended = time.monotonic()
+        client.current.events.put("end")
+        wait_for(lambda: len(client.subscriptions) == 2)
+        assert time.monotonic() - ended >= 0.3
+    finally:
+        feed.stop()
+
+
+def test_feed_falls_back_to_polling():
+    client = FakeClient(stream=False)
+    table = RateTable()
+    feed = RateFeed(client, table, [("EUR", "USD")], interval=60).start()
+    try:
+        wait_for(lambda: table.rate("EUR", "USD") == 2.0)
+        assert feed.mode == "poll"
+        feed.watch("GBP", "JPY")  # wakes the poll wait instead of waiting 60s
+        wait_for(lambda: table.rate("GBP", "JPY") == 2.0)
+        assert len(client.snapshots) == 2
+    finally:
+        feed.stop()
+
+
+def test_client_parses_sse_events():
+    class Response:
+        def iter_lines(self, decode_unicode=False):
+            yield ": subscribed"
+            yield ""
+            yield "event: rate"
+            yield 'data: {"from": "EUR", "to": "USD", "rate": 1.1, "timestamp": 5.0}'
+            yield ""
+
+    assert list(ApiClient.iter_rate_events(Response())) == [("EUR", "USD", 1.1, 5.0)]
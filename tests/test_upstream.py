@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tests for the upstream provider chain: failover, hedging and circuit breakers
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from corally.api.upstream import CircuitBreaker, Provider, ProviderChain
+
+
+def make_transport(delays, statuses=None, calls=None):
+    """Mock transport answering per host with a delay and status code"""
+    statuses = statuses or {}
+
+    async def handler(request):
+        host = request.url.host
+        if calls is not None:
+            calls.append(host)
+        await asyncio.sleep(delays.get(host, 0))
+        status = statuses.get(host, 200)
+        return httpx.Response(status, json={"rates": {"USD": 1.1}} if status == 200 else {})
+
+    return httpx.MockTransport(handler)
+
+
+def test_failover_to_next_provider():
+    """A failing provider is followed by the next one without waiting"""
+    calls = []
+    chain = ProviderChain(
+        [Provider("http://a.test/latest/"), Provider("http://b.test/latest")],
+        transport=make_transport({}, {"a.test": 500}, calls),
+    )
+    assert asyncio.run(chain.fetch_rate("EUR", "USD")) == 1.1
+    assert calls == ["a.test", "b.test"]
+    assert chain.failovers == 1
+
+
+def test_slow_provider_is_hedged():
+    """A request slower than the hedge delay races the next provider"""
+    chain = ProviderChain(
+        [Provider("http://slow.test/", default_hedge_delay=0.05), Provider("http://fast.test/")],
+        transport=make_transport({"slow.test": 2.0}),
+    )
+    started = time.perf_counter()
+    assert asyncio.run(chain.fetch_rate("EUR", "USD")) == 1.1
+    assert time.perf_counter() - started < 1.0
+    assert chain.hedges == 1
+
+
+def test_open_circuit_skips_provider():
+    """After repeated failures a provider is no longer asked"""
+    calls = []
+    chain = ProviderChain(
+        [Provider("http://down.test/", breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60)),
+         Provider("http://up.test/")],
+        transport=make_transport({}, {"down.test": 503}, calls),
+    )
+    for _ in range(3):
+        asyncio.run(chain.fetch_rate("EUR", "USD"))
+    assert calls.count("down.test") == 2
+    assert chain.providers[0].breaker.state == "open"
+
+
+def test_unknown_currency_is_client_error():
+    """A 4xx answer is reported to the caller and does not trip the breaker"""
+    chain = ProviderChain([Provider("http://a.test/")], transport=make_transport({}, {"a.test": 404}))
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(chain.fetch_rate("XXX", "USD"))
+    assert exc.value.status_code == 404
+    assert chain.providers[0].breaker.failures == 0
+
+
+def test_half_open_breaker_allows_one_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_connections_are_pooled_per_provider():
+    """Requests reuse one client per provider until the chain is closed"""
+    chain = ProviderChain([Provider("http://a.test/")], transport=make_transport({}))
+
+    async def scenario():
+        await chain.fetch_rate("EUR", "USD")
+        client = chain.clients.get("a.test", chain.transport)
+        await chain.fetch_rate("EUR", "USD")
+        assert chain.clients.get("a.test", chain.transport) is client
+        await chain.aclose()
+        return client
+
+    assert asyncio.run(scenario()).is_closed
+
+
+def test_hedged_away_request_latency_is_recorded():
+    """A request cancelled by a faster hedge still counts toward the p95"""
+    slow = Provider("http://slow.test/", default_hedge_delay=0.05)
+    chain = ProviderChain([slow, Provider("http://fast.test/")],
+                          transport=make_transport({"slow.test": 2.0}))
+    assert asyncio.run(chain.fetch_rate("EUR", "USD")) == 1.1
+    assert len(slow.latencies) == 1 and slow.latencies[0] >= 0.05
+
+
+def test_malformed_json_fails_over_and_counts_as_failure():
+    """A JSON answer of the wrong shape is a provider failure, not a server error"""
+    async def handler(request):
+        if request.url.host == "bad.test":
+            return httpx.Response(200, json=["not", "an", "object"])
+        return httpx.Response(200, json={"rates": {"USD": 1.1}})
+
+    bad = Provider("http://bad.test/")
+    chain = ProviderChain([bad, Provider("http://good.test/")], transport=httpx.MockTransport(handler))
+    assert asyncio.run(chain.fetch_rate("EUR", "USD")) == 1.1
+    assert chain.failovers == 1
+    assert bad.errors == 1 and bad.breaker.failures == 1
+
+    alone = ProviderChain([Provider("http://bad.test/")], transport=httpx.MockTransport(handler))
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(alone.fetch_rate("EUR", "USD"))
+    assert e.value.status_code == 503
+    assert "unexpected response" in e.value.detail